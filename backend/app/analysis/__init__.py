@@ -0,0 +1,26 @@
+"""
+文本分析（检索分词）
+
+记忆检索、任务搜索和技能搜索共用同一套分析器，保证查询和索引的切词方式一致。
+"""
+from backend.app.analysis.analyzer import (
+    ANALYZERS,
+    DEFAULT_ANALYZER,
+    STOPWORDS,
+    Analyzer,
+    cjk_bigram_tokenize,
+    get_analyzer,
+    normalize,
+)
+from backend.app.analysis.match import rank_documents
+
+__all__ = [
+    "ANALYZERS",
+    "DEFAULT_ANALYZER",
+    "STOPWORDS",
+    "Analyzer",
+    "cjk_bigram_tokenize",
+    "get_analyzer",
+    "normalize",
+    "rank_documents",
+]
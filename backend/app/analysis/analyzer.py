@@ -0,0 +1,136 @@
+"""
+analyzer.py - 检索用文本分析流水线
+
+    text ──► normalize (NFKC + 小写) ──► tokenizer ──► filters ──► tokens
+
+内置分析器：
+- legacy:    原 MemoryStore._tokenize（连续中文整段作为一个词，仅用于对比和兼容旧索引）
+- cjk:       拉丁文字按词切分，中日韩连续字符切成字符二元组（单字保留为一元）
+- cjk_stop:  cjk + 中英文停用词过滤
+
+例如 "用户喜欢 Python 异步" -> ["用户", "户喜", "喜欢", "python", "异步"]，
+查询 "喜欢" 可以命中整句，而不需要重复原句。
+
+analyzer.version 会写入索引 manifest，分析器变化时索引自动重建。
+"""
+import re
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+Tokenizer = Callable[[str], List[str]]
+TokenFilter = Callable[[List[str]], List[str]]
+
+# 中日韩统一表意文字（含扩展 A、兼容区）、日文假名、韩文音节
+_CJK = "㐀-䶿一-鿿豈-﫿぀-ヿ가-힯"
+_RUN_RE = re.compile(rf"[0-9a-zÀ-ɏ]+|[{_CJK}]+")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+STOPWORDS = frozenset({
+    # English
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "were", "with",
+    # 中文（单字和常见二元组）
+    "的", "了", "是", "在", "和", "也", "就", "都", "而", "及", "与", "着",
+    "我们", "你们", "他们", "这个", "那个", "一个", "没有", "什么", "就是", "还是",
+})
+
+
+def normalize(text: str) -> str:
+    """NFKC 归一化（全角转半角等）并转小写"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def cjk_bigram_tokenize(text: str) -> List[str]:
+    """
+    拉丁文字按词切分，中日韩连续字符切成二元组
+
+    Args:
+        text: 已归一化的文本
+
+    Returns:
+        词列表（保持原文顺序）
+    """
+    tokens: List[str] = []
+    for run in _RUN_RE.findall(text):
+        if not _CJK_RE.match(run):
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def legacy_tokenize(text: str) -> List[str]:
+    """原 MemoryStore._tokenize 的行为"""
+    return re.findall(r"[a-z0-9一-鿿]+", text)
+
+
+def min_length_filter(min_latin: int = 2) -> TokenFilter:
+    """丢弃过短的拉丁词（单个字母、数字），中日韩单字保留"""
+    def _filter(tokens: List[str]) -> List[str]:
+        return [t for t in tokens if len(t) >= min_latin or _CJK_RE.match(t)]
+    return _filter
+
+
+def stopword_filter(stopwords: Iterable[str] = STOPWORDS) -> TokenFilter:
+    """过滤停用词"""
+    stop = frozenset(stopwords)
+
+    def _filter(tokens: List[str]) -> List[str]:
+        return [t for t in tokens if t not in stop]
+    return _filter
+
+
+class Analyzer:
+    """
+    文本分析器：归一化 -> 切词 -> 过滤
+
+    Usage:
+        analyzer = get_analyzer("cjk")
+        tokens = analyzer("用户喜欢 Python")
+        index = MemoryIndex(workspace_dir, analyzer, tokenizer_version=analyzer.version)
+    """
+
+    def __init__(self, name: str, tokenizer: Tokenizer, filters: Sequence[TokenFilter] = (),
+                 version: str = "1"):
+        self.name = name
+        self.tokenizer = tokenizer
+        self.filters = tuple(filters)
+        self.version = version
+
+    def __call__(self, text: str) -> List[str]:
+        tokens = self.tokenizer(normalize(text))
+        for f in self.filters:
+            tokens = f(tokens)
+        return tokens
+
+    def __repr__(self) -> str:
+        return f"Analyzer({self.name!r}, version={self.version!r})"
+
+
+ANALYZERS: Dict[str, Analyzer] = {
+    # version "1" 与旧索引 manifest 中的 tokenizer 字段一致，切回 legacy 时不必重建
+    "legacy": Analyzer("legacy", legacy_tokenize, [min_length_filter()], version="1"),
+    "cjk": Analyzer("cjk", cjk_bigram_tokenize, [min_length_filter()], version="cjk-bigram/1"),
+    "cjk_stop": Analyzer("cjk_stop", cjk_bigram_tokenize, [min_length_filter(), stopword_filter()],
+                         version="cjk-bigram-stop/1"),
+}
+
+DEFAULT_ANALYZER = "cjk"
+
+
+def get_analyzer(name: Optional[str] = None) -> Analyzer:
+    """
+    按名称获取分析器
+
+    Args:
+        name: 分析器名称（legacy / cjk / cjk_stop），默认 cjk
+
+    Returns:
+        Analyzer 实例
+    """
+    name = name or DEFAULT_ANALYZER
+    if name not in ANALYZERS:
+        raise ValueError(f"Unknown analyzer: {name} (expected one of {tuple(ANALYZERS)})")
+    return ANALYZERS[name]
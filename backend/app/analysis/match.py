@@ -0,0 +1,46 @@
+"""
+match.py - 小规模文档集合的关键词匹配排序
+
+任务、技能这类只有几十到几百条的集合不需要倒排索引，直接对每条文档分词后打分：
+
+    score = Σ (1 + log tf)  /  查询词数      （只统计文档中出现的查询词）
+"""
+import math
+from typing import Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+from backend.app.analysis.analyzer import Analyzer, get_analyzer
+
+K = TypeVar("K", bound=Hashable)
+
+
+def rank_documents(query: str, documents: Iterable[Tuple[K, str]],
+                   analyzer: Optional[Analyzer] = None,
+                   top_k: Optional[int] = None) -> List[Tuple[K, float]]:
+    """
+    按查询词命中情况给文档排序
+
+    Args:
+        query: 查询文本
+        documents: (key, 文本) 迭代器
+        analyzer: 分析器（默认 cjk）
+        top_k: 最多返回的结果数（None 表示全部）
+
+    Returns:
+        [(key, score), ...]，按分数降序，分数相同时保持输入顺序；不返回零分文档
+    """
+    analyzer = analyzer or get_analyzer()
+    terms = set(analyzer(query))
+    if not terms:
+        return []
+
+    scored = []
+    for key, text in documents:
+        tf: dict = {}
+        for t in analyzer(text):
+            if t in terms:
+                tf[t] = tf.get(t, 0) + 1
+        if tf:
+            score = sum(1 + math.log(c) for c in tf.values()) / len(terms)
+            scored.append((key, score))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:top_k] if top_k is not None else scored
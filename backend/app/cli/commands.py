@@ -4,7 +4,8 @@ Command handlers for CLI
 import json
 from typing import Optional
 
-from backend.app.memory.compaction import auto_compact
+from backend.app.memory.compaction import auto_compact, estimate_tokens
+from backend.app.session import get_store
 from backend.app.task import get_task_service
 from backend.app.task.converter import TaskConverter
 from backend.app.team.state import get_bus, get_team
@@ -33,6 +34,8 @@ class CommandHandler:
             '/team': self._handle_team,
             '/inbox': self._handle_inbox,
             '/sessions': self._handle_sessions,
+            '/sessions gc': self._handle_sessions_gc,
+            '/memory consolidate': self._handle_memory_consolidate,
             '/insight': self._handle_insight,
             '/insight-llm': self._handle_insight_llm,
         }
@@ -62,9 +65,14 @@ class CommandHandler:
 
         if self.history:
             print("[manual compact]")
+            before = len(self.history)
             new_history = auto_compact(self.history, agent.llm)
             self.history.clear()
             self.history.extend(new_history)
+
+            store = get_store()
+            store.save_compaction("main", "manual", before, len(new_history))
+            store.save_snapshot("main", new_history, estimate_tokens(new_history, agent.llm))
         else:
             print("No history to compact.")
 
@@ -100,9 +108,32 @@ class CommandHandler:
             agent.switch_session(selected)
             print(f"Resumed session '{selected}' ({len(self.history)} messages)\n")
 
+    async def _handle_sessions_gc(self):
+        """Handle /sessions gc command"""
+        report = get_store().gc()
+        print(
+            f"🧹 Sessions GC: {report['sessions']} sessions, "
+            f"{report['rotated']} files rotated, {report['compressed']} segments compressed, "
+            f"{report['removed']} empty inbox files removed"
+        )
+        print(
+            f"   {report['bytes_before']:,} → {report['bytes_after']:,} bytes "
+            f"(reclaimed {report['reclaimed']:,} bytes)\n"
+        )
+
+    async def _handle_memory_consolidate(self):
+        """Handle /memory consolidate command"""
+        report = get_store().consolidate_memory()
+        print(
+            f"🗂️  Memory consolidate: {report['sessions']} sessions, "
+            f"{report['daily_files']} daily logs folded into {report['segments_written']} segments, "
+            f"{report['entries']} entries kept, {report['dropped']} deprecated entries dropped"
+        )
+        print(f"   {report['bytes_before']:,} → {report['bytes_after']:,} bytes\n")
+
     async def _handle_insight(self):
         """Handle /insight command"""
-        from backend.app.insight import analyze_trace
+        from backend.app.reasoning.insight import analyze_trace
 
         selected = SessionSelector.select_session(
             title="选择 Session 进行性能分析",
@@ -126,7 +157,7 @@ class CommandHandler:
 
     async def _handle_insight_llm(self):
         """Handle /insight-llm command"""
-        from backend.app.llm_insight import analyze_llm_quality
+        from backend.app.reasoning.llm_insight import analyze_llm_quality
 
         agent = self.agent_holder["agent"]
         if not agent:
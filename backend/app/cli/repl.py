@@ -10,7 +10,7 @@ from prompt_toolkit.completion import WordCompleter
 from backend.app.cli.commands import CommandHandler
 from backend.app.cli.task_queue import TaskQueue
 
-COMMANDS = ["/compact", "/tasks", "/team", "/inbox", "/sessions", "/insight", "/insight-llm"]
+COMMANDS = ["/compact", "/tasks", "/team", "/inbox", "/sessions", "/sessions gc", "/memory consolidate", "/insight", "/insight-llm"]
 STYLE = Style.from_dict({"prompt": "ansicyan bold"})
 PROMPT = [("class:prompt", "agent >> ")]
 
@@ -48,6 +48,7 @@ async def run_repl(agent, history: list):
 
         if not query or query in ("q", "exit", "quit"):
             if await _confirm_exit(session, task_queue):
+                _close_session_store()
                 break
             continue
 
@@ -63,9 +64,16 @@ async def _handle_exit(task_queue: TaskQueue):
     """Handle exit with cleanup"""
     if task_queue.is_running():
         await task_queue.cancel_current()
+    _close_session_store()
     print("\nBye.")
 
 
+def _close_session_store():
+    """关闭 SessionStore，写入缓冲中的 transcript 条目"""
+    from backend.app.session import get_store
+    get_store().close()
+
+
 async def _confirm_exit(session: PromptSession, task_queue: TaskQueue) -> bool:
     """
     Confirm exit if tasks are running
@@ -4,7 +4,9 @@ Session management for CLI
 from typing import Optional
 from prompt_toolkit.shortcuts import radiolist_dialog
 
-from backend.app.session import list_sessions, load_session, SESSIONS_DIR
+from backend.app.session import list_sessions, resume_session, SESSIONS_DIR
+from backend.app.core.guards.tracer import flush_traces
+from backend.app.session.segments import stream_exists
 
 
 class SessionSelector:
@@ -38,7 +40,7 @@ class SessionSelector:
     @staticmethod
     def load_session_history(session_key: str, role: str = "main") -> list:
         """
-        Load session history
+        Load session history (latest compaction snapshot + newer transcript entries)
 
         Args:
             session_key: Session identifier
@@ -47,7 +49,7 @@ class SessionSelector:
         Returns:
             List of history messages
         """
-        return load_session(role, session_key)
+        return resume_session(role, session_key)
 
     @staticmethod
     def get_trace_file(session_key: str):
@@ -58,7 +60,8 @@ class SessionSelector:
             session_key: Session identifier
 
         Returns:
-            Path object or None if not exists
+            Path object or None if not exists (live file or rotated segments)
         """
+        flush_traces()  # 写入后台队列中尚未落盘的事件
         trace_file = SESSIONS_DIR / session_key / "trace.jsonl"
-        return trace_file if trace_file.exists() else None
+        return trace_file if stream_exists(trace_file) else None
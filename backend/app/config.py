@@ -11,3 +11,7 @@ DEEPSEEK_MODEL = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
 # Fallback threshold when LLM max_tokens is unavailable
 # Actual threshold = min(COMPACTION_THRESHOLD, llm.max_tokens * 0.9)
 COMPACTION_THRESHOLD = int(os.getenv("COMPACTION_THRESHOLD", "25000"))
+
+# Tracing
+# 1 = trace.jsonl is written by a background thread (never blocks the event loop), 0 = synchronous writes
+TRACE_WRITE_BEHIND = os.getenv("TRACE_WRITE_BEHIND", "1") != "0"
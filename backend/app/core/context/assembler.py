@@ -0,0 +1,170 @@
+"""
+ContextAssembler - 面向前缀缓存的上下文组装
+
+DeepSeek / OpenAI 兼容接口会缓存请求的公共前缀，命中部分按折扣计费且首 token 更快。
+组装时按稳定性从高到低排列，让相邻两次请求共享尽可能长的前缀：
+
+    ┌ tools schema          按名称排序，会话内不变
+    │ static system prompt  身份 / 灵魂 / 工具指南 / 技能（不含当前时间）
+    │ frozen bootstrap      会话首次组装时冻结的全局记忆快照
+    │ compacted summary     压缩摘要（只在压缩时变化）
+    │ history               追加式对话历史
+    └ volatile tail         运行时上下文 + 召回记忆 → 用户输入 → 守卫通知
+
+全局记忆在会话中途被改写时不会立即改变前缀；下一次压缩（前缀本来就会失效）时重新冻结。
+渲染好的静态前缀按内容哈希缓存，内容不变时不再重新拼接。
+"""
+import hashlib
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+
+def _digest(*parts: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ContextAssembler:
+    """
+    上下文组装器（进程内共享，见 get_assembler）
+
+    Usage:
+        assembler = get_assembler()
+        system_prompt = assembler.system_prompt(session_key)
+        messages = assembler.assemble(history, prompt, recalled=recalled, runtime=runtime)
+    """
+
+    def __init__(self, max_prompts: int = 64):
+        """
+        Args:
+            max_prompts: 缓存的静态前缀数量
+        """
+        self.max_prompts = max_prompts
+        self._snapshots: Dict[Tuple[str, str], Tuple[str, Dict[str, str]]] = {}
+        self._prompts: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.hits = 0
+
+    def snapshot(self, session_key: str, mode: str = "full") -> Tuple[str, Dict[str, str]]:
+        """
+        会话的 Bootstrap 快照（首次调用时冻结）
+
+        Returns:
+            (内容哈希, 文件名 -> 内容)
+        """
+        from backend.app.session import get_store
+
+        key = (session_key, mode)
+        with self._lock:
+            frozen = self._snapshots.get(key)
+        if frozen is not None:
+            return frozen
+
+        store = get_store()
+        if session_key and mode != "none":
+            store.set_current_key(session_key)
+            frozen = (store.bootstrap_hash(mode), store.load_bootstrap(mode))
+        else:
+            frozen = ("", {})
+        with self._lock:
+            return self._snapshots.setdefault(key, frozen)
+
+    def refreeze(self, session_key: str) -> None:
+        """丢弃会话的 Bootstrap 快照，下次组装时读取最新的全局记忆（压缩后调用）"""
+        with self._lock:
+            for key in [k for k in self._snapshots if k[0] == session_key]:
+                del self._snapshots[key]
+
+    def system_prompt(self, session_key: str, mode: str = "full") -> str:
+        """
+        静态系统提示词（不含运行时上下文和召回记忆），按内容哈希缓存
+
+        Args:
+            session_key: 会话 key
+            mode: 加载模式（full/minimal/none）
+
+        Returns:
+            系统提示词
+        """
+        from backend.app.prompts import build_system_prompt
+        from backend.app.skills import SKILL_LOADER
+
+        bootstrap_hash, bootstrap = self.snapshot(session_key, mode)
+        skills = SKILL_LOADER.get_descriptions() if mode == "full" else ""
+        key = _digest(session_key, mode, bootstrap_hash, skills)
+        with self._lock:
+            cached = self._prompts.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+        rendered = build_system_prompt(session_key, mode, runtime=False, bootstrap_data=bootstrap)
+        with self._lock:
+            self.renders += 1
+            self._prompts[key] = rendered
+            while len(self._prompts) > self.max_prompts:
+                del self._prompts[next(iter(self._prompts))]
+        return rendered
+
+    @staticmethod
+    def stable_tools(tools: Sequence) -> list:
+        """按名称排序的工具列表（工具 schema 位于请求最前面，顺序必须稳定）"""
+        return sorted(tools, key=lambda t: getattr(t, "name", ""))
+
+    @staticmethod
+    def assemble(
+        history: List[BaseMessage],
+        prompt: str = "",
+        recalled: str = "",
+        runtime: str = "",
+    ) -> List[BaseMessage]:
+        """
+        组装消息列表：历史在前，易变内容放在末尾
+
+        Args:
+            history: （压缩后的）历史消息，压缩摘要位于开头
+            prompt: 用户输入（为空时不追加，由调用方追加）
+            recalled: 召回的记忆
+            runtime: 运行时上下文
+
+        Returns:
+            新的消息列表（不修改 history）
+        """
+        messages = list(history)
+        tail = []
+        if runtime:
+            tail.append(runtime)
+        if recalled:
+            tail.append(f"<recalled-memory>\n{recalled}\n</recalled-memory>")
+        if tail:
+            messages.append(HumanMessage(content="\n\n".join(tail)))
+        if prompt:
+            messages.append(HumanMessage(content=prompt))
+        return messages
+
+    def stats(self) -> Dict[str, int]:
+        """静态前缀缓存统计"""
+        with self._lock:
+            return {
+                "snapshots": len(self._snapshots),
+                "prompts": len(self._prompts),
+                "renders": self.renders,
+                "hits": self.hits,
+            }
+
+
+_assembler: ContextAssembler | None = None
+
+
+def get_assembler() -> ContextAssembler:
+    """获取进程内共享的上下文组装器"""
+    global _assembler
+    if _assembler is None:
+        _assembler = ContextAssembler()
+    return _assembler
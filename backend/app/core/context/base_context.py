@@ -57,6 +57,10 @@ class BaseContext(ABC):
         """获取系统提示词（子类实现）"""
         pass
 
+    def get_runtime_context(self) -> str:
+        """获取运行时上下文（当前时间等易变信息，放在消息末尾；默认已包含在系统提示词中）"""
+        return ""
+
     def get_system_prompt_with_print(self) -> str:
         """获取系统提示词并在第一次调用时打印"""
         prompt = self.get_system_prompt()
@@ -26,6 +26,11 @@ class MainContext(BaseContext):
         return registry.get("main")
 
     def get_system_prompt(self) -> str:
-        """获取系统提示词"""
-        from backend.app.prompts import get_system_prompt
-        return get_system_prompt(self.session_key)
+        """获取系统提示词（静态部分，按内容哈希缓存，见 ContextAssembler）"""
+        from backend.app.core.context.assembler import get_assembler
+        return get_assembler().system_prompt(self.session_key)
+
+    def get_runtime_context(self) -> str:
+        """获取运行时上下文（追加在消息末尾）"""
+        from backend.app.prompts import build_runtime_context
+        return build_runtime_context(self.session_key)
@@ -41,6 +41,11 @@ class TeamContext(BaseContext):
         return tools
 
     def get_system_prompt(self) -> str:
-        """获取系统提示词"""
+        """获取系统提示词（静态部分，不含当前时间）"""
         from backend.app.prompts import get_teammate_system_prompt
         return get_teammate_system_prompt(self.name, self.role, self.session_key)
+
+    def get_runtime_context(self) -> str:
+        """获取运行时上下文（追加在消息末尾）"""
+        from backend.app.prompts import build_runtime_context
+        return build_runtime_context(self.session_key, mode="minimal")
@@ -15,6 +15,7 @@ AgentRunner - 核心执行器
 from typing import List
 from langchain_core.messages import HumanMessage, AIMessage
 
+from backend.app.core.context.assembler import ContextAssembler
 from backend.app.core.context.base_context import BaseContext
 from backend.app.core.tools.history_manager import HistoryManager
 from backend.app.core.guards import GuardManager
@@ -67,8 +68,8 @@ class AgentRunner:
         run_id = self.observer.start(prompt, len(history))
 
         try:
-            # 1. 准备历史（压缩 + 召回）
-            prepared_history = self.history_manager.prepare(context, prompt, history)
+            # 1. 准备历史（压缩 + 召回，召回在 I/O 执行器中进行）
+            prepared_history = await self.history_manager.aprepare(context, prompt, history)
 
             # 2. 构建消息（添加用户输入 + 守卫消息）
             messages = prepared_history + [HumanMessage(content=prompt)]
@@ -87,8 +88,8 @@ class AgentRunner:
                 context, messages, langchain_callback
             )
 
-            # 6. 保存历史
-            self.history_manager.save(context, prompt, output, tool_calls)
+            # 6. 保存历史（不阻塞事件循环）
+            await self.history_manager.asave(context, prompt, output, tool_calls)
 
             # 7. 更新原始 history
             history.append(HumanMessage(content=prompt))
@@ -100,6 +101,7 @@ class AgentRunner:
             self.observer.metrics.subagent_calls = langchain_callback.subagent_calls
             self.observer.metrics.total_input_tokens = langchain_callback.total_input_tokens
             self.observer.metrics.total_output_tokens = langchain_callback.total_output_tokens
+            self.observer.metrics.cache_hit_tokens = langchain_callback.total_cache_hit_tokens
             self.observer.metrics.total_cost = langchain_callback.total_cost
             self.observer.metrics.total_steps = langchain_callback.llm_calls + langchain_callback.tool_calls
 
@@ -135,7 +137,7 @@ class AgentRunner:
 
         # 获取资源（只获取一次）
         system_prompt = context.get_system_prompt()
-        tools = context.get_tools()
+        tools = ContextAssembler.stable_tools(context.get_tools())
         print(f"\n🔍 工具数={len(tools)}, 工具名={[t.name for t in tools]}")
 
         output = ""
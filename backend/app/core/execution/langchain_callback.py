@@ -2,7 +2,7 @@
 LangChain Callback Handler - 集成现有的 Tracer 和 Console
 
 使用 LangChain 的 Callbacks 系统自动追踪：
-1. LLM 调用（输入、输出、token 使用）
+1. LLM 调用（输入、输出、token 使用、前缀缓存命中）
 2. 工具调用（工具名、参数、结果、耗时）
 3. Agent 行为（决策、动作）
 4. Chain 执行流程
@@ -54,6 +54,7 @@ class ObservabilityCallback(BaseCallbackHandler):
         self.subagent_calls = 0  # 添加 subagent 调用统计
         self.total_input_tokens = 0
         self.total_output_tokens = 0
+        self.total_cache_hit_tokens = 0  # 命中前缀缓存的输入 token
         self.total_cost = 0.0
 
         # 用于计算耗时
@@ -112,18 +113,17 @@ class ObservabilityCallback(BaseCallbackHandler):
             del self._start_times[run_id]
 
         # 提取 token 使用信息
-        llm_output = response.llm_output or {}
-        token_usage = llm_output.get("token_usage", {})
-
-        input_tokens = token_usage.get("prompt_tokens", 0)
-        output_tokens = token_usage.get("completion_tokens", 0)
+        input_tokens, output_tokens, cache_hit_tokens = self._token_usage(response)
 
         self.total_input_tokens += input_tokens
         self.total_output_tokens += output_tokens
+        self.total_cache_hit_tokens += cache_hit_tokens
 
         # 计算成本（假设使用 DeepSeek 价格）
-        # Input: $0.27/M tokens, Output: $1.10/M tokens
-        cost = (input_tokens * 0.27 / 1_000_000) + (output_tokens * 1.10 / 1_000_000)
+        # Input: $0.27/M tokens（缓存命中 $0.07/M）, Output: $1.10/M tokens
+        cost = ((input_tokens - cache_hit_tokens) * 0.27 / 1_000_000
+                + cache_hit_tokens * 0.07 / 1_000_000
+                + output_tokens * 1.10 / 1_000_000)
         self.total_cost += cost
 
         # 提取输出内容
@@ -135,7 +135,7 @@ class ObservabilityCallback(BaseCallbackHandler):
         if self.enable_console:
             console.gray(
                 f"[{self.agent_type}] LLM end | "
-                f"tokens={input_tokens}+{output_tokens} | "
+                f"tokens={input_tokens}+{output_tokens} (cached={cache_hit_tokens}) | "
                 f"cost=${cost:.6f} | "
                 f"duration={duration_ms}ms"
             )
@@ -149,6 +149,7 @@ class ObservabilityCallback(BaseCallbackHandler):
                 parent_run_id=str(parent_run_id) if parent_run_id else None,
                 input_tokens=input_tokens,
                 output_tokens=output_tokens,
+                cache_hit_tokens=cache_hit_tokens,
                 total_tokens=input_tokens + output_tokens,
                 cost=cost,
                 duration_ms=duration_ms,
@@ -156,6 +157,31 @@ class ObservabilityCallback(BaseCallbackHandler):
                 span_id=self.span_id
             )
 
+    @staticmethod
+    def _token_usage(response: LLMResult) -> tuple[int, int, int]:
+        """
+        提取 (输入, 输出, 前缀缓存命中) token 数
+
+        缓存命中的字段因服务而异：DeepSeek 为 prompt_cache_hit_tokens，
+        OpenAI 为 prompt_tokens_details.cached_tokens；流式调用没有 llm_output 时
+        从消息的 usage_metadata 读取。
+        """
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        if token_usage:
+            details = token_usage.get("prompt_tokens_details") or {}
+            cached = token_usage.get("prompt_cache_hit_tokens", details.get("cached_tokens", 0))
+            input_tokens = token_usage.get("prompt_tokens", 0)
+            return input_tokens, token_usage.get("completion_tokens", 0), min(cached or 0, input_tokens)
+
+        for generations in response.generations or []:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+                    input_tokens = usage.get("input_tokens", 0)
+                    return input_tokens, usage.get("output_tokens", 0), min(cached or 0, input_tokens)
+        return 0, 0, 0
+
     def on_llm_error(
         self,
         error: Exception,
@@ -407,6 +433,9 @@ class ObservabilityCallback(BaseCallbackHandler):
             "tool_calls": self.tool_calls,
             "total_input_tokens": self.total_input_tokens,
             "total_output_tokens": self.total_output_tokens,
+            "total_cache_hit_tokens": self.total_cache_hit_tokens,
+            "cache_hit_rate": (self.total_cache_hit_tokens / self.total_input_tokens
+                               if self.total_input_tokens else 0.0),
             "total_tokens": self.total_input_tokens + self.total_output_tokens,
             "total_cost": self.total_cost
         }
@@ -27,6 +27,7 @@ class ExecutionMetrics:
     # Token 统计
     total_input_tokens: int = 0
     total_output_tokens: int = 0
+    cache_hit_tokens: int = 0  # 命中前缀缓存的输入 token
 
     # 成本统计（美元）
     total_cost: float = 0.0
@@ -316,6 +317,7 @@ class ObservabilityCollector:
             "total_tokens": self.metrics.total_tokens,
             "input_tokens": self.metrics.total_input_tokens,
             "output_tokens": self.metrics.total_output_tokens,
+            "cache_hit_tokens": self.metrics.cache_hit_tokens,
             "total_cost": round(self.metrics.total_cost, 6)
         }
 
@@ -170,6 +170,8 @@ class ConsoleLogger:
                 print(f"💰 Token & 成本:")
                 print(f"   - 输入 tokens: {metrics.get('input_tokens', 0):,}")
                 print(f"   - 输出 tokens: {metrics.get('output_tokens', 0):,}")
+                if metrics.get('cache_hit_tokens', 0):
+                    print(f"   - 缓存命中 tokens: {metrics.get('cache_hit_tokens', 0):,}")
                 print(f"   - 总 tokens: {metrics.get('total_tokens', 0):,}")
                 print(f"   - 总成本: ${metrics.get('total_cost', 0):.6f}")
 
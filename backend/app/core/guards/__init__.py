@@ -13,7 +13,7 @@ from backend.app.core.guards.execution_guards import (
     GuardManager
 )
 from backend.app.core.guards.overflow_guard import OverflowGuard
-from backend.app.core.guards.tracer import Tracer, get_global_tracer
+from backend.app.core.guards.tracer import Tracer, flush_traces, get_global_tracer
 
 __all__ = [
     "BaseGuard",
@@ -22,5 +22,6 @@ __all__ = [
     "GuardManager",
     "OverflowGuard",
     "Tracer",
+    "flush_traces",
     "get_global_tracer"
 ]
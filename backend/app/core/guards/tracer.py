@@ -1,9 +1,81 @@
 """Tracer component for context management"""
+import atexit
 import json
+import queue
 import threading
 import time
 import uuid
+from collections import defaultdict
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from backend.app.config import TRACE_WRITE_BEHIND
+from backend.app.session.constants import SEGMENT_MAX_BYTES
+from backend.app.session.segments import rotate
+
+_file_lock = threading.Lock()
+
+
+def _append_lines(path: Path, lines: List[str]) -> None:
+    """Append lines to a trace file, rolling it into a segment once it is too large."""
+    with _file_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+            size = f.tell()
+        if size >= SEGMENT_MAX_BYTES:
+            rotate(path)
+
+
+class _TraceWriteBehind:
+    """
+    Background writer shared by all Tracer instances.
+
+    emit() only serializes the event and enqueues it; a daemon thread drains the
+    queue and appends each batch with a single open/write per trace file, so
+    callbacks running on the event loop never block on disk I/O.
+    """
+
+    def __init__(self, max_batch: int = 256):
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Tuple[Path, str]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, path: Path, line: str) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+        self._queue.put((path, line))
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            by_path: Dict[Path, List[str]] = defaultdict(list)
+            for path, line in batch:
+                by_path[path].append(line)
+            for path, lines in by_path.items():
+                try:
+                    _append_lines(path, lines)
+                except OSError:
+                    pass  # tracing must never break the agent
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Block until every queued event has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+
+_write_behind = _TraceWriteBehind()
 
 
 class Tracer:
@@ -11,11 +83,14 @@ class Tracer:
     Structured trace logger component.
 
     Writes one JSON event per line to {session_dir}/trace.jsonl.
+    The file is rolled into compressed segments once it exceeds SEGMENT_MAX_BYTES.
+    With write_behind (TRACE_WRITE_BEHIND, default on) events are written by a
+    background thread; call flush() before reading the file back.
     Managed by AgentContext for proper lifecycle and session isolation.
     """
 
-    def __init__(self):
-        self._lock = threading.Lock()
+    def __init__(self, write_behind: bool = TRACE_WRITE_BEHIND):
+        self.write_behind = write_behind
         self._run_id: str | None = None
         self._session_dir_fn = None
 
@@ -31,10 +106,16 @@ class Tracer:
 
     def _write(self, event: dict) -> None:
         line = json.dumps(event, ensure_ascii=False, default=str)
+        # Resolve the path now: the session may switch before the event is written
         path = self._session_dir() / "trace.jsonl"
-        with self._lock:
-            with open(path, "a", encoding="utf-8") as f:
-                f.write(line + "\n")
+        if self.write_behind:
+            _write_behind.submit(path, line)
+        else:
+            _append_lines(path, [line])
+
+    def flush(self) -> None:
+        """Wait for queued trace events to reach the file (call before reading trace.jsonl)."""
+        _write_behind.flush()
 
     def new_run_id(self) -> str:
         return uuid.uuid4().hex[:8]
@@ -73,3 +154,8 @@ def get_run_id() -> str | None:
 
 def emit(event_type: str, **payload) -> None:
     _global_tracer.emit(event_type, **payload)
+
+
+def flush_traces() -> None:
+    """Wait for all write-behind trace events to be written."""
+    _write_behind.flush()
@@ -5,9 +5,23 @@ HistoryManager - 历史管理器
 1. 对话历史压缩
 2. 记忆召回
 3. 历史保存
+
+aprepare / asave 是异步版本：记忆召回和历史保存在会话 I/O 执行器中进行，
+不阻塞事件循环（见 backend/app/session/io_executor.py）。
+
+记忆召回只依赖用户输入，与历史压缩（可能调用 LLM 生成摘要）互不依赖，两者并发执行：
+召回在 I/O 执行器中进行，压缩在当前线程（prepare）或工作线程（aprepare）中进行。
+压缩产生的存储写入（save_compaction / save_snapshot）也交给 I/O 执行器，不会与其他会话读写并发
+（见 ConversationHistory.apply_strategies）。
+
+召回的记忆和运行时上下文追加在历史末尾而不是插到开头，保持请求前缀稳定
+（见 backend/app/core/context/assembler.py）。
 """
+import asyncio
 from typing import List
-from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.messages import BaseMessage
+
+from backend.app.core.context.assembler import ContextAssembler, get_assembler
 
 
 class HistoryManager:
@@ -33,7 +47,41 @@ class HistoryManager:
         Returns:
             准备好的消息列表
         """
-        # 1. 压缩历史（启用三层压缩机制）
+        from backend.app.prompts import auto_recall_memory
+        from backend.app.session.io_executor import get_io_executor
+
+        # 召回记忆（I/O 执行器）与压缩历史（当前线程）并发
+        recall = get_io_executor().submit(auto_recall_memory, context.session_key, prompt)
+        compressed = self._compress(context, history)
+        return self._with_recalled(context, compressed, recall.result())
+
+    async def aprepare(
+        self,
+        context,
+        prompt: str,
+        history: List[BaseMessage]
+    ) -> List[BaseMessage]:
+        """
+        prepare 的异步版本：记忆召回在 I/O 执行器中、历史压缩在工作线程中并发进行
+
+        Args:
+            context: Agent 上下文
+            prompt: 用户输入
+            history: 历史消息
+
+        Returns:
+            准备好的消息列表
+        """
+        from backend.app.prompts import aauto_recall_memory
+
+        compressed, recalled = await asyncio.gather(
+            asyncio.to_thread(self._compress, context, history),
+            aauto_recall_memory(context.session_key, prompt),
+        )
+        return self._with_recalled(context, compressed, recalled)
+
+    def _compress(self, context, history: List[BaseMessage]) -> List[BaseMessage]:
+        """压缩历史（启用三层压缩机制）"""
         if self.conversation_history is None:
             from backend.app.memory import ConversationHistory
             self.conversation_history = ConversationHistory.create_default(
@@ -44,19 +92,15 @@ class HistoryManager:
             )
 
         self.conversation_history.set_messages(history)
-        self.conversation_history.apply_strategies()  # 应用三层策略
-        compressed = self.conversation_history.get_messages()
-
-        # 2. 召回记忆
-        from backend.app.prompts import auto_recall_memory
-        recalled = auto_recall_memory(context.session_key, prompt)
-        if recalled:
-            memory_msg = HumanMessage(
-                content=f"<recalled-memory>\n{recalled}\n</recalled-memory>"
-            )
-            compressed.insert(0, memory_msg)
+        if self.conversation_history.apply_strategies():  # 应用三层策略
+            # 压缩改写了历史开头，前缀缓存本来就会失效，顺便刷新冻结的全局记忆快照
+            get_assembler().refreeze(context.session_key)
+        return self.conversation_history.get_messages()
 
-        return compressed
+    @staticmethod
+    def _with_recalled(context, compressed: List[BaseMessage], recalled: str) -> List[BaseMessage]:
+        """把运行时上下文和召回的记忆追加到消息列表末尾（易变内容不破坏前缀）"""
+        return ContextAssembler.assemble(compressed, recalled=recalled, runtime=context.get_runtime_context())
 
     def save(
         self,
@@ -76,3 +120,22 @@ class HistoryManager:
         """
         agent_name = getattr(context, "agent_name", "main")
         context.session_store.save_turn(agent_name, prompt, output, tool_calls)
+
+    async def asave(
+        self,
+        context,
+        prompt: str,
+        output: str,
+        tool_calls: List[dict]
+    ):
+        """
+        save 的异步版本：在 I/O 执行器中写入 transcript
+
+        Args:
+            context: Agent 上下文
+            prompt: 用户输入
+            output: AI 输出
+            tool_calls: 工具调用列表
+        """
+        agent_name = getattr(context, "agent_name", "main")
+        await context.session_store.asave_turn(agent_name, prompt, output, tool_calls)
@@ -112,10 +112,15 @@ class ConversationHistory:
             bool: 是否执行了压缩
         """
         from backend.app.session import get_store
+        from backend.app.session.io_executor import get_io_executor
 
         if not self.llm:
             return False
 
+        def store_write(fn, *args):
+            # aprepare 在工作线程中调用本方法：存储写入仍交给单线程 I/O 执行器，与 run_io 提交的读写按顺序执行
+            get_io_executor().submit(fn, *args).result()
+
         context = {"history": self, "llm": self.llm}
         compressed = False
 
@@ -125,13 +130,16 @@ class ConversationHistory:
                 new_messages = strategy.compact(self._messages, self.llm)
 
                 if len(new_messages) < before:
-                    store = get_store()
-                    store.save_compaction("main", strategy.get_kind(), before, len(new_messages))
+                    store_write(get_store().save_compaction, "main", strategy.get_kind(), before, len(new_messages))
                     print(f"  [compact] [{strategy.get_kind()}] {before} → {len(new_messages)} messages")
                     compressed = True
 
                 self._messages = new_messages
 
+        if compressed:
+            # 保存压缩后的快照，恢复会话时直接加载，无需重新压缩
+            store_write(get_store().save_snapshot, "main", list(self._messages), self.estimate_tokens())
+
         return compressed
 
     def to_dict(self) -> dict:
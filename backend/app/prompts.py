@@ -2,12 +2,15 @@ import os
 from datetime import datetime
 from backend.app.skills import SKILL_LOADER
 from backend.app.session import get_store
+from backend.app.session.io_executor import run_io
 
 
 def build_system_prompt(
     session_key: str = "",
     mode: str = "full",
     memory_context: str = "",
+    runtime: bool = True,
+    bootstrap_data: dict | None = None,
 ) -> str:
     """
     构建系统提示词（参考 s06_intelligence.py 的 8 层组装）
@@ -16,6 +19,8 @@ def build_system_prompt(
         session_key: 会话 key
         mode: 加载模式（full/minimal/none）
         memory_context: 自动召回的记忆上下文
+        runtime: 是否包含第 7 层运行时上下文（含当前时间，每次调用都不同）
+        bootstrap_data: 预先加载的 Bootstrap 文件（例如冻结的快照），为 None 时从会话加载
 
     Returns:
         完整的系统提示词
@@ -24,10 +29,11 @@ def build_system_prompt(
     sections = []
 
     # 第 1 层: 身份 - 来自 IDENTITY.md 或默认值
-    bootstrap_data = {}
-    if session_key and mode != "none":
-        store.set_current_key(session_key)
-        bootstrap_data = store.load_bootstrap(mode)
+    if bootstrap_data is None:
+        bootstrap_data = {}
+        if session_key and mode != "none":
+            store.set_current_key(session_key)
+            bootstrap_data = store.load_bootstrap(mode)
 
     identity = bootstrap_data.get("IDENTITY.md", "").strip()
     if identity:
@@ -77,9 +83,28 @@ def build_system_prompt(
                 sections.append(f"## {name.replace('.md', '')}\n\n{content}")
 
     # 第 7 层: 运行时上下文
+    if runtime:
+        sections.append(build_runtime_context(session_key, mode))
+
+    system_prompt = "\n\n".join(sections)
+
+    return system_prompt
+
+
+def build_runtime_context(session_key: str = "", mode: str = "full") -> str:
+    """
+    构建运行时上下文（第 7 层：会话、当前时间、工作目录）
+
+    Args:
+        session_key: 会话 key
+        mode: 加载模式（full/minimal/none）
+
+    Returns:
+        运行时上下文段落
+    """
     workspace_path = f".sessions/{session_key}/workspace/" if session_key else ".sessions/<key>/workspace/"
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    sections.append(
+    return (
         f"## Runtime Context\n\n"
         f"- Session key: {session_key or '(未设置)'}\n"
         f"- Current time: {current_time}\n"
@@ -87,10 +112,6 @@ def build_system_prompt(
         f"- Workspace: {workspace_path}"
     )
 
-    system_prompt = "\n\n".join(sections)
-
-    return system_prompt
-
 
 def get_system_prompt(session_key: str = "") -> str:
     """
@@ -107,7 +128,8 @@ def get_system_prompt(session_key: str = "") -> str:
 
 def get_teammate_system_prompt(name: str, role: str, session_key: str = "") -> str:
     """
-    获取 Teammate 的系统提示词
+    获取 Teammate 的系统提示词（静态部分：不含当前时间，Bootstrap 使用冻结的快照，
+    运行时上下文由 TeamContext.get_runtime_context 追加在消息末尾）
 
     Args:
         name: Teammate 名称
@@ -119,6 +141,7 @@ def get_teammate_system_prompt(name: str, role: str, session_key: str = "") -> s
     """
     from backend.app.tools.base import WORKDIR
     from backend.app.session import get_team_config_path
+    from backend.app.core.context.assembler import get_assembler
     import json
 
     # 获取团队名称
@@ -128,8 +151,8 @@ def get_teammate_system_prompt(name: str, role: str, session_key: str = "") -> s
         config = json.loads(config_path.read_text())
         team_name = config.get("team_name", "default")
 
-    # 构建基础 prompt
-    base_prompt = build_system_prompt(session_key, mode="minimal")
+    # 构建基础 prompt（按内容哈希缓存，见 ContextAssembler）
+    base_prompt = get_assembler().system_prompt(session_key, mode="minimal")
 
     # 添加 Teammate 特定信息
     teammate_prompt = (
@@ -166,9 +189,8 @@ def auto_recall_memory(session_key: str, user_message: str) -> str:
     if not session_key:
         return ""
 
-    store = get_store()
-    store.set_current_key(session_key)
-    results = store.hybrid_search_memory(user_message, top_k=3)
+    # 不切换当前会话：召回服务为每个会话保留常驻的记忆索引，并缓存相同查询的结果
+    results = get_store().recall_memory(session_key, user_message, top_k=3)
 
     if not results:
         return ""
@@ -176,6 +198,20 @@ def auto_recall_memory(session_key: str, user_message: str) -> str:
     return "\n".join(f"- [{r['path']}] {r['snippet']}" for r in results)
 
 
+async def aauto_recall_memory(session_key: str, user_message: str) -> str:
+    """
+    auto_recall_memory 的异步版本（在会话 I/O 执行器中读取记忆文件）
+
+    Args:
+        session_key: 会话 key
+        user_message: 用户消息
+
+    Returns:
+        记忆上下文字符串
+    """
+    return await run_io(auto_recall_memory, session_key, user_message)
+
+
 def print_system_prompt(session_key: str = "", mode: str = "full", output_file: str = None):
     """
     打印或保存系统提示词到文件
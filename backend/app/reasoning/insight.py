@@ -8,6 +8,8 @@ import json
 from pathlib import Path
 from collections import defaultdict
 
+from backend.app.session.segments import iter_lines
+
 
 def analyze_trace(trace_file: Path):
     """分析 trace 文件并打印报告"""
@@ -15,10 +17,8 @@ def analyze_trace(trace_file: Path):
     # 加载事件
     events = []
     try:
-        with open(trace_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip():
-                    events.append(json.loads(line))
+        for line in iter_lines(trace_file):
+            events.append(json.loads(line))
     except Exception as e:
         print(f"❌ 加载 trace 文件失败: {e}")
         return
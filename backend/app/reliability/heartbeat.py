@@ -6,6 +6,7 @@
 2. 自动保存会话状态，防止数据丢失
 3. 监控系统资源，防止内存泄漏
 4. 优雅的错误处理，心跳失败不影响主功能
+5. 按各自间隔执行注册的维护任务（例如记忆日志合并）
 """
 
 import threading
@@ -122,6 +123,9 @@ class HeartbeatSystem:
         self._sessions: Dict[str, datetime] = {}  # session_key -> last_activity
         self._session_lock = threading.RLock()
         
+        # 维护任务：name -> [fn, interval_seconds, last_run]
+        self._tasks: Dict[str, list] = {}
+        
         logger.info(f"心跳系统初始化完成，间隔: {interval_seconds}秒，会话超时: {session_timeout_minutes}分钟")
     
     def start(self) -> bool:
@@ -207,6 +211,39 @@ class HeartbeatSystem:
                 return True
             return False
     
+    def register_task(self, name: str, fn: Callable[[], Any], interval_seconds: float) -> bool:
+        """
+        注册维护任务（在心跳线程中执行，距上次执行超过 interval_seconds 后的第一次心跳运行）
+        
+        Args:
+            name: 任务名称（重复注册时替换）
+            fn: 无参数的任务函数
+            interval_seconds: 执行间隔（秒）
+        """
+        with self._lock:
+            self._tasks[name] = [fn, interval_seconds, 0.0]
+            logger.debug(f"维护任务注册: {name}，间隔: {interval_seconds}秒")
+            return True
+    
+    def unregister_task(self, name: str) -> bool:
+        """注销维护任务"""
+        with self._lock:
+            return self._tasks.pop(name, None) is not None
+    
+    def _run_due_tasks(self) -> None:
+        """执行到期的维护任务（单个任务失败只记录日志）"""
+        now = time.monotonic()
+        with self._lock:
+            due = [(name, task) for name, task in self._tasks.items()
+                   if not task[2] or now - task[2] >= task[1]]
+        for name, task in due:
+            task[2] = now
+            try:
+                result = task[0]()
+                logger.info(f"维护任务完成: {name} {result if result is not None else ''}")
+            except Exception as e:
+                logger.warning(f"维护任务执行失败: {name}: {e}")
+    
     def _heartbeat_loop(self):
         """心跳循环"""
         logger.info("心跳循环开始")
@@ -258,7 +295,10 @@ class HeartbeatSystem:
                 except Exception as e:
                     logger.warning(f"心跳回调执行失败: {e}")
             
-            # 4. 清理过期会话
+            # 4. 执行到期的维护任务
+            self._run_due_tasks()
+            
+            # 5. 清理过期会话
             for session_key in expired_sessions:
                 logger.info(f"会话超时，自动清理: {session_key}")
                 self.unregister_session(session_key)
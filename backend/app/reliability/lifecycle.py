@@ -65,6 +65,8 @@ class LifecycleManager:
                     else:
                         raise LifecycleError("心跳系统启动失败")
                 
+                self._register_maintenance_tasks()
+                
                 # 2. 启动守护系统
                 logger.info("启动守护系统...")
                 guard_started = start_global_guard()
@@ -215,6 +217,17 @@ class LifecycleManager:
         except Exception as e:
             logger.error(f"注册核心服务失败: {e}")
     
+    def _register_maintenance_tasks(self):
+        """注册心跳维护任务（心跳系统重建后需要重新注册）"""
+        from backend.app.session import get_store
+        from backend.app.session.constants import MEMORY_CONSOLIDATE_INTERVAL
+        
+        get_global_heartbeat().register_task(
+            "memory_consolidate",
+            lambda: get_store().consolidate_memory(),
+            MEMORY_CONSOLIDATE_INTERVAL,
+        )
+    
     def _recover_heartbeat(self) -> bool:
         """恢复心跳系统"""
         try:
@@ -227,6 +240,7 @@ class LifecycleManager:
             # 重新启动
             success = start_global_heartbeat()
             if success:
+                self._register_maintenance_tasks()
                 logger.info("心跳系统恢复成功")
             else:
                 logger.error("心跳系统恢复失败")
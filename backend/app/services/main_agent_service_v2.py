@@ -36,6 +36,8 @@ class MainAgentService:
         """切换会话"""
         factory = get_factory()
         self.context = factory.create_main_context(session_key)
+        # 写入并关闭旧会话的 transcript 句柄
+        self.context.session_store.set_current_key(session_key)
 
     async def run(self, prompt: str, history: list = None) -> str:
         """
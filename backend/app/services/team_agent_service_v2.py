@@ -10,7 +10,14 @@ from typing import List
 
 from backend.app.core.execution.agent_runner import AgentRunner
 from backend.app.core.execution.factory import get_factory
-from backend.app.team.state import get_bus, shutdown_requests, tracker_lock, POLL_INTERVAL, IDLE_TIMEOUT
+from backend.app.task.events import Subscription
+from backend.app.team.state import (
+    IDLE_TIMEOUT,
+    POLL_INTERVAL,
+    get_bus,
+    shutdown_requests,
+    tracker_lock,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -60,70 +67,99 @@ class TeamAgentService:
             output = await self.run(initial_prompt, messages)
             logger.info(f"[{self.name}] Initial task completed: {output[:100]}")
 
-        while True:
-            if self._check_shutdown_request():
-                logger.info(f"[{self.name}] Shutdown approved, exiting")
-                break
-
-            inbox = self.message_bus.read_inbox(self.name)
-            if inbox:
-                idle_start = None
-                self._set_status("working")
-                prompt = self._build_inbox_prompt(inbox)
-                output = await self.run(prompt, messages)
-                logger.info(f"[{self.name}] Processed inbox: {output[:100]}")
-                continue
-
-            task = self._try_claim_task()
-            if task:
-                idle_start = None
-                self._set_status("working")
-                prompt = self._build_task_prompt(task)
-                output = await self.run(prompt, messages)
-                self._complete_task(task["id"], output)
-                logger.info(f"[{self.name}] Completed task {task['id']}")
-                continue
-
-            if idle_start is None:
-                idle_start = time.time()
-                self._set_status("idle")
-                logger.info(f"[{self.name}] Entering idle state")
-
-            if time.time() - idle_start > IDLE_TIMEOUT:
-                self._set_status("shutdown")
-                logger.info(f"[{self.name}] Idle timeout, shutting down")
-                break
-
-            await asyncio.sleep(POLL_INTERVAL)
+        # 订阅任务事件，空闲时不必等满 POLL_INTERVAL
+        wakeup = self._subscribe_task_events()
+        try:
+            while True:
+                if self._check_shutdown_request():
+                    logger.info(f"[{self.name}] Shutdown approved, exiting")
+                    break
+
+                inbox = self.message_bus.read_inbox(self.name)
+                if inbox:
+                    idle_start = None
+                    self._set_status("working")
+                    prompt = self._build_inbox_prompt(inbox)
+                    output = await self.run(prompt, messages)
+                    logger.info(f"[{self.name}] Processed inbox: {output[:100]}")
+                    continue
+
+                task = self._try_claim_task()
+                if task:
+                    idle_start = None
+                    self._set_status("working")
+                    output = await self._run_claimed_task(task, messages)
+                    self._complete_task(task["id"], output)
+                    logger.info(f"[{self.name}] Completed task {task['id']}")
+                    continue
+
+                if idle_start is None:
+                    idle_start = time.time()
+                    self._set_status("idle")
+                    logger.info(f"[{self.name}] Entering idle state")
+
+                if time.time() - idle_start > IDLE_TIMEOUT:
+                    self._set_status("shutdown")
+                    logger.info(f"[{self.name}] Idle timeout, shutting down")
+                    break
+
+                # 任务被创建、解除阻塞或释放时立即唤醒；收件箱和其他进程的修改仍按 POLL_INTERVAL 检查
+                await wakeup.wait_async(POLL_INTERVAL)
+        finally:
+            wakeup.close()
+
     def _set_status(self, status: str):
         """更新 teammate 状态"""
-        from backend.app.team.state import get_team
-        team = get_team()
-        # TODO: 实现状态更新逻辑
+        # TODO: 实现状态更新逻辑（通过 backend.app.team.state.get_team()）
 
     def _check_shutdown_request(self) -> bool:
         """检查是否有 shutdown 请求被批准"""
         with tracker_lock:
-            for req_id, req in shutdown_requests.items():
+            for req in shutdown_requests.values():
                 if req["target"] == self.name and req["status"] == "approved":
                     return True
         return False
 
-    def _try_claim_task(self) -> dict:
-        """尝试认领任务"""
-        from backend.app.team.state import scan_unclaimed_tasks, claim_task
-        tasks = scan_unclaimed_tasks()
-        if not tasks:
-            return None
-        task = tasks[0]
-        claim_task(task["id"], self.name)
-        return task
-
-    def _complete_task(self, task_id: str, output: str):
-        """完成任务"""
+    def _subscribe_task_events(self) -> Subscription:
+        """订阅可能产生新的可认领任务的事件（任务服务 + 任务板认领队列）"""
         from backend.app.task import get_task_service
-        task_service = get_task_service()
-        # TODO: 更新任务状态
+        from backend.app.team.state import get_claim_queue
+        subscription = get_task_service().events.subscribe({"created", "unblocked", "status_changed"})
+        get_claim_queue().events.subscribe(into=subscription)
+        return subscription
+
+    def _try_claim_task(self) -> dict:
+        """尝试认领任务（优先级最高、最早创建的可认领任务）"""
+        from backend.app.team.state import get_claim_queue
+        return get_claim_queue().claim(self.name)
+
+    async def _run_claimed_task(self, task: dict, messages: list) -> str:
+        """执行认领到的任务，期间定期续租；执行失败时放弃认领，任务重新变为可认领"""
+        from backend.app.task import TaskStatus
+        from backend.app.team.state import get_claim_queue
+        queue = get_claim_queue()
+        renewer = asyncio.create_task(self._renew_lease(queue, task["id"]))
+        try:
+            return await self.run(self._build_task_prompt(task), messages)
+        except BaseException:
+            queue.release(task["id"], self.name, TaskStatus.PENDING)
+            raise
+        finally:
+            renewer.cancel()
+
+    async def _renew_lease(self, queue, task_id: int):
+        """每 1/3 租约有效期续租一次，直到被取消或租约已丢失"""
+        while True:
+            await asyncio.sleep(queue.lease_seconds / 3)
+            if not queue.renew(task_id, self.name):
+                logger.warning(f"[{self.name}] Lost lease on board task {task_id}")
+                return
+
+    def _complete_task(self, task_id: int, output: str):
+        """完成任务：更新任务板状态并释放租约"""
+        from backend.app.task import TaskStatus
+        from backend.app.team.state import get_claim_queue
+        get_claim_queue().release(task_id, self.name, TaskStatus.COMPLETED)
 
     def _build_inbox_prompt(self, inbox: List[dict]) -> str:
         """构建收件箱消息的 prompt"""
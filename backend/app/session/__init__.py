@@ -24,9 +24,11 @@ Session 包统一入口
     key = new_session_key()
     save_session("main", history)
 """
+import atexit
 from pathlib import Path
 
-from .constants import SESSIONS_DIR, SESSIONS_INDEX
+from .backends import SessionBackend, create_backend
+from .constants import RESUME_MAX_TURNS, SESSION_BACKEND, SESSIONS_DIR, SESSIONS_INDEX
 from .session import SessionStore
 from .memory import GlobalMemoryLoader, MemoryStore
 
@@ -39,6 +41,8 @@ def get_store() -> SessionStore:
     global _store
     if _store is None:
         _store = SessionStore()
+        # 退出时写入缓冲中的 transcript 条目
+        atexit.register(_store.close)
     return _store
 
 
@@ -131,23 +135,38 @@ def save_session(agent_name: str, history: list) -> None:
     get_store().save_full_history(agent_name, history)
 
 
-def load_session(agent_name: str, key: str) -> list:
+def load_session(agent_name: str, key: str, max_turns: int | None = None) -> list:
     """
     加载会话历史
 
     Args:
         agent_name: agent 名称
         key: 会话 key
+        max_turns: 只加载最后 N 轮（None 表示全部）
 
     Returns:
         LangChain 消息列表
     """
-    return get_store().load_history(agent_name, key)
+    return get_store().load_history(agent_name, key, max_turns=max_turns)
 
 
-def list_sessions() -> list[str]:
-    """列出所有会话 key（按时间倒序）"""
-    return [s["session_key"] for s in get_store().list_sessions()]
+def resume_session(agent_name: str, key: str) -> list:
+    """
+    恢复会话历史（最新压缩快照 + 之后的 transcript 条目，不触发 LLM 压缩）
+
+    Args:
+        agent_name: agent 名称
+        key: 会话 key
+
+    Returns:
+        LangChain 消息列表
+    """
+    return get_store().load_resume_history(agent_name, key)
+
+
+def list_sessions(limit: int | None = None) -> list[str]:
+    """列出会话 key（按时间倒序，limit 为 None 时返回全部）"""
+    return [s["session_key"] for s in get_store().list_sessions(limit)]
 
 
 # ============================================================
@@ -157,15 +176,19 @@ def list_sessions() -> list[str]:
 __all__ = [
     # 类
     'SessionStore',
+    'SessionBackend',
     'GlobalMemoryLoader',
     'MemoryStore',
 
     # 常量
     'SESSIONS_DIR',
     'SESSIONS_INDEX',
+    'RESUME_MAX_TURNS',
+    'SESSION_BACKEND',
 
     # 核心函数
     'get_store',
+    'create_backend',
 
     # 向后兼容函数
     'new_session_key',
@@ -178,6 +201,7 @@ __all__ = [
     'get_board_dir',
     'save_session',
     'load_session',
+    'resume_session',
     'list_sessions',
 
     # 文件路径辅助函数
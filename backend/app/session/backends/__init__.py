@@ -0,0 +1,43 @@
+"""
+会话存储后端
+
+通过环境变量 SESSION_BACKEND 选择：
+- file:   JSON / JSONL 文件（默认）
+- sqlite: SQLite WAL 数据库（多进程 worker 共享会话时使用）
+"""
+from pathlib import Path
+
+from ..constants import SESSION_BACKEND
+from .base import Position, SessionBackend
+from .file import FileSessionBackend
+from .sqlite import SQLiteSessionBackend
+
+BACKENDS = {
+    FileSessionBackend.name: FileSessionBackend,
+    SQLiteSessionBackend.name: SQLiteSessionBackend,
+}
+
+
+def create_backend(sessions_dir: Path, kind: str = SESSION_BACKEND) -> SessionBackend:
+    """
+    创建会话存储后端
+
+    Args:
+        sessions_dir: 会话存储根目录
+        kind: 后端类型（file / sqlite）
+
+    Returns:
+        SessionBackend 实例
+    """
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown session backend: {kind} (expected one of {tuple(BACKENDS)})")
+    return BACKENDS[kind](sessions_dir)
+
+
+__all__ = [
+    "Position",
+    "SessionBackend",
+    "FileSessionBackend",
+    "SQLiteSessionBackend",
+    "create_backend",
+]
@@ -0,0 +1,127 @@
+"""
+会话存储后端接口
+
+SessionStore 只负责会话语义（轮次、压缩、快照、目录布局），
+元数据索引和 transcript 条目的持久化交给存储后端：
+
+    SessionStore ──> SessionBackend
+                        ├── FileSessionBackend    sessions.json + {agent}.jsonl（默认）
+                        └── SQLiteSessionBackend  sessions.db（WAL，多进程安全）
+
+transcript 位置用 (segment, offset) 表示：文件后端是分段序号 + 字节偏移，
+SQLite 后端固定 segment=1，offset 为条目行号。快照只保存这个位置，由后端解释。
+"""
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..constants import SESSION_COLD_DAYS
+from ..segments import gc_session
+
+Position = Tuple[int, int]
+
+
+class SessionBackend(ABC):
+    """会话存储后端基类"""
+
+    name: str = ""
+
+    def __init__(self, sessions_dir: Path):
+        self.sessions_dir = sessions_dir
+
+    # ========== 元数据 ==========
+
+    @abstractmethod
+    def get_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        """获取会话元数据（不存在时返回 None）"""
+
+    @abstractmethod
+    def put_meta(self, key: str, metadata: Dict[str, Any]) -> None:
+        """写入完整的会话元数据（创建会话）"""
+
+    @abstractmethod
+    def update_meta(self, key: str, **fields: Any) -> None:
+        """更新会话元数据的部分字段（会话不存在时忽略）"""
+
+    @abstractmethod
+    def increment_meta(self, key: str, counter: str, **fields: Any) -> None:
+        """
+        计数字段加一，并同时更新其他字段
+
+        Args:
+            key: 会话 key
+            counter: 计数字段（message_count / compaction_count）
+            **fields: 同时更新的字段（如 updated_at）
+        """
+
+    @abstractmethod
+    def list_meta(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """按更新时间倒序列出会话元数据（支持分页）"""
+
+    @abstractmethod
+    def delete_session(self, key: str) -> None:
+        """删除会话元数据和全部 transcript 条目"""
+
+    # ========== transcript ==========
+
+    @abstractmethod
+    def append(self, key: str, agent_name: str, entry: dict) -> None:
+        """追加一条 transcript 条目（可能先进入缓冲区）"""
+
+    @abstractmethod
+    def end_turn(self, key: str, agent_name: str) -> None:
+        """轮次边界：按 durability 级别持久化缓冲区"""
+
+    @abstractmethod
+    def flush(self, key: Optional[str] = None, agent_name: Optional[str] = None) -> None:
+        """写入缓冲区（读取 transcript 前调用）"""
+
+    @abstractmethod
+    def reset_transcript(self, key: str, agent_name: str, entries: List[dict]) -> None:
+        """用给定条目覆盖 agent 的整个 transcript"""
+
+    @abstractmethod
+    def read_entries(self, key: str, agent_name: str, max_turns: Optional[int] = None,
+                     since_compaction: bool = False) -> List[dict]:
+        """
+        读取 transcript 条目
+
+        Args:
+            key: 会话 key
+            agent_name: agent 名称
+            max_turns: 只读取最后 N 轮
+            since_compaction: 从最近一次压缩事件开始读取
+        """
+
+    @abstractmethod
+    def position(self, key: str, agent_name: str) -> Position:
+        """当前 transcript 末尾位置（写快照时记录）"""
+
+    @abstractmethod
+    def entries_after(self, key: str, agent_name: str, position: Position) -> Optional[List[dict]]:
+        """读取某个位置之后的条目（位置已失效时返回 None）"""
+
+    # ========== 生命周期 ==========
+
+    def close_handle(self, key: str, agent_name: str) -> None:  # noqa: B027
+        """
+        关闭单个 transcript 句柄
+
+        可选钩子：默认什么也不做，没有按 agent 打开的句柄的后端（如 SQLite）不必覆盖
+        """
+
+    def close_session(self, key: str) -> None:  # noqa: B027
+        """
+        关闭某个会话的所有句柄（切换会话时调用）
+
+        可选钩子：默认什么也不做，有写入缓冲或打开句柄的后端应覆盖，把该会话的条目写出
+        """
+
+    def gc_session(self, key: str, cold_days: float = SESSION_COLD_DAYS) -> Dict[str, Any]:
+        """整理单个会话目录（trace 等 JSONL 文件轮转、压缩）"""
+        self.close_session(key)
+        return gc_session(self.sessions_dir / key, cold_days)
+
+    @abstractmethod
+    def close(self) -> None:
+        """关闭后端（退出时调用）"""
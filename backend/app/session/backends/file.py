@@ -0,0 +1,162 @@
+"""
+文件存储后端（默认）
+
+    {sessions_dir}/sessions.json                 # 元数据快照
+    {sessions_dir}/sessions.journal.jsonl        # 元数据增量日志（见 index_journal.py）
+    {sessions_dir}/{key}/{agent}.jsonl           # 活动 transcript（见 transcript.py）
+    {sessions_dir}/{key}/{agent}.offsets.jsonl   # 偏移索引（见 offset_index.py）
+    {sessions_dir}/{key}/segments/...            # 已轮转的压缩分段（见 segments.py）
+
+单进程使用；多个进程共享同一个会话目录时请使用 SQLite 后端。
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..index_journal import SessionIndexJournal
+from ..offset_index import (
+    find_start_offset,
+    iter_entries,
+    load_markers,
+    offsets_path,
+    rebuild_markers,
+)
+from ..segments import list_segments, live_seq, segment_seq
+from ..transcript import TranscriptWriter
+from .base import Position, SessionBackend
+
+
+class FileSessionBackend(SessionBackend):
+    """基于 JSON / JSONL 文件的会话存储"""
+
+    name = "file"
+
+    def __init__(self, sessions_dir: Path):
+        super().__init__(sessions_dir)
+        self.journal = SessionIndexJournal(sessions_dir)
+        self.index: Dict[str, Dict[str, Any]] = self.journal.load()
+        self.writer = TranscriptWriter(sessions_dir)
+
+    # ========== 元数据 ==========
+
+    def get_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.index.get(key)
+
+    def put_meta(self, key: str, metadata: Dict[str, Any]) -> None:
+        self.journal.put(key, metadata)
+
+    def update_meta(self, key: str, **fields: Any) -> None:
+        self.journal.update(key, **fields)
+
+    def increment_meta(self, key: str, counter: str, **fields: Any) -> None:
+        meta = self.index.get(key)
+        if meta is None:
+            return
+        self.journal.update(key, **fields, **{counter: meta.get(counter, 0) + 1})
+
+    def list_meta(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        sessions = sorted(self.index.values(), key=lambda s: s.get("updated_at", ""), reverse=True)
+        return sessions[offset:offset + limit if limit is not None else None]
+
+    def delete_session(self, key: str) -> None:
+        self.journal.delete(key)
+        self.writer.close_session(key)
+
+    # ========== transcript ==========
+
+    def _path(self, key: str, agent_name: str) -> Path:
+        return self.writer.path_for(key, agent_name)
+
+    def append(self, key: str, agent_name: str, entry: dict) -> None:
+        self.writer.append(key, agent_name, entry)
+
+    def end_turn(self, key: str, agent_name: str) -> None:
+        self.writer.end_turn(key, agent_name)
+
+    def flush(self, key: Optional[str] = None, agent_name: Optional[str] = None) -> None:
+        self.writer.flush(key, agent_name)
+
+    def reset_transcript(self, key: str, agent_name: str, entries: List[dict]) -> None:
+        # 覆盖写入前关闭追加句柄，并删除已失效的偏移索引和已轮转的分段（否则完整读取会把旧历史拼在前面）
+        self.writer.close_handle(key, agent_name)
+        path = self._path(key, agent_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        offsets_path(path).unlink(missing_ok=True)
+        for segment in list_segments(path):
+            segment.unlink(missing_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def read_entries(self, key: str, agent_name: str, max_turns: Optional[int] = None,
+                     since_compaction: bool = False) -> List[dict]:
+        """活动文件按偏移索引 seek，不够时向前读取分段"""
+        self.writer.flush(key, agent_name)
+        path = self._path(key, agent_name)
+        entries: List[dict] = []
+        if path.exists():
+            start = 0
+            if max_turns or since_compaction:
+                markers = load_markers(path)
+                if markers is None:
+                    markers = rebuild_markers(path)
+                start = find_start_offset(markers, max_turns, since_compaction)
+            entries = list(iter_entries(path, start))
+
+        def enough() -> bool:
+            if since_compaction and any(e.get("type") == "compaction" for e in entries):
+                return True
+            return bool(max_turns) and sum(e.get("type") == "user" for e in entries) >= max_turns
+
+        for segment in reversed(list_segments(path)):
+            if enough():
+                break
+            entries = list(iter_entries(segment)) + entries
+
+        if since_compaction:
+            compactions = [i for i, e in enumerate(entries) if e.get("type") == "compaction"]
+            if compactions:
+                entries = entries[compactions[-1]:]
+        if max_turns:
+            # 偏移索引可能落后于 transcript（崩溃时），按实际条目再截取一次
+            turn_starts = [i for i, e in enumerate(entries) if e.get("type") == "user"]
+            if len(turn_starts) > max_turns:
+                entries = entries[turn_starts[-max_turns]:]
+        return entries
+
+    def position(self, key: str, agent_name: str) -> Position:
+        self.writer.flush(key, agent_name)
+        path = self._path(key, agent_name)
+        return live_seq(path), path.stat().st_size if path.exists() else 0
+
+    def entries_after(self, key: str, agent_name: str, position: Position) -> Optional[List[dict]]:
+        self.writer.flush(key, agent_name)
+        path = self._path(key, agent_name)
+        seg, offset = position
+        current = live_seq(path)
+        size = path.stat().st_size if path.exists() else 0
+
+        if seg > current or (seg == current and offset > size):
+            return None
+
+        entries: List[dict] = []
+        for segment in list_segments(path):
+            seq = segment_seq(segment)
+            if seq >= seg:
+                entries.extend(iter_entries(segment, offset if seq == seg else 0))
+        if path.exists():
+            entries.extend(iter_entries(path, offset if seg == current else 0))
+        return entries
+
+    # ========== 生命周期 ==========
+
+    def close_handle(self, key: str, agent_name: str) -> None:
+        self.writer.close_handle(key, agent_name)
+
+    def close_session(self, key: str) -> None:
+        self.writer.close_session(key)
+
+    def close(self) -> None:
+        """关闭所有 transcript 句柄并把索引日志写回快照"""
+        self.writer.close()
+        self.journal.close()
@@ -0,0 +1,310 @@
+"""
+SQLite 存储后端（WAL 模式）
+
+所有会话共用一个数据库 {sessions_dir}/sessions.db：
+
+    sessions     (key PK, session_id, created_at, updated_at, message_count, compaction_count, extra)
+    entries      (id PK, session_key, agent, type, ts, data)
+    compactions  (id PK, session_key, agent, entry_id, kind, before_count, after_count, ts)
+
+- 列表 / 分页走 sessions(updated_at) 索引
+- 最后 N 轮走 entries(session_key, agent, type, id) 索引，最近一次压缩走 compactions 索引
+- WAL + busy_timeout + BEGIN IMMEDIATE：多个线程 / 进程可以同时写入，
+  计数字段用 SQL 自增，不会出现读-改-写覆盖
+
+workspace / tasks / team 等目录和压缩快照仍然在会话目录中。
+"""
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..constants import (
+    SESSION_DB_NAME,
+    SQLITE_BUSY_TIMEOUT,
+    TRANSCRIPT_DURABILITY,
+    TRANSCRIPT_FLUSH_ENTRIES,
+)
+from .base import Position, SessionBackend
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    session_id TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    compaction_count INTEGER NOT NULL DEFAULT 0,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at DESC);
+
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_key TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    type TEXT,
+    ts TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_agent ON entries(session_key, agent, id);
+CREATE INDEX IF NOT EXISTS idx_entries_type ON entries(session_key, agent, type, id);
+
+CREATE TABLE IF NOT EXISTS compactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_key TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    entry_id INTEGER NOT NULL,
+    kind TEXT,
+    before_count INTEGER,
+    after_count INTEGER,
+    ts TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_compactions_agent ON compactions(session_key, agent, entry_id);
+"""
+
+# sessions 表中的独立列，其余字段存入 extra（JSON）
+META_COLUMNS = ("session_id", "created_at", "updated_at", "message_count", "compaction_count")
+COUNTERS = ("message_count", "compaction_count")
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """
+    基于 SQLite 的会话存储
+
+    同一进程内共用一个连接（由锁串行化），进程之间由 SQLite 的 WAL 锁协调。
+    transcript 条目先缓存在内存中，在轮次边界或达到条目数阈值时一次事务批量写入。
+    """
+
+    name = "sqlite"
+
+    def __init__(self, sessions_dir: Path, db_path: Optional[Path] = None,
+                 durability: str = TRANSCRIPT_DURABILITY,
+                 flush_entries: int = TRANSCRIPT_FLUSH_ENTRIES,
+                 busy_timeout: float = SQLITE_BUSY_TIMEOUT):
+        super().__init__(sessions_dir)
+        self.db_path = db_path or sessions_dir / SESSION_DB_NAME
+        self.durability = durability
+        self.flush_entries = flush_entries
+        self._lock = threading.RLock()
+        self._buffers: Dict[Tuple[str, str], List[dict]] = {}
+
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={'FULL' if durability == 'fsync' else 'NORMAL'}")
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        # executescript 自带提交，不放在 _tx() 中；IF NOT EXISTS 保证多进程并发初始化安全
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        """写事务：BEGIN IMMEDIATE 先拿到写锁，避免读锁升级时的死锁"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ========== 元数据 ==========
+
+    @staticmethod
+    def _row_to_meta(row: sqlite3.Row) -> Dict[str, Any]:
+        meta = {"session_key": row["key"]}
+        meta.update({col: row[col] for col in META_COLUMNS})
+        meta.update(json.loads(row["extra"] or "{}"))
+        return meta
+
+    @staticmethod
+    def _split_fields(fields: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """拆分为独立列和 extra 字段"""
+        columns = {k: v for k, v in fields.items() if k in META_COLUMNS}
+        extra = {k: v for k, v in fields.items() if k not in META_COLUMNS and k != "session_key"}
+        return columns, extra
+
+    def get_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM sessions WHERE key = ?", (key,))
+        return self._row_to_meta(rows[0]) if rows else None
+
+    def put_meta(self, key: str, metadata: Dict[str, Any]) -> None:
+        columns, extra = self._split_fields(metadata)
+        columns.setdefault("message_count", 0)
+        columns.setdefault("compaction_count", 0)
+        names = ["key", *columns, "extra"]
+        values = [key, *columns.values(), json.dumps(extra, ensure_ascii=False)]
+        with self._tx() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO sessions ({', '.join(names)}) "
+                f"VALUES ({', '.join('?' * len(names))})",
+                values,
+            )
+
+    def _update(self, conn: sqlite3.Connection, key: str, fields: Dict[str, Any],
+                counter: Optional[str] = None) -> None:
+        columns, extra = self._split_fields(fields)
+        assignments = [f"{col} = ?" for col in columns]
+        values: List[Any] = list(columns.values())
+        if counter:
+            assignments.append(f"{counter} = {counter} + 1")
+        if extra:
+            assignments.append("extra = json_patch(extra, ?)")
+            values.append(json.dumps(extra, ensure_ascii=False))
+        if assignments:
+            conn.execute(f"UPDATE sessions SET {', '.join(assignments)} WHERE key = ?", (*values, key))
+
+    def update_meta(self, key: str, **fields: Any) -> None:
+        with self._tx() as conn:
+            self._update(conn, key, fields)
+
+    def increment_meta(self, key: str, counter: str, **fields: Any) -> None:
+        if counter not in COUNTERS:
+            raise ValueError(f"Unknown counter: {counter}")
+        with self._tx() as conn:
+            self._update(conn, key, fields, counter)
+
+    def list_meta(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT * FROM sessions ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset),
+        )
+        return [self._row_to_meta(row) for row in rows]
+
+    def delete_session(self, key: str) -> None:
+        with self._lock:
+            for hkey in [h for h in self._buffers if h[0] == key]:
+                del self._buffers[hkey]
+            with self._tx() as conn:
+                conn.execute("DELETE FROM sessions WHERE key = ?", (key,))
+                conn.execute("DELETE FROM entries WHERE session_key = ?", (key,))
+                conn.execute("DELETE FROM compactions WHERE session_key = ?", (key,))
+
+    # ========== transcript ==========
+
+    def append(self, key: str, agent_name: str, entry: dict) -> None:
+        with self._lock:
+            buffer = self._buffers.setdefault((key, agent_name), [])
+            buffer.append(entry)
+            if len(buffer) >= self.flush_entries:
+                self._write_buffer(key, agent_name)
+
+    def _write_buffer(self, key: str, agent_name: str) -> None:
+        """一次事务写入某个 agent 的缓冲条目（压缩事件同时写入 compactions 表）"""
+        entries = self._buffers.pop((key, agent_name), None)
+        if not entries:
+            return
+        with self._tx() as conn:
+            for entry in entries:
+                cursor = conn.execute(
+                    "INSERT INTO entries (session_key, agent, type, ts, data) VALUES (?, ?, ?, ?, ?)",
+                    (key, agent_name, entry.get("type"), entry.get("ts"),
+                     json.dumps(entry, ensure_ascii=False)),
+                )
+                if entry.get("type") == "compaction":
+                    conn.execute(
+                        "INSERT INTO compactions (session_key, agent, entry_id, kind, before_count, after_count, ts) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (key, agent_name, cursor.lastrowid, entry.get("kind"),
+                         entry.get("before_count"), entry.get("after_count"), entry.get("ts")),
+                    )
+
+    def end_turn(self, key: str, agent_name: str) -> None:
+        if self.durability == "none":
+            return
+        with self._lock:
+            self._write_buffer(key, agent_name)
+
+    def flush(self, key: Optional[str] = None, agent_name: Optional[str] = None) -> None:
+        with self._lock:
+            for k, a in list(self._buffers):
+                if key is not None and k != key:
+                    continue
+                if agent_name is not None and a != agent_name:
+                    continue
+                self._write_buffer(k, a)
+
+    def reset_transcript(self, key: str, agent_name: str, entries: List[dict]) -> None:
+        with self._lock:
+            self._buffers.pop((key, agent_name), None)
+            with self._tx() as conn:
+                conn.execute("DELETE FROM entries WHERE session_key = ? AND agent = ?", (key, agent_name))
+                conn.execute("DELETE FROM compactions WHERE session_key = ? AND agent = ?", (key, agent_name))
+            self._buffers[(key, agent_name)] = list(entries)
+            self._write_buffer(key, agent_name)
+
+    def read_entries(self, key: str, agent_name: str, max_turns: Optional[int] = None,
+                     since_compaction: bool = False) -> List[dict]:
+        self.flush(key, agent_name)
+        start = 0
+        if since_compaction:
+            rows = self._query(
+                "SELECT MAX(entry_id) FROM compactions WHERE session_key = ? AND agent = ?",
+                (key, agent_name),
+            )
+            start = rows[0][0] or 0
+        if max_turns:
+            rows = self._query(
+                "SELECT id FROM entries WHERE session_key = ? AND agent = ? AND type = 'user' "
+                "ORDER BY id DESC LIMIT 1 OFFSET ?",
+                (key, agent_name, max_turns - 1),
+            )
+            if rows:
+                start = max(start, rows[0][0])
+        return self._entries_from(key, agent_name, start)
+
+    def _entries_from(self, key: str, agent_name: str, start_id: int) -> List[dict]:
+        rows = self._query(
+            "SELECT data FROM entries WHERE session_key = ? AND agent = ? AND id >= ? ORDER BY id",
+            (key, agent_name, start_id),
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def position(self, key: str, agent_name: str) -> Position:
+        self.flush(key, agent_name)
+        rows = self._query(
+            "SELECT MAX(id) FROM entries WHERE session_key = ? AND agent = ?", (key, agent_name)
+        )
+        return 1, rows[0][0] or 0
+
+    def entries_after(self, key: str, agent_name: str, position: Position) -> Optional[List[dict]]:
+        seg, last_id = position
+        current_seg, current_id = self.position(key, agent_name)
+        if seg != current_seg or last_id > current_id:
+            return None
+        return self._entries_from(key, agent_name, last_id + 1)
+
+    # ========== 生命周期 ==========
+
+    def close_session(self, key: str) -> None:
+        with self._lock:
+            for k, a in [h for h in self._buffers if h[0] == key]:
+                self._write_buffer(k, a)
+
+    def close(self) -> None:
+        """写入所有缓冲条目，把 WAL 合并回主库并关闭连接"""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self.flush()
+                self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            finally:
+                self._conn.close()
+                self._conn = None
@@ -1,6 +1,7 @@
 """
 Session 包常量配置
 """
+import os
 from pathlib import Path
 
 # 项目根目录（backend/ 的父目录）
@@ -14,3 +15,72 @@ SESSIONS_INDEX = SESSIONS_DIR / "sessions.json"
 
 # 全局记忆配置目录（移动到 backend/memory/）
 MEMORY_DIR = PROJECT_ROOT / "backend" / "memory"
+
+# Transcript 写入配置
+# 持久化级别：none（不主动刷盘）/ flush（轮次边界 flush）/ fsync（轮次边界 fsync）
+TRANSCRIPT_DURABILITY = os.getenv("TRANSCRIPT_DURABILITY", "flush")
+# 缓冲阈值：条目数 / 字节数 / 秒数，任一达到即写入文件
+TRANSCRIPT_FLUSH_ENTRIES = int(os.getenv("TRANSCRIPT_FLUSH_ENTRIES", "64"))
+TRANSCRIPT_FLUSH_BYTES = int(os.getenv("TRANSCRIPT_FLUSH_BYTES", str(256 * 1024)))
+TRANSCRIPT_FLUSH_INTERVAL = float(os.getenv("TRANSCRIPT_FLUSH_INTERVAL", "2.0"))
+# 同时保持打开的 transcript 句柄上限
+TRANSCRIPT_MAX_OPEN_HANDLES = int(os.getenv("TRANSCRIPT_MAX_OPEN_HANDLES", "32"))
+
+# 会话索引日志：累计多少条增量记录后写回 sessions.json 快照
+INDEX_CHECKPOINT_EVERY = int(os.getenv("SESSION_INDEX_CHECKPOINT_EVERY", "500"))
+
+# 恢复会话时最多重放的对话轮数（借助偏移索引只读取 transcript 尾部）
+RESUME_MAX_TURNS = int(os.getenv("SESSION_RESUME_MAX_TURNS", "50"))
+
+# 每个 agent 保留的压缩快照数量
+SNAPSHOT_KEEP = int(os.getenv("SESSION_SNAPSHOT_KEEP", "3"))
+
+# 分段轮转：活动 transcript / trace 超过该大小时轮转为压缩分段
+SEGMENT_MAX_BYTES = int(os.getenv("SESSION_SEGMENT_MAX_BYTES", str(8 * 1024 * 1024)))
+# 超过该天数未更新的会话在 /sessions gc 时整体压缩
+SESSION_COLD_DAYS = float(os.getenv("SESSION_COLD_DAYS", "7"))
+
+# 会话存储后端：file（JSON / JSONL 文件）/ sqlite（WAL 数据库，多进程安全）
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "file")
+# SQLite 数据库文件名（位于 SESSIONS_DIR 下）和锁等待超时（秒）
+SESSION_DB_NAME = os.getenv("SESSION_DB_NAME", "sessions.db")
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SESSION_SQLITE_BUSY_TIMEOUT", "30"))
+
+# 记忆倒排索引：块表累计多少条增量后重写 postings.json
+MEMORY_INDEX_COMPACT_EVERY = int(os.getenv("MEMORY_INDEX_COMPACT_EVERY", "200"))
+
+# 记忆检索默认排序算法：tfidf（TF-IDF 余弦）/ bm25
+MEMORY_RANKER = os.getenv("MEMORY_RANKER", "tfidf")
+# BM25 参数
+BM25_K1 = float(os.getenv("MEMORY_BM25_K1", "1.5"))
+BM25_B = float(os.getenv("MEMORY_BM25_B", "0.75"))
+
+# 混合检索：哈希特征向量维度、向量/关键词两路的权重、每路候选数
+MEMORY_VECTOR_DIM = int(os.getenv("MEMORY_VECTOR_DIM", "64"))
+MEMORY_VECTOR_WEIGHT = float(os.getenv("MEMORY_VECTOR_WEIGHT", "0.7"))
+MEMORY_CANDIDATES = int(os.getenv("MEMORY_CANDIDATES", "10"))
+# 每日日志的时间衰减率（每天）：score *= exp(-rate * age_days)；MEMORY.md 不衰减
+MEMORY_DECAY_RATE = float(os.getenv("MEMORY_DECAY_RATE", "0.01"))
+# MMR 相关性与多样性的权衡（1 = 只看相关性）
+MEMORY_MMR_LAMBDA = float(os.getenv("MEMORY_MMR_LAMBDA", "0.7"))
+
+# 记忆检索分析器（见 backend.app.analysis）：cjk（中文字符二元组）/ cjk_stop（另加停用词过滤）/ legacy
+MEMORY_ANALYZER = os.getenv("MEMORY_ANALYZER", "cjk")
+
+# 记忆召回：常驻 MemoryStore 的会话数、召回结果 LRU 缓存条数
+RECALL_MAX_SESSIONS = int(os.getenv("RECALL_MAX_SESSIONS", "8"))
+RECALL_CACHE_SIZE = int(os.getenv("RECALL_CACHE_SIZE", "256"))
+
+# 记忆写入去重：1 = 拒绝与已有条目近乎相同的写入（SimHash 汉明距离不超过阈值且原文确认），0 = 关闭
+MEMORY_DEDUP = os.getenv("MEMORY_DEDUP", "1") != "0"
+MEMORY_DEDUP_MAX_DISTANCE = int(os.getenv("MEMORY_DEDUP_MAX_DISTANCE", "6"))
+# LSH 分段数：每段另外探测相差 1 位的键，汉明距离小于 2 × 分段数的签名一定会被找到
+MEMORY_DEDUP_BANDS = int(os.getenv("MEMORY_DEDUP_BANDS", "4"))
+# 签名命中后确认原文：数字序列相同且字符 shingle 的 Jaccard 相似度不低于该值才视为重复
+MEMORY_DEDUP_MIN_JACCARD = float(os.getenv("MEMORY_DEDUP_MIN_JACCARD", "0.8"))
+
+# 记忆分层合并：超过 MEMORY_HOT_DAYS 天的每日日志合并为周段，超过 MEMORY_MONTHLY_DAYS 天的合并为月段
+MEMORY_HOT_DAYS = int(os.getenv("MEMORY_HOT_DAYS", "7"))
+MEMORY_MONTHLY_DAYS = int(os.getenv("MEMORY_MONTHLY_DAYS", "60"))
+# 心跳系统触发合并的间隔（秒）
+MEMORY_CONSOLIDATE_INTERVAL = int(os.getenv("MEMORY_CONSOLIDATE_INTERVAL", "86400"))
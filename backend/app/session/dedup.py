@@ -0,0 +1,196 @@
+"""
+dedup.py - 记忆写入的近似重复检测（SimHash + LSH）
+
+签名：归一化文本（normalize_text）的字符 3-gram 集合经哈希特征向量（memory_vectors.hash_vector）
+逐位取符号，得到 dim 位 SimHash。shingle 直接取自原文，保留数字和词序，不经过检索分析器
+（分析器丢弃数字和单字、不区分顺序，"10.0.0.1" 和 "10.0.0.2"、"3月5日" 和 "5月3日" 会得到相同的签名）。
+
+LSH：签名切成 bands 段，每段作为一个分桶键，查询时每段再多探测相差 1 位的键：
+
+    sig = | band 0 | band 1 | band 2 | band 3 |      64 位 = 4 段 × 16 位
+              │
+              └─► buckets[0][band 0 的值 ^ (0 或 1 << j)] -> [条目, ...]
+
+汉明距离 < 2 × bands 的两个签名至少有一段最多相差 1 位（抽屉原理），一定会被探测到；
+16 位的段让每个桶只有很少的条目，写入前的检查与已有条目数量基本无关。
+
+确认：签名只用来找候选，拒绝写入前还要用 is_near_exact 比较原文——数字序列必须完全相同，
+shingle 的 Jaccard 相似度不低于 MEMORY_DEDUP_MIN_JACCARD。只改了一个数字或调换了顺序的更正不会被当作重复。
+"""
+import re
+import unicodedata
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from .constants import MEMORY_DEDUP_BANDS, MEMORY_DEDUP_MIN_JACCARD, MEMORY_VECTOR_DIM
+from .memory_vectors import hash_vector, signature
+
+SHINGLE_SIZE = 3
+
+_SEPARATORS = re.compile(r"[\W_]+")
+_NUMBERS = re.compile(r"\d+")
+
+
+def normalize_text(text: str) -> str:
+    """NFKC 归一化、转小写，标点和连续空白合并为一个空格（数字和词序保持不变）"""
+    return _SEPARATORS.sub(" ", unicodedata.normalize("NFKC", text).lower()).strip()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """归一化文本的字符 n-gram 集合（短于 size 的文本整体作为一个 shingle）"""
+    text = normalize_text(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def text_signature(text: str, dim: int = MEMORY_VECTOR_DIM) -> Optional[int]:
+    """
+    文本的 SimHash 签名（字符 shingle 的哈希向量）
+
+    Returns:
+        签名；文本归一化后为空时返回 None
+    """
+    grams = shingles(text)
+    return signature(hash_vector(dict.fromkeys(grams, 1), dim)) if grams else None
+
+
+def is_near_exact(a: str, b: str, min_jaccard: float = MEMORY_DEDUP_MIN_JACCARD) -> bool:
+    """
+    两段文本是否近乎相同：归一化后相等，或数字序列相同且 shingle Jaccard 相似度不低于 min_jaccard
+
+    Args:
+        a: 文本
+        b: 文本
+        min_jaccard: 最小 Jaccard 相似度
+
+    Returns:
+        是否视为重复
+    """
+    na, nb = normalize_text(a), normalize_text(b)
+    if na == nb:
+        return True
+    if _NUMBERS.findall(na) != _NUMBERS.findall(nb):
+        return False
+    sa, sb = shingles(na), shingles(nb)
+    if not sa or not sb:
+        return False
+    return len(sa & sb) / len(sa | sb) >= min_jaccard
+
+
+class SimHashLSH:
+    """
+    SimHash 签名的分段分桶索引
+
+    Usage:
+        lsh = SimHashLSH(bits=64, bands=4)
+        lsh.add("chunk-1", sig)
+        hit = lsh.nearest(new_sig, max_distance=6)   # (key, distance) 或 None
+    """
+
+    def __init__(self, bits: int = MEMORY_VECTOR_DIM, bands: int = MEMORY_DEDUP_BANDS):
+        self.bits = bits
+        self.bands = bands
+        self.width = bits // bands
+        self._mask = (1 << self.width) - 1
+        self._buckets: List[Dict[int, List[Hashable]]] = [{} for _ in range(bands)]
+        self._sigs: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._sigs)
+
+    def _keys(self, sig: int) -> Iterable[Tuple[int, int]]:
+        for band in range(self.bands):
+            yield band, (sig >> (band * self.width)) & self._mask
+
+    def _probes(self, sig: int) -> Iterable[Tuple[int, int]]:
+        """每段的原值以及相差 1 位的所有值"""
+        for band, value in self._keys(sig):
+            yield band, value
+            for j in range(self.width):
+                yield band, value ^ (1 << j)
+
+    def add(self, key: Hashable, sig: int) -> None:
+        """加入一个条目"""
+        self._sigs[key] = sig
+        for band, value in self._keys(sig):
+            self._buckets[band].setdefault(value, []).append(key)
+
+    def clear(self) -> None:
+        self._buckets = [{} for _ in range(self.bands)]
+        self._sigs = {}
+
+    def candidates(self, sig: int, max_distance: int) -> List[Tuple[Hashable, int]]:
+        """
+        汉明距离不超过 max_distance 的条目，按距离升序
+
+        max_distance < 2 × bands 时不会漏报；更大的阈值只能找到至少有一段最多相差 1 位的条目。
+
+        Returns:
+            [(key, distance), ...]
+        """
+        hits: Dict[Hashable, int] = {}
+        for band, value in self._probes(sig):
+            for key in self._buckets[band].get(value, ()):
+                if key not in hits:
+                    hits[key] = (sig ^ self._sigs[key]).bit_count()
+        return sorted(((k, d) for k, d in hits.items() if d <= max_distance), key=lambda hit: hit[1])
+
+    def nearest(self, sig: int, max_distance: int) -> Optional[Tuple[Hashable, int]]:
+        """
+        查找汉明距离不超过 max_distance 的最近条目
+
+        Returns:
+            (key, distance)；没有时返回 None
+        """
+        hits = self.candidates(sig, max_distance)
+        return hits[0] if hits else None
+
+
+class TextDedupIndex:
+    """
+    一组文本条目的近似重复索引（全局记忆文件 USER.md / MEMORY.md / TOOLS.md）
+
+    Usage:
+        index = TextDedupIndex()
+        index.reset(entries)
+        hit = index.nearest("新的记忆", max_distance=6)   # (已有条目, distance) 或 None
+    """
+
+    def __init__(self, dim: int = MEMORY_VECTOR_DIM, bands: int = MEMORY_DEDUP_BANDS):
+        self.dim = dim
+        self.lsh = SimHashLSH(dim, bands)
+        self._texts: List[str] = []
+
+    def reset(self, entries: Iterable[str]) -> None:
+        """用已有条目重建索引"""
+        self.lsh.clear()
+        self._texts = []
+        for text in entries:
+            self.add(text)
+
+    def add(self, text: str) -> None:
+        sig = text_signature(text, self.dim)
+        if sig is not None:
+            self.lsh.add(len(self._texts), sig)
+            self._texts.append(text)
+
+    def nearest(self, text: str, max_distance: int) -> Optional[Tuple[str, int]]:
+        """签名距离不超过 max_distance、且原文近乎相同（is_near_exact）的最近条目"""
+        sig = text_signature(text, self.dim)
+        if sig is None:
+            return None
+        for key, distance in self.lsh.candidates(sig, max_distance):
+            if is_near_exact(text, self._texts[key]):
+                return self._texts[key], distance
+        return None
+
+
+def split_entries(markdown: str) -> List[str]:
+    """把全局记忆文件按空行切成条目（跳过标题行，例如 _append_to_global_file 写入的时间戳）"""
+    entries = []
+    for block in markdown.split("\n\n"):
+        lines = [line for line in block.strip().splitlines() if not line.lstrip().startswith("#")]
+        text = "\n".join(lines).strip()
+        if text:
+            entries.append(text)
+    return entries
@@ -0,0 +1,165 @@
+"""
+index_journal.py - 会话索引日志
+
+sessions.json 作为快照（snapshot），每次元数据变更只向
+sessions.journal.jsonl 追加一行增量记录：
+
+    {"op": "put",    "key": "...", "fields": {...完整元数据...}}
+    {"op": "update", "key": "...", "fields": {"message_count": 3, "updated_at": "..."}}
+    {"op": "delete", "key": "..."}
+
+加载时读取快照并重放日志；日志条数达到阈值时把内存索引写回快照
+（临时文件 + rename），然后清空日志。update 记录的是字段的新值而不是
+差值，因此重放是幂等的：即使在写快照和清空日志之间崩溃也不会重复计数。
+崩溃时留下的半行在重放时跳过，并在下一次追加之前截掉。
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .constants import INDEX_CHECKPOINT_EVERY
+
+
+class SessionIndexJournal:
+    """
+    追加式会话索引
+
+    Usage:
+        journal = SessionIndexJournal(sessions_dir)
+        index = journal.load()
+        journal.put(key, metadata)
+        journal.update(key, message_count=3)
+        journal.close()
+    """
+
+    def __init__(self, sessions_dir: Path, checkpoint_every: int = INDEX_CHECKPOINT_EVERY):
+        self.snapshot_path = sessions_dir / "sessions.json"
+        self.journal_path = sessions_dir / "sessions.journal.jsonl"
+        self.checkpoint_every = checkpoint_every
+        self.index: Dict[str, Dict[str, Any]] = {}
+        self._pending = 0  # 自上次快照以来的日志条数
+        self._file = None
+        self._lock = threading.RLock()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """读取快照并重放日志，返回内存索引"""
+        with self._lock:
+            self.index = self._read_snapshot()
+            self._pending = 0
+            if self.journal_path.exists():
+                with open(self.journal_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # 崩溃时可能留下半行
+                        self._apply(record)
+                        self._pending += 1
+            if self._pending >= self.checkpoint_every:
+                self.checkpoint()
+            return self.index
+
+    def _read_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        if not self.snapshot_path.exists():
+            return {}
+        try:
+            return json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        """把一条日志记录应用到内存索引"""
+        op = record.get("op")
+        key = record.get("key")
+        if not key:
+            return
+        if op == "put":
+            self.index[key] = dict(record.get("fields", {}))
+        elif op == "update":
+            if key in self.index:
+                self.index[key].update(record.get("fields", {}))
+        elif op == "delete":
+            self.index.pop(key, None)
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """应用并追加一条日志记录，必要时做快照"""
+        with self._lock:
+            self._apply(record)
+            if self._file is None:
+                self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                self._drop_torn_tail()
+                self._file = open(self.journal_path, "a", encoding="utf-8")
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._pending += 1
+            if self._pending >= self.checkpoint_every:
+                self.checkpoint()
+
+    def _drop_torn_tail(self) -> None:
+        """截掉崩溃留下的半行（不以换行结尾的最后一行），否则下一条记录会接在它后面而无法解析"""
+        try:
+            f = open(self.journal_path, "rb+")
+        except FileNotFoundError:
+            return
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            pos = end
+            while pos > 0:
+                start = max(0, pos - 4096)
+                f.seek(start)
+                newline = f.read(pos - start).rfind(b"\n")
+                if newline >= 0:
+                    f.truncate(start + newline + 1)
+                    return
+                pos = start
+            f.truncate(0)
+
+    def put(self, key: str, metadata: Dict[str, Any]) -> None:
+        """写入完整的会话元数据（创建会话）"""
+        self._append({"op": "put", "key": key, "fields": metadata})
+
+    def update(self, key: str, **fields: Any) -> None:
+        """更新会话元数据的部分字段"""
+        if key not in self.index:
+            return
+        self._append({"op": "update", "key": key, "fields": fields})
+
+    def delete(self, key: str) -> None:
+        """删除会话元数据"""
+        self._append({"op": "delete", "key": key})
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """获取会话元数据"""
+        return self.index.get(key)
+
+    def checkpoint(self) -> None:
+        """把内存索引写入快照并清空日志"""
+        with self._lock:
+            tmp = self.snapshot_path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(self.index, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.snapshot_path)
+
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self.journal_path.exists():
+                self.journal_path.write_text("", encoding="utf-8")
+            self._pending = 0
+
+    def close(self) -> None:
+        """退出时做一次快照，使下次启动无需重放日志"""
+        with self._lock:
+            if self._pending:
+                self.checkpoint()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,52 @@
+"""
+io_executor.py - 会话 / 记忆 I/O 专用执行器
+
+异步调用方（AgentRunner）通过 run_io() 把同步的磁盘 I/O 交给一个单线程执行器，
+事件循环在此期间继续处理 LLM 流式输出和用户输入。
+
+只用一个工作线程：提交的读写按顺序执行，后提交的读取一定能看到之前提交的写入，
+也不会和存储层自身的锁产生竞争。
+"""
+import asyncio
+import atexit
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """获取全局 I/O 执行器（首次调用时创建，退出时等待已提交的任务完成）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-io")
+            atexit.register(shutdown_io_executor)
+        return _executor
+
+
+def shutdown_io_executor(wait: bool = True) -> None:
+    """关闭 I/O 执行器"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+async def run_io(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    在 I/O 执行器中运行同步函数并等待结果
+
+    Args:
+        fn: 同步函数
+        *args, **kwargs: 传给 fn 的参数
+
+    Returns:
+        fn 的返回值
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), functools.partial(fn, *args, **kwargs))
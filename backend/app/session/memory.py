@@ -4,15 +4,35 @@
 两层存储：
 1. 全局记忆（.memory/）- SOUL.md, IDENTITY.md, TOOLS.md, USER.md, MEMORY.md 等
 2. 会话记忆（workspace/memory/）- MEMORY.md + daily/{date}.jsonl
+   + segments/（旧日志按周 / 月合并的段，见 memory_consolidate.py）
+   检索走持久化倒排索引 workspace/memory/index/（见 memory_index.py）
 """
+import hashlib
 import json
 import math
-import re
-from datetime import datetime, timezone
+import os
+import threading
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List
-
-from .constants import MEMORY_DIR
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.app.analysis import Analyzer, get_analyzer
+
+from .constants import (
+    MEMORY_ANALYZER,
+    MEMORY_CANDIDATES,
+    MEMORY_DECAY_RATE,
+    MEMORY_DEDUP_MAX_DISTANCE,
+    MEMORY_DIR,
+    MEMORY_HOT_DAYS,
+    MEMORY_MMR_LAMBDA,
+    MEMORY_MONTHLY_DAYS,
+    MEMORY_RANKER,
+    MEMORY_VECTOR_WEIGHT,
+)
+from .memory_consolidate import consolidate
+from .memory_index import MemoryIndex
+from .memory_vectors import mmr_order
 
 # 全局记忆文件列表
 GLOBAL_MEMORY_FILES = [
@@ -28,43 +48,124 @@ GLOBAL_MEMORY_FILES = [
 
 MAX_FILE_CHARS = 20000
 
+# 记忆检索排序算法
+RANKERS = ("tfidf", "bm25")
+
+
+class _FileCache:
+    """
+    进程内共享的文件内容缓存（所有 GlobalMemoryLoader 共用）
+
+        path ──► (mtime_ns, size, inode, content, digest)
+
+    每次读取先 stat，三者都未变化时直接返回缓存；其他进程改写文件后下一次读取即可看到新内容。
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[int, int, int, str, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path) -> Optional[Tuple[str, str]]:
+        """
+        读取文件（超过 MAX_FILE_CHARS 时截断）
+
+        Returns:
+            (content, digest)；文件不存在或无法读取时返回 None
+        """
+        key = str(path)
+        try:
+            st = path.stat()
+        except OSError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[:3] == (st.st_mtime_ns, st.st_size, st.st_ino):
+                self.hits += 1
+                return cached[3], cached[4]
+            self.misses += 1
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                st = os.fstat(f.fileno())  # 以读取时的 stat 为准，读取期间的改写会在下次校验时发现
+                content = f.read()
+        except (OSError, ValueError):
+            return None
+        if len(content) > MAX_FILE_CHARS:
+            content = content[:MAX_FILE_CHARS] + f"\n\n[... truncated at {MAX_FILE_CHARS} chars ...]"
+        digest = hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+        with self._lock:
+            self._entries[key] = (st.st_mtime_ns, st.st_size, st.st_ino, content, digest)
+        return content, digest
+
+    def discard(self, path: Path) -> None:
+        with self._lock:
+            self._entries.pop(str(path), None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"files": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_FILE_CACHE = _FileCache()
+
 
 class GlobalMemoryLoader:
-    """全局记忆文件加载器"""
+    """全局记忆文件加载器（内容缓存见 _FileCache，按 mtime/size 校验）"""
 
     def __init__(self, memory_dir: Path = MEMORY_DIR):
         self.memory_dir = memory_dir
-        self._cache: Dict[str, str] = {}
 
     def load_file(self, name: str) -> str:
-        """加载单个文件（带缓存）"""
-        if name in self._cache:
-            return self._cache[name]
+        """加载单个文件（带缓存，文件被其他进程改写后自动重新读取）"""
+        loaded = _FILE_CACHE.get(self.memory_dir / name)
+        return loaded[0] if loaded else ""
 
-        path = self.memory_dir / name
-        if not path.is_file():
-            return ""
-        try:
-            content = path.read_text(encoding="utf-8")
-            if len(content) > MAX_FILE_CHARS:
-                content = content[:MAX_FILE_CHARS] + f"\n\n[... truncated at {MAX_FILE_CHARS} chars ...]"
+    def file_hash(self, name: str) -> str:
+        """单个文件内容的哈希（文件不存在时为空字符串）"""
+        loaded = _FILE_CACHE.get(self.memory_dir / name)
+        return loaded[1] if loaded else ""
 
-            self._cache[name] = content
-            return content
-        except Exception:
-            return ""
+    def content_hash(self, mode: str = "full") -> str:
+        """
+        load_all(mode) 所返回内容的哈希，只做 stat 校验，内容未变时不读文件
+
+        提示词构建方可以用它判断全局记忆是否变化，而不必比较完整内容。
+
+        Args:
+            mode: 加载模式（full/minimal/none）
+
+        Returns:
+            十六进制摘要
+        """
+        h = hashlib.blake2b(mode.encode("utf-8"), digest_size=16)
+        for name in self._names(mode):
+            loaded = _FILE_CACHE.get(self.memory_dir / name)
+            if loaded and loaded[0]:
+                h.update(f"{name}\0{loaded[1]}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    @staticmethod
+    def cache_stats() -> Dict[str, int]:
+        """进程内文件缓存统计"""
+        return _FILE_CACHE.stats()
 
     def load_soul(self) -> str:
         """加载 SOUL.md 文件"""
         return self.load_file("SOUL.md").strip()
 
     def update_file(self, name: str, content: str) -> bool:
-        """更新文件内容并清除缓存"""
+        """更新文件内容（原子替换）并清除缓存"""
         path = self.memory_dir / name
         try:
             path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(content, encoding="utf-8")
-            self._cache.pop(name, None)
+            # 先写临时文件再替换，其他进程不会读到写了一半的文件
+            tmp = path.with_name(f".{name}.{os.getpid()}.tmp")
+            tmp.write_text(content, encoding="utf-8")
+            os.replace(tmp, path)
+            _FILE_CACHE.discard(path)
             return True
         except Exception:
             return False
@@ -77,28 +178,32 @@ class GlobalMemoryLoader:
 
     def load_all(self, mode: str = "full") -> Dict[str, str]:
         """加载全局记忆文件"""
-        if mode == "none":
-            return {}
-
-        names = ["AGENTS.md", "TOOLS.md"] if mode == "minimal" else GLOBAL_MEMORY_FILES
-
         result = {}
-        for name in names:
+        for name in self._names(mode):
             content = self.load_file(name)
             if content:
                 result[name] = content
 
         return result
 
+    @staticmethod
+    def _names(mode: str) -> List[str]:
+        """加载模式对应的文件列表"""
+        if mode == "none":
+            return []
+        return ["AGENTS.md", "TOOLS.md"] if mode == "minimal" else GLOBAL_MEMORY_FILES
+
 
 class MemoryStore:
     """记忆存储管理器"""
 
-    def __init__(self, workspace_dir: Path):
+    def __init__(self, workspace_dir: Path, analyzer: Optional[Analyzer] = None):
         self.workspace_dir = workspace_dir
         self.memory_dir = workspace_dir / "memory" / "daily"
         self.memory_dir.mkdir(parents=True, exist_ok=True)
         self._evergreen_cache: str | None = None
+        self.analyzer = analyzer or get_analyzer(MEMORY_ANALYZER)
+        self.index = MemoryIndex(workspace_dir, self.analyzer, tokenizer_version=self.analyzer.version)
 
     def write_memory(self, content: str, category: str = "general") -> str:
         """写入记忆到每日日志"""
@@ -114,10 +219,34 @@ class MemoryStore:
         try:
             with open(path, "a", encoding="utf-8") as f:
                 f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            # 增量索引刚追加的一行
+            self.index.sync_source(f"daily/{path.name}")
             return f"Memory saved to {today}.jsonl"
         except Exception as exc:
             return f"Error: {exc}"
 
+    def find_duplicate(self, content: str,
+                       max_distance: int = MEMORY_DEDUP_MAX_DISTANCE) -> Optional[Dict[str, Any]]:
+        """
+        查找与 content 近乎相同的已有记忆（SimHash + LSH 找候选，原文确认，见 dedup.py）
+
+        Args:
+            content: 待写入的记忆
+            max_distance: 最大汉明距离
+
+        Returns:
+            {"path", "text", "distance"}；没有近似重复时返回 None
+        """
+        hit = self.index.find_near_duplicate(content, max_distance)
+        if hit is None:
+            return None
+        chunk = self.index.chunks[hit[0]]
+        return {"path": chunk["path"], "text": chunk["text"], "distance": hit[1]}
+
+    def invalidate_cache(self) -> None:
+        """清除 MEMORY.md 缓存（检索索引自行按 mtime/size 校验）"""
+        self._evergreen_cache = None
+
     def load_evergreen(self) -> str:
         """加载长期记忆（MEMORY.md）带缓存"""
         if self._evergreen_cache is not None:
@@ -135,116 +264,130 @@ class MemoryStore:
             self._evergreen_cache = ""
             return ""
 
-    def _load_chunks(self) -> List[Dict[str, str]]:
-        """加载所有记忆块"""
-        chunks = []
+    def _tokenize(self, text: str) -> List[str]:
+        """分词（见 backend.app.analysis，中文切成字符二元组）"""
+        return self.analyzer(text)
 
-        # 加载 MEMORY.md
-        evergreen = self.load_evergreen()
-        if evergreen:
-            for para in evergreen.split("\n\n"):
-                para = para.strip()
-                if para:
-                    chunks.append({"path": "MEMORY.md", "text": para})
-
-        # 加载每日记忆
-        if self.memory_dir.is_dir():
-            for jf in sorted(self.memory_dir.glob("*.jsonl")):
-                try:
-                    for line in jf.read_text(encoding="utf-8").splitlines():
-                        line = line.strip()
-                        if not line:
-                            continue
-                        entry = json.loads(line)
-                        text = entry.get("content", "")
-                        if text:
-                            cat = entry.get("category", "")
-                            label = f"{jf.name}[{cat}]" if cat else jf.name
-                            chunks.append({"path": label, "text": text})
-                except Exception:
-                    continue
-
-        return chunks
+    def search_memory(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """TF-IDF 搜索（基于持久化倒排索引，源文件变化时自动增量更新或重建）"""
+        return self.keyword_search(query, top_k, "tfidf")
 
-    @staticmethod
-    def _tokenize(text: str) -> List[str]:
-        """分词"""
-        tokens = re.findall(r"[a-z0-9\u4e00-\u9fff]+", text.lower())
-        return [t for t in tokens if len(t) > 1 or "\u4e00" <= t <= "\u9fff"]
+    def keyword_search(self, query: str, top_k: int = 5, ranker: str = MEMORY_RANKER) -> List[Dict[str, Any]]:
+        """
+        关键词检索（只走倒排索引）
 
-    def search_memory(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        """TF-IDF 搜索"""
-        chunks = self._load_chunks()
-        if not chunks:
-            return []
+        Args:
+            query: 搜索查询
+            top_k: 返回结果数量
+            ranker: 排序算法（tfidf / bm25）
 
-        query_tokens = self._tokenize(query)
+        Returns:
+            搜索结果列表
+        """
+        query_tokens = self._query_tokens(query, ranker)
         if not query_tokens:
             return []
+        self.index.ensure_fresh()
+        return [self._format(cid, score) for cid, score in self._keyword_hits(query_tokens, top_k, ranker)]
 
-        chunk_tokens = [self._tokenize(c["text"]) for c in chunks]
-
-        # 计算 IDF
-        df: Dict[str, int] = {}
-        for tokens in chunk_tokens:
-            for t in set(tokens):
-                df[t] = df.get(t, 0) + 1
-
-        n = len(chunks)
-
-        def tfidf(tokens: List[str]) -> Dict[str, float]:
-            tf: Dict[str, int] = {}
-            for t in tokens:
-                tf[t] = tf.get(t, 0) + 1
-            return {
-                t: c * (math.log((n + 1) / (df.get(t, 0) + 1)) + 1)
-                for t, c in tf.items()
-            }
-
-        def cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
-            common = set(a) & set(b)
-            if not common:
-                return 0.0
-            dot = sum(a[k] * b[k] for k in common)
-            na = math.sqrt(sum(v * v for v in a.values()))
-            nb = math.sqrt(sum(v * v for v in b.values()))
-            return dot / (na * nb) if na and nb else 0.0
-
-        qvec = tfidf(query_tokens)
-        scored = []
-
-        for i, tokens in enumerate(chunk_tokens):
-            if not tokens:
-                continue
-            score = cosine(qvec, tfidf(tokens))
-            if score > 0.0:
-                snippet = chunks[i]["text"]
-                if len(snippet) > 200:
-                    snippet = snippet[:200] + "..."
-                scored.append({
-                    "path": chunks[i]["path"],
-                    "score": round(score, 4),
-                    "snippet": snippet
-                })
-
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        return scored[:top_k]
-
-    def hybrid_search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def hybrid_search(self, query: str, top_k: int = 5, ranker: str = MEMORY_RANKER) -> List[Dict[str, Any]]:
         """
-        混合搜索：结合 evergreen 和 daily 记忆
+        混合搜索：关键词 + 哈希向量两路召回，按时间衰减后用 MMR 去重
+
+        1. 关键词（ranker）和向量（一次矩阵-向量乘积）各取 MEMORY_CANDIDATES 个候选
+        2. 按块合并：score = w * vector + (1 - w) * keyword（关键词分数按本路最高分归一化）
+        3. 每日日志按文件名中的日期衰减：score *= exp(-MEMORY_DECAY_RATE * age_days)
+        4. MMR 重排候选集，压低彼此相似的块
 
         Args:
             query: 搜索查询
             top_k: 返回结果数量
+            ranker: 关键词排序算法（tfidf / bm25）
 
         Returns:
             搜索结果列表
         """
-        return self.search_memory(query, top_k)
+        query_tokens = self._query_tokens(query, ranker)
+        if not query_tokens:
+            return []
+        self.index.ensure_fresh()
+
+        n = max(top_k, MEMORY_CANDIDATES)
+        keyword = self._keyword_hits(query_tokens, n, ranker)
+        vector = self.index.search_vector(query_tokens, n)
+
+        merged: Dict[int, float] = {}
+        top_keyword = keyword[0][1] if keyword else 0.0
+        for cid, score in keyword:
+            merged[cid] = (1 - MEMORY_VECTOR_WEIGHT) * score / top_keyword
+        for cid, score in vector:
+            merged[cid] = merged.get(cid, 0.0) + MEMORY_VECTOR_WEIGHT * score
+        if not merged:
+            return []
+
+        today = datetime.now(timezone.utc).date()
+        ids = sorted(merged)
+        relevance = []
+        for cid in ids:
+            day = self._chunk_date(self.index.chunks[cid]["path"])
+            age = max(0, (today - day).days) if day else 0
+            relevance.append(merged[cid] * math.exp(-MEMORY_DECAY_RATE * age))
+
+        order = mmr_order(relevance, self.index.vectors.similarity(ids), MEMORY_MMR_LAMBDA)
+        return [self._format(ids[i], relevance[i]) for i in order[:top_k]]
+
+    def _query_tokens(self, query: str, ranker: str) -> List[str]:
+        if ranker not in RANKERS:
+            raise ValueError(f"Unknown ranker: {ranker} (expected one of {RANKERS})")
+        return self._tokenize(query)
+
+    def _keyword_hits(self, query_tokens: List[str], top_k: int, ranker: str):
+        if ranker == "bm25":
+            return self.index.search_bm25(query_tokens, top_k)
+        return self.index.search_tfidf(query_tokens, top_k)
+
+    @staticmethod
+    def _chunk_date(label: str) -> Optional[date]:
+        """块的日期（标签 2024-01-01.jsonl[category]，合并段中的条目也保留原日志名）；MEMORY.md 返回 None"""
+        name, sep, _ = label.partition(".jsonl")
+        if not sep:
+            return None
+        try:
+            return date.fromisoformat(name)
+        except ValueError:
+            return None
+
+    def _format(self, chunk_id: int, score: float) -> Dict[str, Any]:
+        chunk = self.index.chunks[chunk_id]
+        snippet = chunk["text"]
+        if len(snippet) > 200:
+            snippet = snippet[:200] + "..."
+        return {
+            "path": chunk["path"],
+            "score": round(score, 4),
+            "snippet": snippet
+        }
+
+    def consolidate(self, hot_days: int = MEMORY_HOT_DAYS,
+                    monthly_days: int = MEMORY_MONTHLY_DAYS) -> Dict[str, int]:
+        """
+        把旧的每日日志合并为周段 / 月段并丢弃废弃条目（见 memory_consolidate.py），之后重建检索索引
+
+        Args:
+            hot_days: 保留为每日日志的天数
+            monthly_days: 超过多少天的条目合并为月段
+
+        Returns:
+            合并报告
+        """
+        report = consolidate(self.workspace_dir, self.analyzer, self.index.tokenizer_version,
+                             hot_days, monthly_days)
+        if report["daily_files"] or report["segments_written"]:
+            self.index.rebuild()
+        return report
 
     def get_stats(self) -> Dict[str, Any]:
-        """获取统计信息"""
+        """获取统计信息（热日志逐行计数，合并段读取 manifest 中的条目数）"""
         evergreen = self.load_evergreen()
         daily_files = list(self.memory_dir.glob("*.jsonl")) if self.memory_dir.is_dir() else []
 
@@ -255,8 +398,18 @@ class MemoryStore:
             except Exception:
                 pass
 
+        segments: Dict[str, Any] = {}
+        manifest = self.workspace_dir / "memory" / "segments" / "manifest.json"
+        if manifest.is_file():
+            try:
+                segments = json.loads(manifest.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                segments = {}
+
         return {
             "evergreen_chars": len(evergreen),
             "daily_files": len(daily_files),
             "daily_entries": total_entries,
+            "segments": len(segments),
+            "segment_entries": sum(seg.get("entries", 0) for seg in segments.values()),
         }
@@ -0,0 +1,209 @@
+"""
+memory_consolidate.py - 每日记忆日志的分层合并
+
+    workspace/memory/
+    ├── daily/2024-03-10.jsonl        # 热：最近 MEMORY_HOT_DAYS 天，按天追加
+    └── segments/
+        ├── 2024-W09.jsonl            # 温：超过 MEMORY_HOT_DAYS 天的日志按 ISO 周合并
+        ├── 2024-01.jsonl             # 冷：超过 MEMORY_MONTHLY_DAYS 天的条目按月合并
+        └── manifest.json             # 段文件 -> {"entries", "days", "sources"}
+
+段文件每行保留原条目（ts / category / content），另加：
+- day:        原每日日志的日期（检索结果的路径和时间衰减仍按天计算）
+- tf / len:   预先计算的词频和词数，tokenizer 与索引一致时重建索引不再分词
+
+合并时丢弃被 memory_deprecate 标记为废弃的条目（"[DEPRECATED] 原内容\\nReason: ..."）
+以及已经合并的废弃标记本身。只丢弃归一化后与原内容完全相同的条目：源文件合并后即被删除，
+"10.0.0.1" 的废弃标记不能连带丢掉更正后的 "10.0.0.2"。
+
+段文件先写临时文件再替换，之后才写 manifest、删除源文件。中途崩溃时：
+manifest 已记录的日志直接删除；尚未记录的日志会再合并一次，写段时按
+(day, ts, content) 去重，所以重复执行总能收敛。
+"""
+import json
+import os
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from backend.app.analysis import Analyzer
+
+from .constants import MEMORY_HOT_DAYS, MEMORY_MONTHLY_DAYS
+from .dedup import normalize_text
+
+DEPRECATED_PREFIX = "[DEPRECATED] "
+
+
+def _parse_day(name: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(name)
+    except ValueError:
+        return None
+
+
+def _read_entries(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict) and entry.get("content"):
+                yield entry
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _week_end(stem: str) -> Optional[date]:
+    """周段（2024-W09）的最后一天；不是周段时返回 None"""
+    year, sep, week = stem.partition("-W")
+    try:
+        return date.fromisocalendar(int(year), int(week), 7) if sep else None
+    except ValueError:
+        return None
+
+
+def segment_name(day: date, today: date, monthly_days: int = MEMORY_MONTHLY_DAYS) -> str:
+    """条目所属的段：超过 monthly_days 天的按月（2024-01），否则按 ISO 周（2024-W09）"""
+    if (today - day).days > monthly_days:
+        return f"{day.year:04d}-{day.month:02d}"
+    year, week, _ = day.isocalendar()
+    return f"{year:04d}-W{week:02d}"
+
+
+class _Deprecations:
+    """memory_deprecate 写入的废弃标记（"[DEPRECATED] 原内容\nReason: ..."）"""
+
+    def __init__(self):
+        self._targets: Set[str] = set()
+
+    def add(self, content: str) -> None:
+        target = normalize_text(content[len(DEPRECATED_PREFIX):].split("\nReason:", 1)[0])
+        if target:
+            self._targets.add(target)
+
+    def matches(self, content: str) -> bool:
+        """条目内容归一化后与某个废弃目标完全相同（合并后源文件会被删除，不能按子串或签名距离模糊匹配）"""
+        return bool(self._targets) and normalize_text(content) in self._targets
+
+
+def consolidate(workspace_dir: Path, analyzer: Analyzer, tokenizer: str,
+                hot_days: int = MEMORY_HOT_DAYS, monthly_days: int = MEMORY_MONTHLY_DAYS,
+                today: Optional[date] = None) -> Dict[str, int]:
+    """
+    把超过 hot_days 天的每日日志合并到周段，把超过 monthly_days 天的周段合并到月段
+
+    Args:
+        workspace_dir: 会话 workspace 目录
+        analyzer: 预先计算词频用的分析器
+        tokenizer: 分析器版本（与记忆索引的 tokenizer_version 一致）
+        hot_days: 保留为每日日志的天数
+        monthly_days: 超过多少天的条目合并为月段
+        today: 当前日期（默认 UTC 今天）
+
+    Returns:
+        {"daily_files", "segments_written", "segments_removed", "entries", "dropped", "bytes_before", "bytes_after"}
+    """
+    today = today or datetime.now(timezone.utc).date()
+    daily_dir = workspace_dir / "memory" / "daily"
+    segments_dir = workspace_dir / "memory" / "segments"
+    manifest_path = segments_dir / "manifest.json"
+    report = {"daily_files": 0, "segments_written": 0, "segments_removed": 0,
+              "entries": 0, "dropped": 0, "bytes_before": 0, "bytes_after": 0}
+
+    manifest: Dict[str, Dict[str, Any]] = {}
+    if manifest_path.exists():
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            manifest = {}
+    merged_sources = {src for seg in manifest.values() for src in seg.get("sources", [])}
+
+    # 1. 待合并的源：过期的每日日志 + 全部条目都已超过 monthly_days 天的周段
+    sources: List[Path] = []
+    leftovers: List[Path] = []  # 已经合并过、崩溃后残留的每日日志
+    daily_files = sorted(daily_dir.glob("*.jsonl")) if daily_dir.is_dir() else []
+    for path in daily_files:
+        day = _parse_day(path.stem)
+        if day is None or (today - day).days <= hot_days:
+            continue
+        (leftovers if path.name in merged_sources else sources).append(path)
+    segment_files = sorted(segments_dir.glob("*.jsonl")) if segments_dir.is_dir() else []
+    for path in segment_files:
+        newest = _week_end(path.stem)
+        if newest is not None and (today - newest).days > monthly_days:
+            sources.append(path)
+
+    for path in leftovers:
+        path.unlink()
+    if not sources:
+        return report
+
+    # 2. 废弃标记来自所有记忆（热日志中的标记也能让冷条目失效）
+    deprecations = _Deprecations()
+    for path in daily_files + segment_files:
+        if path.exists():
+            for entry in _read_entries(path):
+                if entry["content"].startswith(DEPRECATED_PREFIX):
+                    deprecations.add(entry["content"])
+
+    # 3. 按目标段分组
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    consumed = {p.name for p in sources if p.parent == segments_dir}
+    for path in sources:
+        report["bytes_before"] += path.stat().st_size
+        is_daily = path.parent == daily_dir
+        for entry in _read_entries(path):
+            day = entry.get("day") or path.stem
+            content = entry["content"]
+            if content.startswith(DEPRECATED_PREFIX) or deprecations.matches(content):
+                report["dropped"] += 1
+                continue
+            if "tf" not in entry or entry.get("tokenizer") != tokenizer:
+                tokens = analyzer(content)
+                tf: Dict[str, int] = {}
+                for t in tokens:
+                    tf[t] = tf.get(t, 0) + 1
+                entry.update({"tf": tf, "len": len(tokens), "tokenizer": tokenizer})
+            entry["day"] = day
+            target = segment_name(_parse_day(day) or today, today, monthly_days)
+            groups.setdefault(target, []).append(entry)
+        if is_daily:
+            report["daily_files"] += 1
+
+    # 4. 写入目标段（与已有段合并，按日期和时间排序）
+    segments_dir.mkdir(parents=True, exist_ok=True)
+    for name, entries in sorted(groups.items()):
+        seg_file = f"{name}.jsonl"
+        path = segments_dir / seg_file
+        info = manifest.get(seg_file, {"sources": []})
+        if path.exists() and seg_file not in consumed:
+            report["bytes_before"] += path.stat().st_size
+            entries = list(_read_entries(path)) + entries
+        unique = {(e["day"], e.get("ts", ""), e["content"]): e for e in entries}
+        entries = [unique[k] for k in sorted(unique)]
+        _write_atomic(path, "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+        report["bytes_after"] += path.stat().st_size
+        report["segments_written"] += 1
+        report["entries"] += len(entries)
+        manifest[seg_file] = {
+            "entries": len(entries),
+            "days": sorted({e["day"] for e in entries}),
+            "sources": sorted(set(info["sources"]) | {p.name for p in sources if p.parent == daily_dir}),
+        }
+
+    # 5. 先写 manifest，再删除已合并的源
+    for name in consumed - {f"{n}.jsonl" for n in groups}:
+        manifest.pop(name, None)
+        report["segments_removed"] += 1
+    _write_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2))
+    for path in sources:
+        if path.parent == daily_dir or path.name not in {f"{n}.jsonl" for n in groups}:
+            path.unlink(missing_ok=True)
+    return report
@@ -0,0 +1,492 @@
+"""
+memory_index.py - 会话记忆倒排索引
+
+索引文件位于 workspace/memory/index/：
+
+    manifest.json    # 格式版本、分词器版本、已索引源文件的 mtime/size、postings 覆盖的块数
+    chunks.jsonl     # 块表（追加写入）：{"id", "path", "text", "tf", "len", "src", "end"}
+    postings.json    # 基础倒排表：term -> [[chunk_id, tf], ...]
+    vectors.f32      # 每个块的哈希特征向量（见 memory_vectors.py，与块表同步追加）
+
+write_memory 只索引刚追加的新行：向 chunks.jsonl 追加块并更新 manifest；加载时用 postings.json
+加上 chunks.jsonl 中尚未合并的尾部（增量）还原内存索引，增量累积到阈值后重写 postings.json。
+
+源文件（MEMORY.md、daily/*.jsonl、segments/*.jsonl）在索引之外被修改时：
+- daily 文件只是变长（其他进程追加）：只索引新增的尾部
+- 其他变化（内容被改写、文件删除、MEMORY.md 或合并段变化）：整体重建
+
+合并段（见 memory_consolidate.py）带有预先计算的词频，tokenizer 一致时重建不再分词。
+
+查询只访问查询词的 postings 和命中块的词频，耗时取决于查询词而不是语料大小。
+"""
+import heapq
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .constants import BM25_B, BM25_K1, MEMORY_INDEX_COMPACT_EVERY, MEMORY_VECTOR_DIM
+from .dedup import SimHashLSH, is_near_exact, text_signature
+from .memory_vectors import VectorStore, hash_vector
+
+INDEX_FORMAT = 1
+
+Tokenizer = Callable[[str], List[str]]
+
+
+class MemoryIndex:
+    """
+    会话记忆的持久化倒排索引
+
+    Usage:
+        index = MemoryIndex(workspace_dir, tokenize)
+        index.sync_source("daily/2024-01-01.jsonl")   # 追加写入后
+        results = index.search_tfidf(query_tokens, top_k=5)
+    """
+
+    def __init__(self, workspace_dir: Path, tokenize: Tokenizer, tokenizer_version: str = "1",
+                 compact_every: int = MEMORY_INDEX_COMPACT_EVERY, vector_dim: int = MEMORY_VECTOR_DIM):
+        self.workspace_dir = workspace_dir
+        self.daily_dir = workspace_dir / "memory" / "daily"
+        self.segments_dir = workspace_dir / "memory" / "segments"
+        self.index_dir = workspace_dir / "memory" / "index"
+        self.tokenize = tokenize
+        self.tokenizer_version = tokenizer_version
+        self.compact_every = compact_every
+
+        self.chunks: List[Dict[str, Any]] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.files: Dict[str, Dict[str, int]] = {}  # 源文件 -> {"mtime_ns", "size"}
+        self._base_count = 0  # postings.json 覆盖的块数
+        self._total_len = 0  # 所有块的词数之和（BM25 平均长度）
+        self._norms: Dict[int, float] = {}  # 块向量模长缓存（语料变化时清空）
+        self.vectors = VectorStore(self.index_dir, vector_dim)
+        self._loaded = False
+        self._lock = threading.RLock()
+        # 块表每次变化（加载、追加、重建）都加一，调用方据此判断缓存的检索结果是否过期
+        self.generation = 0
+        # 近似重复检测：由块原文的 shingle 签名增量构建，重建索引（epoch 变化）后从头构建
+        self.epoch = 0
+        self._lsh = SimHashLSH(bits=vector_dim)
+        self._lsh_rows = 0
+        self._lsh_epoch = 0
+
+    # ========== 路径 ==========
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.index_dir / "manifest.json"
+
+    @property
+    def chunks_path(self) -> Path:
+        return self.index_dir / "chunks.jsonl"
+
+    @property
+    def postings_path(self) -> Path:
+        return self.index_dir / "postings.json"
+
+    def _source_path(self, rel: str) -> Path:
+        if rel == "MEMORY.md":
+            return self.workspace_dir / rel
+        kind, name = rel.split("/", 1)
+        return (self.segments_dir if kind == "segments" else self.daily_dir) / name
+
+    def _current_sources(self) -> Dict[str, Path]:
+        """当前磁盘上的所有源文件（相对名 -> 路径）"""
+        sources = {}
+        evergreen = self.workspace_dir / "MEMORY.md"
+        if evergreen.is_file():
+            sources["MEMORY.md"] = evergreen
+        if self.segments_dir.is_dir():
+            for jf in sorted(self.segments_dir.glob("*.jsonl")):
+                sources[f"segments/{jf.name}"] = jf
+        if self.daily_dir.is_dir():
+            for jf in sorted(self.daily_dir.glob("*.jsonl")):
+                sources[f"daily/{jf.name}"] = jf
+        return sources
+
+    @staticmethod
+    def _stat(path: Path) -> Dict[str, int]:
+        st = path.stat()
+        return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+    # ========== 加载 / 校验 ==========
+
+    def ensure_fresh(self) -> None:
+        """首次使用时加载索引，之后每次查询前按 mtime/size 校验源文件"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+            self._refresh()
+
+    def _load(self) -> None:
+        """读取 manifest + postings + 块表；格式不符或文件损坏时重建"""
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            if (manifest.get("format") != INDEX_FORMAT
+                    or manifest.get("tokenizer") != self.tokenizer_version
+                    or manifest.get("vector_dim") != self.vectors.dim):
+                raise ValueError("index format changed")
+            self.files = manifest.get("files", {})
+            self._base_count = manifest.get("base_count", 0)
+
+            raw = json.loads(self.postings_path.read_text(encoding="utf-8")) if self._base_count else {}
+            self.postings = {t: {cid: tf for cid, tf in plist} for t, plist in raw.items()}
+
+            self.chunks = []
+            self._total_len = 0
+            with open(self.chunks_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        chunk = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 崩溃时可能留下半行
+                    if chunk["id"] != len(self.chunks):
+                        raise ValueError("chunk table out of order")
+                    self.chunks.append(chunk)
+                    self._total_len += chunk["len"]
+            if len(self.chunks) < self._base_count:
+                raise ValueError("chunk table shorter than postings")
+
+            # 合并 postings.json 之后追加的增量块
+            for chunk in self.chunks[self._base_count:]:
+                self._post(chunk)
+                src, end = chunk.get("src"), chunk.get("end")
+                if src in self.files and end is not None:
+                    # manifest 可能落后于块表（写 manifest 前崩溃）
+                    self.files[src]["size"] = max(self.files[src]["size"], end)
+
+            # 向量文件落后于块表（追加向量前崩溃）时按词频补算
+            for chunk in self.chunks[self.vectors.load(len(self.chunks)):]:
+                self.vectors.add(hash_vector(chunk["tf"], self.vectors.dim))
+            self.vectors.flush()
+        except (OSError, ValueError, KeyError, TypeError):
+            self.rebuild()
+
+    def _refresh(self) -> None:
+        """比较源文件的 mtime/size 与 manifest，增量索引追加的尾部或整体重建"""
+        sources = self._current_sources()
+        if set(self.files) - set(sources):
+            self.rebuild()  # 源文件被删除
+            return
+
+        tails: List[Tuple[str, Path, int]] = []
+        for rel, path in sources.items():
+            stat = self._stat(path)
+            known = self.files.get(rel)
+            if known == stat:
+                continue
+            if not rel.startswith("daily/"):
+                self.rebuild()  # MEMORY.md 或合并段被改写
+                return
+            known_size = known["size"] if known else 0
+            if stat["size"] <= known_size:
+                self.rebuild()  # 内容被改写或截断
+                return
+            tails.append((rel, path, known_size))
+
+        for rel, path, start in tails:
+            self._index_tail(rel, path, start)
+        if tails:
+            self._save_manifest()
+
+    def rebuild(self) -> None:
+        """从源文件全量重建索引"""
+        with self._lock:
+            self.generation += 1
+            self.epoch += 1
+            self.chunks = []
+            self.postings = {}
+            self._norms = {}
+            self._total_len = 0
+            self.files = {}
+            self.vectors.reset()
+            for rel, path in self._current_sources().items():
+                if rel == "MEMORY.md":
+                    text = path.read_text(encoding="utf-8").strip()
+                    for para in text.split("\n\n"):
+                        para = para.strip()
+                        if para:
+                            self._add(rel, para, rel, None)
+                    self.files[rel] = self._stat(path)
+                else:
+                    self._index_tail(rel, path, 0, persist=False)
+            self.compact()
+            self._loaded = True
+
+    def _index_tail(self, rel: str, path: Path, start: int, persist: bool = True) -> None:
+        """
+        索引每日日志从 start 开始的新行，并记录已索引到的位置
+
+        末尾未写完的半行不计入已索引大小，下次校验时继续索引。
+        """
+        indexed = start
+        for label, text, end, tf in self._read_daily(path, start, self.tokenizer_version):
+            if text:
+                if persist:
+                    self._append_chunk(label, text, rel, end, tf)
+                else:
+                    self._add(label, text, rel, end, tf)
+            indexed = end
+        self.files[rel] = {"mtime_ns": path.stat().st_mtime_ns, "size": indexed}
+
+    @staticmethod
+    def _read_daily(path: Path, start: int,
+                    tokenizer: Optional[str] = None) -> Iterator[Tuple[str, str, int, Optional[Dict[str, int]]]]:
+        """
+        从字节偏移 start 开始读取每日日志或合并段
+
+        Args:
+            path: 源文件
+            start: 起始字节偏移
+            tokenizer: 当前分词器版本（合并段中的预计算词频与之一致时直接使用）
+
+        Returns:
+            (标签, 内容, 行尾偏移, 预计算词频或 None) 迭代器；没有内容的完整行产出空内容
+        """
+        offset = start
+        with open(path, "rb") as f:
+            f.seek(start)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # 正在写入的半行
+                offset += len(raw)
+                try:
+                    entry = json.loads(raw) if raw.strip() else {}
+                except json.JSONDecodeError:
+                    entry = {}
+                text = entry.get("content", "") if isinstance(entry, dict) else ""
+                cat = entry.get("category", "") if text else ""
+                # 合并段的条目仍以原每日日志命名
+                name = f"{entry['day']}.jsonl" if text and entry.get("day") else path.name
+                label = f"{name}[{cat}]" if cat else name
+                tf = entry.get("tf") if text and tokenizer and entry.get("tokenizer") == tokenizer else None
+                yield label, text, offset, tf
+
+    # ========== 写入 ==========
+
+    def _add(self, label: str, text: str, src: str, end: Optional[int],
+             tf: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """把一个块加入内存索引（不写盘）；tf 为预计算的词频时不再分词"""
+        if tf is None:
+            tf = {}
+            for t in self.tokenize(text):
+                tf[t] = tf.get(t, 0) + 1
+        chunk = {"id": len(self.chunks), "path": label, "text": text, "tf": tf,
+                 "len": sum(tf.values()), "src": src, "end": end}
+        self.chunks.append(chunk)
+        self._total_len += chunk["len"]
+        self._post(chunk)
+        self.vectors.add(hash_vector(tf, self.vectors.dim))
+        return chunk
+
+    def _post(self, chunk: Dict[str, Any]) -> None:
+        for t, c in chunk["tf"].items():
+            self.postings.setdefault(t, {})[chunk["id"]] = c
+        self._norms.clear()
+        self.generation += 1
+
+    def _append_chunk(self, label: str, text: str, src: str, end: Optional[int],
+                      tf: Optional[Dict[str, int]] = None) -> None:
+        """加入内存索引并追加到块表，增量达到阈值时合并到 postings.json"""
+        chunk = self._add(label, text, src, end, tf)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.chunks_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+        self.vectors.flush()  # 先写块再写向量：崩溃时向量只会少不会多
+        if len(self.chunks) - self._base_count >= self.compact_every:
+            self.compact()
+
+    def sync_source(self, src: str) -> None:
+        """
+        增量索引某个源文件新追加的内容（write_memory 追加一行后调用）
+
+        Args:
+            src: 源文件相对名（daily/{date}.jsonl）
+        """
+        with self._lock:
+            if not self._loaded:
+                self.ensure_fresh()  # 加载时已经校验并索引了所有源文件
+                return
+            path = self._source_path(src)
+            if not path.exists():
+                return
+            start = self.files.get(src, {}).get("size", 0)
+            if path.stat().st_size < start:
+                self.rebuild()
+                return
+            self._index_tail(src, path, start)
+            self._save_manifest()
+
+    def compact(self) -> None:
+        """重写 postings.json、块表和向量文件，清空增量"""
+        with self._lock:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self._write_atomic(self.chunks_path, "".join(
+                json.dumps(c, ensure_ascii=False) + "\n" for c in self.chunks
+            ))
+            self._write_atomic(self.postings_path, json.dumps(
+                {t: sorted(plist.items()) for t, plist in self.postings.items()}, ensure_ascii=False
+            ))
+            self.vectors.rewrite()
+            self._base_count = len(self.chunks)
+            self._save_manifest()
+
+    def _save_manifest(self) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._write_atomic(self.manifest_path, json.dumps({
+            "format": INDEX_FORMAT,
+            "tokenizer": self.tokenizer_version,
+            "vector_dim": self.vectors.dim,
+            "base_count": self._base_count,
+            "files": self.files,
+        }, ensure_ascii=False))
+
+    @staticmethod
+    def _write_atomic(path: Path, content: str) -> None:
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(content, encoding="utf-8")
+        os.replace(tmp, path)
+
+    # ========== 查询 ==========
+
+    def idf(self, term: str) -> float:
+        """平滑 IDF：log((N + 1) / (df + 1)) + 1"""
+        return math.log((len(self.chunks) + 1) / (len(self.postings.get(term, ())) + 1)) + 1
+
+    def _norm(self, chunk_id: int) -> float:
+        norm = self._norms.get(chunk_id)
+        if norm is None:
+            tf = self.chunks[chunk_id]["tf"]
+            norm = math.sqrt(sum((c * self.idf(t)) ** 2 for t, c in tf.items()))
+            self._norms[chunk_id] = norm
+        return norm
+
+    def search_tfidf(self, query_tokens: List[str], top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        TF-IDF 余弦相似度检索（只遍历查询词的 postings）
+
+        Returns:
+            [(chunk_id, score), ...]，按分数降序
+        """
+        with self._lock:
+            qtf: Dict[str, int] = {}
+            for t in query_tokens:
+                qtf[t] = qtf.get(t, 0) + 1
+            qvec = {t: c * self.idf(t) for t, c in qtf.items()}
+            qnorm = math.sqrt(sum(v * v for v in qvec.values()))
+            if not qnorm:
+                return []
+
+            dots: Dict[int, float] = {}
+            for t, qw in qvec.items():
+                idf = self.idf(t)
+                for cid, c in self.postings.get(t, {}).items():
+                    dots[cid] = dots.get(cid, 0.0) + qw * c * idf
+
+            scored = []
+            for cid in sorted(dots):
+                norm = self._norm(cid)
+                score = dots[cid] / (qnorm * norm) if norm else 0.0
+                if score > 0.0:
+                    scored.append((cid, score))
+            scored.sort(key=lambda x: x[1], reverse=True)
+            return scored[:top_k]
+
+    def search_bm25(self, query_tokens: List[str], top_k: int = 5,
+                    k1: float = BM25_K1, b: float = BM25_B) -> List[Tuple[int, float]]:
+        """
+        BM25 检索：逐词累加 postings 上的得分，用大小为 top_k 的堆选出结果
+
+        块长度在写入索引时已经记录，平均长度由累计词数得到，查询时不再遍历块内容。
+
+        Args:
+            query_tokens: 查询词
+            top_k: 返回结果数量
+            k1: 词频饱和参数
+            b: 长度归一化参数
+
+        Returns:
+            [(chunk_id, score), ...]，按分数降序
+        """
+        with self._lock:
+            n = len(self.chunks)
+            if not n:
+                return []
+            avg_len = (self._total_len / n) or 1.0
+            chunks = self.chunks
+
+            scores: Dict[int, float] = {}
+            for t in set(query_tokens):
+                plist = self.postings.get(t)
+                if not plist:
+                    continue
+                df = len(plist)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                for cid, tf in plist.items():
+                    norm = k1 * (1 - b + b * chunks[cid]["len"] / avg_len)
+                    scores[cid] = scores.get(cid, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+            # 分数相同时按块顺序（写入顺序）靠前者优先
+            top = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+            return [(cid, score) for cid, score in top if score > 0.0]
+
+    def search_vector(self, query_tokens: List[str], top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        哈希向量检索：查询向量与全部块向量做一次矩阵-向量乘积
+
+        Returns:
+            [(chunk_id, cosine), ...]，按分数降序
+        """
+        with self._lock:
+            qtf: Dict[str, int] = {}
+            for t in query_tokens:
+                qtf[t] = qtf.get(t, 0) + 1
+            if not qtf:
+                return []
+            return self.vectors.top(hash_vector(qtf, self.vectors.dim), top_k)
+
+    def find_near_duplicate(self, text: str, max_distance: int) -> Optional[Tuple[int, int]]:
+        """
+        查找与给定文本近乎相同的块：SimHash 签名（见 dedup.text_signature）找候选，再比较原文确认
+
+        Args:
+            text: 新文本
+            max_distance: 最大汉明距离
+
+        Returns:
+            (chunk_id, distance)；没有近似重复时返回 None
+        """
+        with self._lock:
+            if not self._loaded:
+                self.ensure_fresh()  # 之后只依赖 sync_source 增量更新，写入前的检查不再逐个 stat 源文件
+            if self._lsh_epoch != self.epoch:
+                self._lsh.clear()
+                self._lsh_rows = 0
+                self._lsh_epoch = self.epoch
+            for row in range(self._lsh_rows, len(self.chunks)):
+                sig = text_signature(self.chunks[row]["text"], self.vectors.dim)
+                if sig is not None:
+                    self._lsh.add(row, sig)
+            self._lsh_rows = len(self.chunks)
+
+            sig = text_signature(text, self.vectors.dim)
+            if sig is None:
+                return None
+            for row, distance in self._lsh.candidates(sig, max_distance):
+                if is_near_exact(text, self.chunks[row]["text"]):
+                    return row, distance
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        """索引规模（块数、词项数、未合并的增量块数）"""
+        return {
+            "chunks": len(self.chunks),
+            "terms": len(self.postings),
+            "delta": len(self.chunks) - self._base_count,
+        }
@@ -0,0 +1,213 @@
+"""
+memory_vectors.py - 记忆块的哈希特征向量
+
+参考 s06_intelligence.py 的 _hash_vector：每个词哈希成 dim 位，每一位映射为 ±1，
+块向量 = 各词向量按词频求和后归一化。不需要外部 embedding API。
+
+    workspace/memory/index/vectors.f32   # N × dim 的 float32 矩阵（行号 = chunk id，追加写入）
+
+查询时用一次矩阵-向量乘积得到所有块的余弦相似度，MMR 用候选集的相似度矩阵去重。
+安装了 NumPy 时使用向量化实现，否则退回纯 Python（文件格式相同）。
+
+注意：哈希使用 blake2b 而不是内置 hash()，后者按进程加盐，持久化的向量在重启后会失效。
+"""
+import hashlib
+import math
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖：退回纯 Python 实现
+    np = None
+
+ITEM_SIZE = 4  # float32
+
+
+@lru_cache(maxsize=65536)
+def _token_bits(token: str, dim: int) -> Tuple[float, ...]:
+    """词的 ±1 特征（blake2b 摘要的前 dim 位）"""
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=max(1, (dim + 7) // 8)).digest()
+    value = int.from_bytes(digest, "little")
+    return tuple(1.0 if (value >> i) & 1 else -1.0 for i in range(dim))
+
+
+@lru_cache(maxsize=65536)
+def _token_array(token: str, dim: int):
+    return np.asarray(_token_bits(token, dim), dtype=np.float32)
+
+
+def hash_vector(tf: Dict[str, int], dim: int) -> List[float]:
+    """
+    按词频计算归一化的哈希向量
+
+    Args:
+        tf: 词 -> 词频
+        dim: 向量维度
+
+    Returns:
+        长度为 dim 的单位向量（没有词时为全零）
+    """
+    if not tf:
+        return [0.0] * dim
+    if np is not None:
+        vec = np.asarray(list(tf.values()), dtype=np.float32) @ np.stack([_token_array(t, dim) for t in tf])
+        norm = float(np.linalg.norm(vec)) or 1.0
+        return (vec / norm).tolist()
+
+    vec = [0.0] * dim
+    for token, count in tf.items():
+        for i, bit in enumerate(_token_bits(token, dim)):
+            vec[i] += bit * count
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def signature(vector: Sequence[float]) -> int:
+    """向量的 SimHash 签名：第 i 位 = vector[i] > 0（哈希向量本身就是 SimHash 的累加结果）"""
+    sig = 0
+    for i, v in enumerate(vector):
+        if v > 0.0:
+            sig |= 1 << i
+    return sig
+
+
+class VectorStore:
+    """
+    追加式向量矩阵
+
+    Usage:
+        vectors = VectorStore(index_dir, dim=64)
+        vectors.load(expected_rows=len(chunks))
+        vectors.add(hash_vector(tf, 64))
+        vectors.flush()                        # 把新增的行追加到文件
+        hits = vectors.top(query_vec, k=10)
+    """
+
+    def __init__(self, index_dir: Path, dim: int):
+        self.path = index_dir / "vectors.f32"
+        self.dim = dim
+        self._rows = array("f")  # 行优先存放的全部向量
+        self._persisted = 0  # 已写入文件的行数
+        self._matrix = None  # NumPy 视图缓存（行数变化时失效）
+
+    def __len__(self) -> int:
+        return len(self._rows) // self.dim
+
+    def load(self, expected_rows: int) -> int:
+        """
+        读取向量文件（多余的行丢弃）
+
+        Returns:
+            读到的行数（少于 expected_rows 时由调用方补齐）
+        """
+        self.reset()
+        if not self.path.exists():
+            return 0
+        data = self.path.read_bytes()
+        rows = min(len(data) // (ITEM_SIZE * self.dim), expected_rows)
+        self._rows.frombytes(data[:rows * ITEM_SIZE * self.dim])
+        self._persisted = rows
+        if rows * ITEM_SIZE * self.dim != len(data):
+            self.rewrite()  # 截掉多余或不完整的行
+        return rows
+
+    def reset(self) -> None:
+        """清空内存中的向量（不修改文件）"""
+        self._rows = array("f")
+        self._persisted = 0
+        self._matrix = None
+
+    def add(self, vector: Sequence[float]) -> None:
+        """追加一行（只在内存中，flush 时写入文件）"""
+        self._rows.extend(vector)
+        self._matrix = None
+
+    def flush(self) -> None:
+        """把尚未写入的行追加到文件"""
+        n = len(self)
+        if n == self._persisted:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(self._rows[self._persisted * self.dim:].tobytes())
+        self._persisted = n
+
+    def rewrite(self) -> None:
+        """重写整个向量文件"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_bytes(self._rows.tobytes())
+        tmp.replace(self.path)
+        self._persisted = len(self)
+
+    def _np_matrix(self):
+        # 复制一份而不是共享缓冲区：array 在被 NumPy 引用期间不能再追加
+        if self._matrix is None:
+            self._matrix = np.frombuffer(self._rows.tobytes(), dtype=np.float32).reshape(-1, self.dim)
+        return self._matrix
+
+    def _row(self, i: int) -> array:
+        return self._rows[i * self.dim:(i + 1) * self.dim]
+
+    def top(self, query: Sequence[float], k: int) -> List[Tuple[int, float]]:
+        """
+        与查询向量余弦相似度最高的 k 行（只返回正分）
+
+        Returns:
+            [(row_id, score), ...]，按分数降序
+        """
+        n = len(self)
+        if not n or k <= 0:
+            return []
+        if np is not None:
+            scores = self._np_matrix() @ np.asarray(query, dtype=np.float32)
+            k = min(k, n)
+            idx = np.argpartition(-scores, k - 1)[:k]
+            idx = idx[np.lexsort((idx, -scores[idx]))]
+            return [(int(i), float(scores[i])) for i in idx if scores[i] > 0.0]
+
+        scored = []
+        for i in range(n):
+            score = sum(a * b for a, b in zip(self._row(i), query))
+            if score > 0.0:
+                scored.append((i, score))
+        scored.sort(key=lambda x: (-x[1], x[0]))
+        return scored[:k]
+
+    def similarity(self, ids: Sequence[int]) -> List[List[float]]:
+        """候选行两两之间的余弦相似度矩阵"""
+        if np is not None:
+            m = self._np_matrix()[list(ids)]
+            return (m @ m.T).tolist()
+        rows = [self._row(i) for i in ids]
+        return [[sum(a * b for a, b in zip(r1, r2)) for r2 in rows] for r1 in rows]
+
+
+def mmr_order(relevance: Sequence[float], similarity: List[List[float]],
+              lambda_param: float = 0.7) -> List[int]:
+    """
+    最大边际相关性（MMR）重排
+
+    MMR = lambda * relevance - (1 - lambda) * max_similarity_to_selected
+
+    Args:
+        relevance: 候选的相关性分数
+        similarity: 候选两两之间的相似度矩阵
+        lambda_param: 相关性与多样性的权衡
+
+    Returns:
+        候选下标的新顺序
+    """
+    remaining = list(range(len(relevance)))
+    max_sim = [0.0] * len(relevance)
+    order: List[int] = []
+    while remaining:
+        best = max(remaining, key=lambda i: (lambda_param * relevance[i] - (1 - lambda_param) * max_sim[i], -i))
+        order.append(best)
+        remaining.remove(best)
+        for i in remaining:
+            max_sim[i] = max(max_sim[i], similarity[best][i])
+    return order
@@ -0,0 +1,124 @@
+"""
+offset_index.py - transcript 偏移索引
+
+与 {agent}.jsonl 并列写入 {agent}.offsets.jsonl，每行记录一个边界的字节偏移：
+
+    {"k": "turn", "o": 1234}         # 一轮对话开始（user 条目）
+    {"k": "compaction", "o": 5678}   # 压缩事件
+
+恢复会话时先读取这个很小的边界文件，直接 seek 到最近一次压缩或最后 N 轮的起点，
+只解析需要的那一段 transcript，而不是整个文件。
+
+偏移索引只覆盖活动文件；活动文件轮转为分段（见 segments.py）时一并删除。
+"""
+import json
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from .segments import open_binary
+
+# transcript 条目类型 -> 边界类型
+MARKER_TYPES = {"user": "turn", "compaction": "compaction"}
+
+Marker = Tuple[str, int]
+
+
+def offsets_path(transcript_path: Path) -> Path:
+    """获取偏移索引文件路径（main.jsonl -> main.offsets.jsonl）"""
+    return transcript_path.with_suffix(".offsets.jsonl")
+
+
+def marker_line(kind: str, offset: int) -> bytes:
+    """编码一行偏移索引"""
+    return (json.dumps({"k": kind, "o": offset}) + "\n").encode("utf-8")
+
+
+def load_markers(transcript_path: Path) -> Optional[List[Marker]]:
+    """
+    读取偏移索引
+
+    Returns:
+        边界列表；索引不存在或已过期（偏移超出 transcript 大小）时返回 None
+    """
+    path = offsets_path(transcript_path)
+    if not path.exists() or not transcript_path.exists():
+        return None
+
+    markers: List[Marker] = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                markers.append((item["k"], int(item["o"])))
+    except OSError:
+        return None
+
+    if markers and markers[-1][1] >= transcript_path.stat().st_size:
+        return None
+    return markers
+
+
+def rebuild_markers(transcript_path: Path) -> List[Marker]:
+    """扫描整个 transcript 重建偏移索引（旧会话或索引过期时使用）"""
+    markers: List[Marker] = []
+    offset = 0
+    with open(transcript_path, "rb") as f:
+        for raw in f:
+            kind = None
+            if raw.strip():
+                try:
+                    kind = MARKER_TYPES.get(json.loads(raw).get("type"))
+                except (json.JSONDecodeError, AttributeError):
+                    pass
+            if kind:
+                markers.append((kind, offset))
+            offset += len(raw)
+
+    offsets_path(transcript_path).write_bytes(b"".join(marker_line(k, o) for k, o in markers))
+    return markers
+
+
+def find_start_offset(markers: List[Marker], max_turns: Optional[int] = None,
+                      since_compaction: bool = False) -> int:
+    """
+    根据边界计算读取起点（两个条件同时给出时取更靠后的起点）
+
+    Args:
+        markers: 边界列表
+        max_turns: 只读取最后 N 轮
+        since_compaction: 从最近一次压缩事件开始读取
+    """
+    start = 0
+    if since_compaction:
+        compactions = [o for k, o in markers if k == "compaction"]
+        if compactions:
+            start = compactions[-1]
+    if max_turns:
+        turns = [o for k, o in markers if k == "turn"]
+        if len(turns) > max_turns:
+            start = max(start, turns[-max_turns])
+    return start
+
+
+def iter_entries(transcript_path: Path, start_offset: int = 0) -> Iterator[dict]:
+    """从指定偏移开始流式读取 transcript 条目（也可用于压缩分段）"""
+    with open_binary(transcript_path) as f:
+        if start_offset and f.seekable():
+            f.seek(start_offset)
+        elif start_offset:
+            # zstd 流不支持 seek：读取并丢弃前面的字节
+            remaining = start_offset
+            while remaining > 0 and (chunk := f.read(min(remaining, 1 << 20))):
+                remaining -= len(chunk)
+        for raw in f:
+            if not raw.strip():
+                continue
+            try:
+                yield json.loads(raw)
+            except json.JSONDecodeError:
+                continue
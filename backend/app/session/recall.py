@@ -0,0 +1,125 @@
+"""
+recall.py - 记忆召回服务
+
+每轮对话开始时 auto_recall_memory 用用户消息检索会话记忆。RecallService 负责：
+
+    session_key ──► 常驻 MemoryStore（LRU，最多 RECALL_MAX_SESSIONS 个）
+                        │  index.ensure_fresh()：只 stat 源文件
+                        ▼
+    (session_key, 规范化查询, top_k, ranker, index.generation) ──► 召回结果（LRU 缓存）
+
+记忆写入（本进程的 write_memory 或其他进程追加日志）会让 index.generation 变化，
+旧的缓存条目自然失效；没有写入时重复的查询不再做检索。
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.app.analysis import normalize
+
+from .constants import MEMORY_RANKER, RECALL_CACHE_SIZE, RECALL_MAX_SESSIONS
+from .memory import MemoryStore
+
+CacheKey = Tuple[str, str, int, str, int]
+
+
+class RecallService:
+    """
+    按会话缓存的记忆召回
+
+    Usage:
+        recall = RecallService(store.get_workspace_dir)
+        results = recall.recall("session-1", "用户偏好", top_k=3)
+    """
+
+    def __init__(self, workspace_for: Callable[[str], Path],
+                 max_sessions: int = RECALL_MAX_SESSIONS, cache_size: int = RECALL_CACHE_SIZE):
+        """
+        Args:
+            workspace_for: session_key -> workspace 目录
+            max_sessions: 常驻 MemoryStore 的会话数
+            cache_size: 召回结果缓存条数
+        """
+        self._workspace_for = workspace_for
+        self.max_sessions = max_sessions
+        self.cache_size = cache_size
+        self._stores: "OrderedDict[str, MemoryStore]" = OrderedDict()
+        self._cache: "OrderedDict[CacheKey, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def store_for(self, session_key: str) -> MemoryStore:
+        """获取会话的常驻 MemoryStore（首次访问时创建，workspace 变化时替换）"""
+        with self._lock:
+            workspace_dir = self._workspace_for(session_key)
+            store = self._stores.get(session_key)
+            if store is None or store.workspace_dir != workspace_dir:
+                self._drop(session_key)
+                store = MemoryStore(workspace_dir)
+                self._stores[session_key] = store
+                while len(self._stores) > self.max_sessions:
+                    self._drop(next(iter(self._stores)))
+            self._stores.move_to_end(session_key)
+            return store
+
+    def loaded_store(self, session_key: str) -> Optional[MemoryStore]:
+        """已常驻的 MemoryStore（不创建、不调整 LRU 顺序）"""
+        with self._lock:
+            return self._stores.get(session_key)
+
+    def recall(self, session_key: str, query: str, top_k: int = 3,
+               ranker: str = MEMORY_RANKER) -> List[Dict[str, Any]]:
+        """
+        混合检索会话记忆（命中缓存时不再检索）
+
+        Args:
+            session_key: 会话 key
+            query: 查询文本（通常是用户消息）
+            top_k: 返回结果数量
+            ranker: 关键词排序算法
+
+        Returns:
+            搜索结果列表（与 MemoryStore.hybrid_search 相同）
+        """
+        with self._lock:
+            store = self.store_for(session_key)
+            store.index.ensure_fresh()
+            key = (session_key, " ".join(normalize(query).split()), top_k, ranker, store.index.generation)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return [dict(r) for r in cached]
+
+            self.misses += 1
+            results = store.hybrid_search(query, top_k, ranker)
+            self._cache[key] = [dict(r) for r in results]
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return results
+
+    def invalidate(self, session_key: Optional[str] = None) -> None:
+        """丢弃缓存的召回结果（不指定会话时全部丢弃）"""
+        with self._lock:
+            if session_key is None:
+                self._cache.clear()
+                return
+            for key in [k for k in self._cache if k[0] == session_key]:
+                del self._cache[key]
+
+    def _drop(self, session_key: str) -> None:
+        """移除会话的常驻 MemoryStore 及其缓存（重新加载的索引代数从头计数）"""
+        self._stores.pop(session_key, None)
+        self.invalidate(session_key)
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        with self._lock:
+            return {
+                "sessions": len(self._stores),
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,190 @@
+"""
+segments.py - transcript / trace 分段与压缩
+
+一个逻辑 JSONL 流由若干冷分段加一个活动文件组成：
+
+    {session_dir}/segments/main.00001.jsonl.zst   # 冷分段（已压缩）
+    {session_dir}/segments/main.00002.jsonl.zst
+    {session_dir}/main.jsonl                      # 活动文件（追加写入）
+
+活动文件超过 SEGMENT_MAX_BYTES 时轮转为下一个分段并压缩
+（安装了 zstandard 时用 zstd，否则用 gzip）。
+所有读取方通过 iter_lines() / open_binary() 透明解压，按分段顺序读取整个流。
+"""
+import gzip
+import io
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+from .constants import SEGMENT_MAX_BYTES, SESSION_COLD_DAYS
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+SEGMENT_DIR = "segments"
+COMPRESSED_SUFFIXES = (".gz", ".zst")
+
+
+def default_codec() -> str:
+    """默认压缩格式：优先 zstd"""
+    return "zst" if zstandard is not None else "gz"
+
+
+def segment_dir(path: Path) -> Path:
+    """获取分段目录"""
+    return path.parent / SEGMENT_DIR
+
+
+def _segment_pattern(path: Path) -> "re.Pattern[str]":
+    return re.compile(rf"^{re.escape(path.stem)}\.(\d{{5}})\.jsonl(\.gz|\.zst)?$")
+
+
+def list_segments(path: Path) -> List[Path]:
+    """按序号升序列出某个流的所有分段"""
+    d = segment_dir(path)
+    if not d.is_dir():
+        return []
+    pattern = _segment_pattern(path)
+    found = []
+    for p in d.iterdir():
+        m = pattern.match(p.name)
+        if m:
+            found.append((int(m.group(1)), p))
+    return [p for _, p in sorted(found)]
+
+
+def segment_seq(path: Path) -> int:
+    """获取分段文件的序号"""
+    return int(path.name.split(".")[-3 if path.suffix in COMPRESSED_SUFFIXES else -2])
+
+
+def live_seq(path: Path) -> int:
+    """活动文件的序号（= 轮转后它将得到的分段序号）"""
+    segments = list_segments(path)
+    return segment_seq(segments[-1]) + 1 if segments else 1
+
+
+def stream_exists(path: Path) -> bool:
+    """活动文件或任一分段存在"""
+    return path.exists() or bool(list_segments(path))
+
+
+def open_binary(path: Path) -> BinaryIO:
+    """以二进制只读方式打开文件，按后缀透明解压"""
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    return open(path, "rb")
+
+
+def iter_lines(path: Path) -> Iterator[str]:
+    """按顺序读取整个流（所有分段 + 活动文件）的非空行"""
+    files = list_segments(path)
+    if path.exists():
+        files.append(path)
+    for f in files:
+        with open_binary(f) as fh:
+            for raw in fh:
+                line = raw.decode("utf-8", errors="replace").strip()
+                if line:
+                    yield line
+
+
+def compress(path: Path, codec: Optional[str] = None) -> int:
+    """
+    压缩单个分段文件（写临时文件后 rename，然后删除原文件）
+
+    Returns:
+        回收的字节数
+    """
+    codec = codec or default_codec()
+    if path.suffix in COMPRESSED_SUFFIXES or not path.exists():
+        return 0
+
+    before = path.stat().st_size
+    target = path.with_name(f"{path.name}.{codec}")
+    tmp = target.with_name(target.name + ".tmp")
+    with open(path, "rb") as src, open(tmp, "wb") as dst:
+        if codec == "zst":
+            zstandard.ZstdCompressor(level=3).copy_stream(src, dst)
+        else:
+            with gzip.GzipFile(fileobj=dst, mode="wb", compresslevel=6) as gz:
+                while chunk := src.read(1 << 20):
+                    gz.write(chunk)
+    os.replace(tmp, target)
+    path.unlink()
+    return before - target.stat().st_size
+
+
+def rotate(path: Path, compress_segment: bool = True) -> Optional[Path]:
+    """
+    把活动文件轮转为下一个分段（调用方需先关闭写入句柄）
+
+    Returns:
+        新分段路径；活动文件不存在或为空时返回 None
+    """
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+    d = segment_dir(path)
+    d.mkdir(parents=True, exist_ok=True)
+    target = d / f"{path.stem}.{live_seq(path):05d}.jsonl"
+    os.replace(path, target)
+    if compress_segment:
+        compress(target)
+        target = target.with_name(f"{target.name}.{default_codec()}")
+    return target
+
+
+def _dir_size(d: Path) -> int:
+    return sum(p.stat().st_size for p in d.rglob("*") if p.is_file())
+
+
+def gc_session(session_dir: Path, cold_days: float = SESSION_COLD_DAYS,
+               max_bytes: int = SEGMENT_MAX_BYTES) -> Dict[str, Any]:
+    """
+    整理单个会话目录（调用方需先关闭该会话的写入句柄）
+
+    1. 超过 max_bytes 的活动文件轮转为分段
+    2. 超过 cold_days 未更新的会话，把所有活动 JSONL 文件轮转为分段
+    3. 压缩所有未压缩的分段
+    4. 删除已清空的 inbox 文件
+
+    Returns:
+        整理报告（bytes_before / bytes_after / reclaimed / rotated / compressed / removed）
+    """
+    report = {"bytes_before": _dir_size(session_dir), "rotated": 0, "compressed": 0, "removed": 0}
+    cutoff = time.time() - cold_days * 86400
+
+    for live in sorted(session_dir.glob("*.jsonl")):
+        if live.name.endswith(".offsets.jsonl"):
+            continue
+        stat = live.stat()
+        if stat.st_size and (stat.st_size >= max_bytes or stat.st_mtime < cutoff):
+            rotate(live, compress_segment=False)
+            live.with_suffix(".offsets.jsonl").unlink(missing_ok=True)
+            report["rotated"] += 1
+
+    seg_root = session_dir / SEGMENT_DIR
+    if seg_root.is_dir():
+        for seg in sorted(seg_root.glob("*.jsonl")):
+            compress(seg)
+            report["compressed"] += 1
+
+    inbox = session_dir / "team" / "inbox"
+    if inbox.is_dir():
+        for f in inbox.glob("*.jsonl"):
+            if f.stat().st_size == 0:
+                f.unlink()
+                report["removed"] += 1
+
+    report["bytes_after"] = _dir_size(session_dir)
+    report["reclaimed"] = report["bytes_before"] - report["bytes_after"]
+    return report
@@ -9,39 +9,58 @@ store.py - 统一的 Session 存储管理
 4. 历史记录加载
 5. Bootstrap 文件加载（参考 s06_intelligence.py）
 6. 记忆管理（参考 s06_intelligence.py）
+
+元数据和 transcript 的持久化由存储后端负责（见 backends/，SESSION_BACKEND 选择）。
 """
-import json
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from .constants import SESSIONS_DIR, SESSIONS_INDEX
+from .backends import SessionBackend, create_backend
+from .constants import (
+    MEMORY_DEDUP,
+    MEMORY_DEDUP_MAX_DISTANCE,
+    MEMORY_HOT_DAYS,
+    MEMORY_MONTHLY_DAYS,
+    MEMORY_RANKER,
+    RESUME_MAX_TURNS,
+    SESSION_COLD_DAYS,
+    SESSIONS_DIR,
+)
+from .dedup import TextDedupIndex, split_entries
+from .io_executor import run_io
 from .memory import GlobalMemoryLoader, MemoryStore
+from .recall import RecallService
+from .snapshot import SnapshotStore
 
 
 class SessionStore:
     """统一的会话存储管理器"""
 
-    def __init__(self):
-        SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
-        self._index: dict[str, dict] = self._load_index()
+    def __init__(self, sessions_dir: Path = SESSIONS_DIR, backend: SessionBackend | str | None = None):
+        """
+        Args:
+            sessions_dir: 会话存储根目录
+            backend: 存储后端实例或类型名（file / sqlite），默认读取 SESSION_BACKEND
+        """
+        self.sessions_dir = sessions_dir
+        self.sessions_dir.mkdir(parents=True, exist_ok=True)
+        if backend is None or isinstance(backend, str):
+            backend = create_backend(self.sessions_dir, *([backend] if backend else []))
+        self._backend = backend
         self._current_key: str | None = None
         self._bootstrap_loader: Optional[GlobalMemoryLoader] = None
         self._memory_store: Optional[MemoryStore] = None
+        # 每个会话一个常驻 MemoryStore + 召回结果缓存（见 recall.py）
+        self.recall = RecallService(self.get_workspace_dir)
+        # 记忆写入去重：全局记忆文件名 -> (文件内容哈希, 条目索引)，以及累计节省量
+        self._global_dedup: Dict[str, tuple] = {}
+        self._dedup_stats = {"checked": 0, "rejected": 0, "bytes_saved": 0, "tokens_saved": 0}
 
-    def _load_index(self) -> dict[str, dict]:
-        """加载 sessions.json 索引"""
-        if not SESSIONS_INDEX.exists():
-            return {}
-        try:
-            return json.loads(SESSIONS_INDEX.read_text())
-        except Exception:
-            return {}
-
-    def _save_index(self) -> None:
-        """保存 sessions.json 索引"""
-        SESSIONS_INDEX.write_text(json.dumps(self._index, indent=2, ensure_ascii=False))
+    def close(self) -> None:
+        """写入缓冲中的 transcript 条目并关闭存储后端（退出时调用）"""
+        self._backend.close()
 
     def create_session(self, key: str | None = None) -> str:
         """创建新会话并返回 key"""
@@ -61,11 +80,10 @@ class SessionStore:
             "skills_dir": None,  # 可选的 skills 目录路径
         }
 
-        self._index[key] = metadata
-        self._save_index()
+        self._backend.put_meta(key, metadata)
 
         # 创建会话目录结构
-        session_dir = SESSIONS_DIR / key
+        session_dir = self.sessions_dir / key
         session_dir.mkdir(parents=True, exist_ok=True)
 
         # 创建标准子目录
@@ -76,14 +94,12 @@ class SessionStore:
         (session_dir / "board").mkdir(exist_ok=True)
 
         # 写入主 transcript 元数据
-        main_transcript = session_dir / "main.jsonl"
-        with open(main_transcript, "w") as f:
-            f.write(json.dumps({
-                "type": "session",
-                "id": session_id,
-                "key": key,
-                "created": now,
-            }, ensure_ascii=False) + "\n")
+        self._backend.reset_transcript(key, "main", [{
+            "type": "session",
+            "id": session_id,
+            "key": key,
+            "created": now,
+        }])
 
         return key
 
@@ -91,18 +107,30 @@ class SessionStore:
         """获取当前会话 key"""
         return self._current_key
 
+    def get_session(self, key: str) -> Optional[Dict[str, Any]]:
+        """获取会话元数据（不存在时返回 None）"""
+        return self._backend.get_meta(key)
+
     def set_current_key(self, key: str) -> None:
-        """设置当前会话 key"""
-        if key not in self._index:
+        """设置当前会话 key（与当前会话相同时不做任何事，保留全局记忆加载器和记忆缓存）"""
+        if key == self._current_key and self._memory_store is not None \
+                and self._backend.get_meta(key) is not None:
+            return
+        if self._backend.get_meta(key) is None:
             self.create_session(key)
+        if self._current_key and self._current_key != key:
+            # 切换会话：写入并关闭旧会话的 transcript 句柄
+            self._backend.close_session(self._current_key)
         self._current_key = key
 
         # 初始化全局记忆加载器（使用全局 .memory 目录）
         self._bootstrap_loader = GlobalMemoryLoader()
 
-        # 初始化记忆存储（使用 session workspace）
-        workspace_dir = self.get_workspace_dir(key)
-        self._memory_store = MemoryStore(workspace_dir)
+        # 记忆存储（使用 session workspace）；与召回服务共用常驻实例，复用已加载的检索索引
+        store = self.recall.store_for(key)
+        if store is self._memory_store:
+            store.invalidate_cache()
+        self._memory_store = store
 
         # 重置 team 单例（如果存在）
         try:
@@ -115,7 +143,7 @@ class SessionStore:
     def get_session_dir(self, key: str | None = None) -> Path:
         """获取会话目录"""
         k = key or self._current_key or "default"
-        d = SESSIONS_DIR / k
+        d = self.sessions_dir / k
         d.mkdir(parents=True, exist_ok=True)
         return d
 
@@ -210,20 +238,18 @@ class SessionStore:
         return self.get_session_dir(key) / f"{agent_name}.jsonl"
 
     def append_transcript(self, agent_name: str, entry: dict, key: str | None = None) -> None:
-        """追加条目到 agent 的 JSONL transcript"""
+        """追加条目到 agent 的 transcript（经由存储后端的缓冲）"""
         k = key or self._current_key
         if not k:
             return
 
-        path = self.get_session_dir(k) / f"{agent_name}.jsonl"
-        with open(path, "a") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._backend.append(k, agent_name, entry)
 
     def save_turn(self, agent_name: str, user_msg: str, ai_msg: str,
                   tool_calls: list[dict] | None = None, key: str | None = None) -> None:
         """保存一轮对话"""
         k = key or self._current_key
-        if not k or k not in self._index:
+        if not k or self._backend.get_meta(k) is None:
             return
 
         now = datetime.now(timezone.utc).isoformat()
@@ -243,11 +269,11 @@ class SessionStore:
             "ts": now,
         }, k)
 
+        # 轮次边界：按 durability 级别写入 transcript
+        self._backend.end_turn(k, agent_name)
+
         # 更新元数据
-        meta = self._index[k]
-        meta["updated_at"] = now
-        meta["message_count"] = meta.get("message_count", 0) + 1
-        self._save_index()
+        self._backend.increment_meta(k, "message_count", updated_at=now)
 
     def save_tool_result(self, agent_name: str, tool_name: str,
                         tool_call_id: str, result: str, key: str | None = None) -> None:
@@ -280,90 +306,208 @@ class SessionStore:
         }, k)
 
         # 更新元数据
-        if k in self._index:
-            meta = self._index[k]
-            meta["compaction_count"] = meta.get("compaction_count", 0) + 1
-            self._save_index()
+        self._backend.increment_meta(k, "compaction_count")
+
+    def load_history(self, agent_name: str, key: str | None = None,
+                     max_turns: int | None = None, since_compaction: bool = False) -> list:
+        """
+        加载 transcript 历史记录
 
-    def load_history(self, agent_name: str, key: str | None = None) -> list:
-        """从 JSONL transcript 加载历史记录"""
-        from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+        给出 max_turns 或 since_compaction 时只读取最后 N 轮 / 最近一次压缩之后的条目
+        （文件后端借助偏移索引 seek，SQLite 后端走索引查询）。
+
+        Args:
+            agent_name: agent 名称
+            key: 会话 key
+            max_turns: 只加载最后 N 轮对话
+            since_compaction: 只加载最近一次压缩之后的对话
 
+        Returns:
+            LangChain 消息列表
+        """
         k = key or self._current_key
         if not k:
             return []
 
-        path = self.get_session_dir(k) / f"{agent_name}.jsonl"
-        if not path.exists():
+        entries = self._backend.read_entries(k, agent_name, max_turns, since_compaction)
+        return self._entries_to_messages(entries)
+
+    def save_snapshot(self, agent_name: str, messages: list, token_count: int,
+                      key: str | None = None) -> None:
+        """
+        保存压缩后的上下文快照（记录当前 transcript 位置）
+
+        Args:
+            agent_name: agent 名称
+            messages: 压缩后的消息列表
+            token_count: 压缩后的 token 估算值
+            key: 会话 key
+        """
+        k = key or self._current_key
+        if not k or not messages:
+            return
+
+        segment, offset = self._backend.position(k, agent_name)
+        SnapshotStore(self.get_session_dir(k)).save(
+            agent_name, messages, token_count, offset, transcript_segment=segment
+        )
+
+    def load_resume_history(self, agent_name: str, key: str | None = None,
+                            max_turns: int | None = RESUME_MAX_TURNS) -> list:
+        """
+        恢复会话历史：最新快照 + 快照之后的 transcript 条目
+
+        没有可用快照时退回到只加载最后 max_turns 轮。
+
+        Args:
+            agent_name: agent 名称
+            key: 会话 key
+            max_turns: 没有快照时加载的轮数
+
+        Returns:
+            LangChain 消息列表
+        """
+        k = key or self._current_key
+        if not k:
             return []
 
-        history = []
-        for line in path.read_text().splitlines():
-            if not line.strip():
-                continue
-            try:
-                entry = json.loads(line)
-                entry_type = entry.get("type")
-
-                if entry_type == "session":
-                    continue  # 跳过元数据行
-                elif entry_type == "user":
-                    history.append(HumanMessage(content=entry.get("content", "")))
-                elif entry_type == "assistant":
-                    history.append(AIMessage(content=entry.get("content", "")))
-                elif entry_type == "tool_result":
-                    history.append(ToolMessage(
-                        content=entry.get("result", ""),
-                        tool_call_id=entry.get("tool_call_id", "")
-                    ))
-                elif entry_type == "compaction":
-                    # 压缩事件可以记录但不加入历史
-                    pass
-            except Exception:
-                continue
+        snapshot = SnapshotStore(self.get_session_dir(k)).load_latest(agent_name)
+        tail = None
+        if snapshot:
+            position = (snapshot.get("transcript_segment", 1), snapshot["transcript_offset"])
+            tail = self._backend.entries_after(k, agent_name, position)
+        if tail is None:
+            return self.load_history(agent_name, k, max_turns=max_turns)
+        return list(snapshot["messages"]) + self._entries_to_messages(tail)
 
+    def _entries_to_messages(self, entries: list[dict]) -> list:
+        history = []
+        for entry in entries:
+            msg = self._entry_to_message(entry)
+            if msg is not None:
+                history.append(msg)
         return history
 
+    @staticmethod
+    def _entry_to_message(entry: dict):
+        """把 transcript 条目转换为 LangChain 消息（元数据和压缩事件返回 None）"""
+        from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+        entry_type = entry.get("type")
+        if entry_type == "user":
+            return HumanMessage(content=entry.get("content", ""))
+        if entry_type == "assistant":
+            return AIMessage(content=entry.get("content", ""))
+        if entry_type == "tool_result":
+            return ToolMessage(
+                content=entry.get("result", ""),
+                tool_call_id=entry.get("tool_call_id", "")
+            )
+        # session 元数据行和 compaction 事件不加入历史
+        return None
+
+    @staticmethod
+    def _message_to_entry(msg) -> dict:
+        """把 LangChain 消息转换为 transcript 条目（_entry_to_message 的逆操作，其他消息原样保存）"""
+        msg_type = getattr(msg, "type", None)
+        if msg_type == "human":
+            return {"type": "user", "content": msg.content}
+        if msg_type == "ai":
+            return {"type": "assistant", "content": msg.content, "tool_calls": list(getattr(msg, "tool_calls", []))}
+        if msg_type == "tool":
+            return {"type": "tool_result", "tool": getattr(msg, "name", None) or "",
+                    "tool_call_id": msg.tool_call_id, "result": msg.content}
+        return msg.model_dump()
+
     def save_full_history(self, agent_name: str, history: list, key: str | None = None) -> None:
         """保存完整历史（向后兼容旧的 save_session 方法）"""
         k = key or self._current_key
         if not k or not history:
             return
 
-        # 覆盖写入完整历史
-        path = self.get_session_dir(k) / f"{agent_name}.jsonl"
-        with open(path, "w") as f:
+        # 覆盖写入完整历史（后端同时删除已轮转的分段），旧快照随之失效
+        SnapshotStore(self.get_session_dir(k)).clear(agent_name)
+        entries = []
+        meta = self._backend.get_meta(k)
+        if meta is not None:
             # 写入会话元数据
-            if k in self._index:
-                meta = self._index[k]
-                f.write(json.dumps({
-                    "type": "session",
-                    "id": meta.get("session_id", ""),
-                    "key": k,
-                    "created": meta.get("created_at", ""),
-                }, ensure_ascii=False) + "\n")
-
-            # 写入消息
-            for msg in history:
-                f.write(json.dumps(msg.model_dump(), ensure_ascii=False) + "\n")
-
-    def list_sessions(self) -> list[dict]:
-        """列出所有会话，按更新时间排序"""
-        sessions = list(self._index.values())
-        sessions.sort(key=lambda s: s.get("updated_at", ""), reverse=True)
-        return sessions
+            entries.append({
+                "type": "session",
+                "id": meta.get("session_id", ""),
+                "key": k,
+                "created": meta.get("created_at", ""),
+            })
+        entries.extend(self._message_to_entry(msg) for msg in history)
+        self._backend.reset_transcript(k, agent_name, entries)
+
+    def gc(self, cold_days: float = SESSION_COLD_DAYS) -> Dict[str, Any]:
+        """
+        整理所有会话目录（/sessions gc）
+
+        轮转超大的 transcript / trace，把超过 cold_days 未更新的会话整体压缩为分段，
+        删除已清空的 inbox 文件。当前会话不做冷会话压缩。
+
+        Returns:
+            汇总报告（sessions / rotated / compressed / removed / bytes_before / bytes_after / reclaimed）
+        """
+        totals = {"sessions": 0, "rotated": 0, "compressed": 0, "removed": 0,
+                  "bytes_before": 0, "bytes_after": 0}
+        for meta in self._backend.list_meta():
+            key = meta["session_key"]
+            if not (self.sessions_dir / key).is_dir():
+                continue
+            report = self._backend.gc_session(key, float("inf") if key == self._current_key else cold_days)
+            totals["sessions"] += 1
+            for field in ("rotated", "compressed", "removed", "bytes_before", "bytes_after"):
+                totals[field] += report[field]
+        totals["reclaimed"] = totals["bytes_before"] - totals["bytes_after"]
+        return totals
+
+    def consolidate_memory(self, hot_days: int = MEMORY_HOT_DAYS,
+                           monthly_days: int = MEMORY_MONTHLY_DAYS) -> Dict[str, int]:
+        """
+        合并所有会话的旧记忆日志（心跳系统定期调用，或 /memory consolidate 手动触发）
+
+        已常驻的会话复用其 MemoryStore（合并后就地重建索引），其他会话临时打开。
+
+        Returns:
+            汇总报告（sessions / daily_files / segments_written / segments_removed / entries / dropped /
+            bytes_before / bytes_after）
+        """
+        totals = {"sessions": 0, "daily_files": 0, "segments_written": 0, "segments_removed": 0,
+                  "entries": 0, "dropped": 0, "bytes_before": 0, "bytes_after": 0}
+        for meta in self._backend.list_meta():
+            key = meta["session_key"]
+            workspace_dir = self.sessions_dir / key / "workspace"
+            if not (workspace_dir / "memory" / "daily").is_dir():
+                continue
+            store = self.recall.loaded_store(key) or MemoryStore(workspace_dir)
+            report = store.consolidate(hot_days, monthly_days)
+            totals["sessions"] += 1
+            for field, value in report.items():
+                totals[field] += value
+        return totals
+
+    def list_sessions(self, limit: int | None = None, offset: int = 0) -> list[dict]:
+        """
+        列出会话，按更新时间倒序
+
+        Args:
+            limit: 最多返回多少个（None 表示全部）
+            offset: 跳过前多少个（分页）
+        """
+        return self._backend.list_meta(limit, offset)
 
     def delete_session(self, key: str) -> bool:
         """删除会话"""
-        if key not in self._index:
+        if self._backend.get_meta(key) is None:
             return False
 
-        self._index.pop(key)
-        self._save_index()
+        self._backend.delete_session(key)
 
         # 删除目录
         import shutil
-        session_dir = SESSIONS_DIR / key
+        session_dir = self.sessions_dir / key
         if session_dir.exists():
             shutil.rmtree(session_dir)
 
@@ -372,10 +516,11 @@ class SessionStore:
     def get_skills_dir(self, key: str | None = None) -> Path | None:
         """获取会话的 skills 目录路径"""
         k = key or self._current_key
-        if not k or k not in self._index:
+        meta = self._backend.get_meta(k) if k else None
+        if meta is None:
             return None
 
-        skills_path = self._index[k].get("skills_dir")
+        skills_path = meta.get("skills_dir")
         if skills_path:
             return Path(skills_path)
         return None
@@ -383,12 +528,51 @@ class SessionStore:
     def set_skills_dir(self, skills_dir: str | Path, key: str | None = None) -> None:
         """设置会话的 skills 目录路径"""
         k = key or self._current_key
-        if not k or k not in self._index:
+        if not k or self._backend.get_meta(k) is None:
             raise ValueError(f"Session {k} not found")
 
-        self._index[k]["skills_dir"] = str(skills_dir)
-        self._index[k]["updated_at"] = datetime.now(timezone.utc).isoformat()
-        self._save_index()
+        self._backend.update_meta(
+            k,
+            skills_dir=str(skills_dir),
+            updated_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+    # ========== 异步接口（在 I/O 执行器中运行，见 io_executor.py） ==========
+
+    async def asave_turn(self, agent_name: str, user_msg: str, ai_msg: str,
+                         tool_calls: list[dict] | None = None, key: str | None = None) -> None:
+        """save_turn 的异步版本"""
+        await run_io(self.save_turn, agent_name, user_msg, ai_msg, tool_calls, key)
+
+    async def asave_tool_result(self, agent_name: str, tool_name: str,
+                                tool_call_id: str, result: str, key: str | None = None) -> None:
+        """save_tool_result 的异步版本"""
+        await run_io(self.save_tool_result, agent_name, tool_name, tool_call_id, result, key)
+
+    async def asave_snapshot(self, agent_name: str, messages: list, token_count: int,
+                             key: str | None = None) -> None:
+        """save_snapshot 的异步版本"""
+        await run_io(self.save_snapshot, agent_name, list(messages), token_count, key)
+
+    async def aload_history(self, agent_name: str, key: str | None = None,
+                            max_turns: int | None = None, since_compaction: bool = False) -> list:
+        """load_history 的异步版本"""
+        return await run_io(self.load_history, agent_name, key, max_turns, since_compaction)
+
+    async def aload_resume_history(self, agent_name: str, key: str | None = None,
+                                   max_turns: int | None = RESUME_MAX_TURNS) -> list:
+        """load_resume_history 的异步版本"""
+        return await run_io(self.load_resume_history, agent_name, key, max_turns)
+
+    async def ahybrid_search_memory(self, query: str, top_k: int = 5,
+                                    ranker: str = MEMORY_RANKER) -> List[Dict[str, Any]]:
+        """hybrid_search_memory 的异步版本"""
+        return await run_io(self.hybrid_search_memory, query, top_k, ranker)
+
+    async def arecall_memory(self, key: str, query: str, top_k: int = 3,
+                             ranker: str = MEMORY_RANKER) -> List[Dict[str, Any]]:
+        """recall_memory 的异步版本"""
+        return await run_io(self.recall_memory, key, query, top_k, ranker)
 
     # ========== Bootstrap 文件加载 ==========
 
@@ -410,6 +594,20 @@ class SessionStore:
             return {}
         return self._bootstrap_loader.load_all(mode)
 
+    def bootstrap_hash(self, mode: str = "full") -> str:
+        """
+        Bootstrap 文件内容的哈希（只 stat 校验，内容未变时不读文件）
+
+        Args:
+            mode: 加载模式（full/minimal/none）
+
+        Returns:
+            十六进制摘要；未初始化全局记忆时为空字符串
+        """
+        if not self._bootstrap_loader:
+            return ""
+        return self._bootstrap_loader.content_hash(mode)
+
     def load_soul(self) -> str:
         """
         加载 SOUL.md 文件
@@ -530,6 +728,11 @@ class SessionStore:
         else:
             if not self._memory_store:
                 return "Error: No active session"
+            if MEMORY_DEDUP:
+                self._dedup_stats["checked"] += 1
+                dup = self._memory_store.find_duplicate(content)
+                if dup:
+                    return self._skip_duplicate(content, dup["path"], dup["distance"])
             return self._memory_store.write_memory(content, category)
 
     def append_memory(self, content: str, category: str = "general") -> str:
@@ -567,16 +770,52 @@ class SessionStore:
 
         # 读取当前内容
         current = self._bootstrap_loader.load_file(filename)
+
+        dedup = None
+        if MEMORY_DEDUP:
+            self._dedup_stats["checked"] += 1
+            dedup = self._global_dedup_index(filename, current)
+            hit = dedup.nearest(content, MEMORY_DEDUP_MAX_DISTANCE)
+            if hit:
+                return self._skip_duplicate(content, filename, hit[1])
+
         updated = f"{current}{formatted}".strip()
 
         # 写入更新后的内容
         success = self._bootstrap_loader.update_file(filename, updated)
 
         if success:
+            if dedup is not None:
+                dedup.add(content)
+                self._global_dedup[filename] = (hash(self._bootstrap_loader.load_file(filename)), dedup)
             return f"✓ Saved to global {filename}"
         else:
             return f"✗ Error writing to global {filename}"
 
+    def _global_dedup_index(self, filename: str, current: str) -> TextDedupIndex:
+        """全局记忆文件的近似重复索引（文件内容变化时重建）"""
+        cached = self._global_dedup.get(filename)
+        if cached is not None and cached[0] == hash(current):
+            return cached[1]
+        index = TextDedupIndex()
+        index.reset(split_entries(current))
+        self._global_dedup[filename] = (hash(current), index)
+        return index
+
+    def _skip_duplicate(self, content: str, where: str, distance: int) -> str:
+        """记录被拒绝的近似重复写入"""
+        saved_bytes = len(content.encode("utf-8"))
+        saved_tokens = len(content) // 4  # 粗略估算：1 token ≈ 4 chars
+        self._dedup_stats["rejected"] += 1
+        self._dedup_stats["bytes_saved"] += saved_bytes
+        self._dedup_stats["tokens_saved"] += saved_tokens
+        return (f"✓ Skipped near-duplicate of existing memory in {where} "
+                f"(distance {distance}; saved {saved_bytes} bytes, ~{saved_tokens} tokens)")
+
+    def get_dedup_stats(self) -> Dict[str, int]:
+        """记忆写入去重统计（检查次数、拒绝次数、节省的字节数和 token 数）"""
+        return dict(self._dedup_stats)
+
     def search_memory(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """
         搜索记忆（简单 TF-IDF）
@@ -592,20 +831,38 @@ class SessionStore:
             return []
         return self._memory_store.search_memory(query, top_k)
 
-    def hybrid_search_memory(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def hybrid_search_memory(self, query: str, top_k: int = 5,
+                             ranker: str = MEMORY_RANKER) -> List[Dict[str, Any]]:
         """
         混合搜索记忆（关键词 + 向量 + 时间衰减 + MMR）
 
         Args:
             query: 搜索查询
             top_k: 返回结果数量
+            ranker: 排序算法（tfidf / bm25）
 
         Returns:
             搜索结果列表
         """
         if not self._memory_store:
             return []
-        return self._memory_store.hybrid_search(query, top_k)
+        return self._memory_store.hybrid_search(query, top_k, ranker)
+
+    def recall_memory(self, key: str, query: str, top_k: int = 3,
+                      ranker: str = MEMORY_RANKER) -> List[Dict[str, Any]]:
+        """
+        召回指定会话的相关记忆（不切换当前会话，结果按记忆代数缓存）
+
+        Args:
+            key: 会话 key
+            query: 查询文本
+            top_k: 返回结果数量
+            ranker: 排序算法（tfidf / bm25）
+
+        Returns:
+            搜索结果列表
+        """
+        return self.recall.recall(key, query, top_k, ranker)
 
     def get_memory_stats(self) -> Dict[str, Any]:
         """
@@ -615,5 +872,8 @@ class SessionStore:
             统计信息字典
         """
         if not self._memory_store:
-            return {"evergreen_chars": 0, "daily_files": 0, "daily_entries": 0}
-        return self._memory_store.get_stats()
+            stats = {"evergreen_chars": 0, "daily_files": 0, "daily_entries": 0}
+        else:
+            stats = self._memory_store.get_stats()
+        stats["dedup"] = self.get_dedup_stats()
+        return stats
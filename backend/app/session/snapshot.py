@@ -0,0 +1,113 @@
+"""
+snapshot.py - 压缩后上下文快照
+
+每次压缩后把压缩结果（消息列表 + token 数）写成一个带版本号的快照文件：
+
+    {session_dir}/snapshots/{agent}/000003.json
+
+快照同时记录写入时 transcript 的分段序号和字节偏移。恢复会话时加载最新快照，
+再只重放 transcript 中该偏移之后的条目，不需要重新压缩（也就不需要 LLM 调用）。
+"""
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .constants import SNAPSHOT_KEEP
+
+# 快照文件格式版本（格式变化时递增，旧格式的快照会被忽略）
+SNAPSHOT_FORMAT = 1
+
+
+class SnapshotStore:
+    """
+    会话快照存储
+
+    Usage:
+        snapshots = SnapshotStore(session_dir)
+        snapshots.save("main", messages, token_count=1200, transcript_offset=4096)
+        latest = snapshots.load_latest("main")
+    """
+
+    def __init__(self, session_dir: Path, keep: int = SNAPSHOT_KEEP):
+        self.root = session_dir / "snapshots"
+        self.keep = keep
+
+    def _agent_dir(self, agent_name: str) -> Path:
+        return self.root / agent_name
+
+    def _list(self, agent_name: str) -> List[Path]:
+        """按版本号升序列出快照文件"""
+        d = self._agent_dir(agent_name)
+        if not d.is_dir():
+            return []
+        return sorted(p for p in d.glob("*.json") if p.stem.isdigit())
+
+    def save(self, agent_name: str, messages: list, token_count: int,
+             transcript_offset: int, transcript_segment: int = 1) -> Path:
+        """
+        写入新快照并清理旧快照
+
+        Args:
+            agent_name: agent 名称
+            messages: 压缩后的 LangChain 消息列表
+            token_count: 压缩后的 token 估算值
+            transcript_offset: 快照对应的 transcript 字节偏移
+            transcript_segment: 写入时活动 transcript 的分段序号（见 segments.py）
+
+        Returns:
+            快照文件路径
+        """
+        from langchain_core.messages import messages_to_dict
+
+        existing = self._list(agent_name)
+        version = int(existing[-1].stem) + 1 if existing else 1
+
+        data = {
+            "format": SNAPSHOT_FORMAT,
+            "version": version,
+            "agent": agent_name,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "token_count": token_count,
+            "transcript_segment": transcript_segment,
+            "transcript_offset": transcript_offset,
+            "message_count": len(messages),
+            "messages": messages_to_dict(messages),
+        }
+
+        d = self._agent_dir(agent_name)
+        d.mkdir(parents=True, exist_ok=True)
+        path = d / f"{version:06d}.json"
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+        for old in existing[:max(0, len(existing) + 1 - self.keep)]:
+            old.unlink(missing_ok=True)
+        return path
+
+    def load_latest(self, agent_name: str) -> Optional[Dict[str, Any]]:
+        """
+        加载最新的可用快照
+
+        Returns:
+            快照数据（messages 已还原为 LangChain 消息），没有可用快照时返回 None
+        """
+        from langchain_core.messages import messages_from_dict
+
+        for path in reversed(self._list(agent_name)):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                if data.get("format") != SNAPSHOT_FORMAT:
+                    continue
+                data["messages"] = messages_from_dict(data["messages"])
+                return data
+            except Exception:
+                continue  # 损坏的快照：退回上一个版本
+        return None
+
+    def clear(self, agent_name: str) -> None:
+        """删除某个 agent 的全部快照（transcript 被整体重写时调用）"""
+        for path in self._list(agent_name):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,237 @@
+"""
+transcript.py - 缓冲式 transcript 写入器
+
+每个 (session, agent) 只保持一个追加句柄，条目先缓存在内存中，
+在以下时机批量写入：
+1. 缓冲条目数 / 字节数达到阈值
+2. 距离第一条未写入条目超过时间阈值
+3. 轮次边界（end_turn）
+
+持久化级别（durability）：
+- none:  轮次边界不做额外处理，由阈值或 close() 触发写入
+- flush: 轮次边界写入并 flush 到操作系统（默认）
+- fsync: 轮次边界写入、flush 并 fsync 到磁盘
+
+写入时同步维护 {agent}.offsets.jsonl 偏移索引（见 offset_index.py），
+记录每轮对话和每次压缩事件在 transcript 中的字节偏移。
+活动文件超过 SEGMENT_MAX_BYTES 时轮转为压缩分段（见 segments.py）。
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .constants import (
+    SEGMENT_MAX_BYTES,
+    TRANSCRIPT_DURABILITY,
+    TRANSCRIPT_FLUSH_BYTES,
+    TRANSCRIPT_FLUSH_ENTRIES,
+    TRANSCRIPT_FLUSH_INTERVAL,
+    TRANSCRIPT_MAX_OPEN_HANDLES,
+)
+from .offset_index import MARKER_TYPES, marker_line, offsets_path, rebuild_markers
+from .segments import rotate
+
+DURABILITY_MODES = ("none", "flush", "fsync")
+
+
+class _TranscriptHandle:
+    """单个 transcript 文件的句柄、缓冲区和偏移索引"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        # 旧会话没有偏移索引：先扫描一次补齐，之后增量追加
+        if path.exists() and path.stat().st_size > 0 and not offsets_path(path).exists():
+            rebuild_markers(path)
+        self.file = open(path, "ab")
+        self.offsets_file = None
+        self.offset = path.stat().st_size  # 已写入文件的字节数
+        self.buffer: List[bytes] = []
+        self.markers: List[bytes] = []
+        self.buffered_bytes = 0
+        self.first_buffered_at: float = 0.0
+
+    def add(self, line: bytes, marker: Optional[str]) -> None:
+        """缓冲一行，并记录它的偏移（如果是边界条目）"""
+        if marker:
+            self.markers.append(marker_line(marker, self.offset + self.buffered_bytes))
+        self.buffer.append(line)
+        self.buffered_bytes += len(line)
+
+    def write_buffer(self) -> None:
+        """把缓冲区写入文件对象（不保证落盘），先写 transcript 再写偏移索引"""
+        if not self.buffer:
+            return
+        self.file.write(b"".join(self.buffer))
+        self.offset += self.buffered_bytes
+        if self.markers:
+            self.file.flush()
+            if self.offsets_file is None:
+                self.offsets_file = open(offsets_path(self.path), "ab")
+            self.offsets_file.write(b"".join(self.markers))
+            self.markers.clear()
+        self.buffer.clear()
+        self.buffered_bytes = 0
+        self.first_buffered_at = 0.0
+
+    def flush(self) -> None:
+        self.file.flush()
+        if self.offsets_file is not None:
+            self.offsets_file.flush()
+
+    def fsync(self) -> None:
+        os.fsync(self.file.fileno())
+        if self.offsets_file is not None:
+            os.fsync(self.offsets_file.fileno())
+
+    def close(self) -> None:
+        self.write_buffer()
+        self.file.close()
+        if self.offsets_file is not None:
+            self.offsets_file.close()
+
+
+class TranscriptWriter:
+    """
+    Transcript 写入器
+
+    Usage:
+        writer = TranscriptWriter(sessions_dir)
+        writer.append(key, "main", {"type": "user", ...})
+        writer.end_turn(key, "main")   # 轮次边界
+        writer.close()                 # 退出时
+    """
+
+    def __init__(
+        self,
+        sessions_dir: Path,
+        durability: str = TRANSCRIPT_DURABILITY,
+        flush_entries: int = TRANSCRIPT_FLUSH_ENTRIES,
+        flush_bytes: int = TRANSCRIPT_FLUSH_BYTES,
+        flush_interval: float = TRANSCRIPT_FLUSH_INTERVAL,
+        max_open_handles: int = TRANSCRIPT_MAX_OPEN_HANDLES,
+        segment_max_bytes: int = SEGMENT_MAX_BYTES,
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Invalid durability mode: {durability} (expected one of {DURABILITY_MODES})")
+        self.sessions_dir = sessions_dir
+        self.durability = durability
+        self.flush_entries = flush_entries
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.max_open_handles = max_open_handles
+        self.segment_max_bytes = segment_max_bytes
+        self._handles: "OrderedDict[Tuple[str, str], _TranscriptHandle]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def path_for(self, key: str, agent_name: str) -> Path:
+        """获取 transcript 文件路径"""
+        return self.sessions_dir / key / f"{agent_name}.jsonl"
+
+    def _get_handle(self, key: str, agent_name: str) -> _TranscriptHandle:
+        """获取（必要时打开）追加句柄，超过上限时关闭最久未使用的句柄"""
+        hkey = (key, agent_name)
+        handle = self._handles.get(hkey)
+        if handle is not None:
+            self._handles.move_to_end(hkey)
+            return handle
+
+        path = self.path_for(key, agent_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handle = _TranscriptHandle(path)
+        self._handles[hkey] = handle
+
+        while len(self._handles) > self.max_open_handles:
+            _, oldest = self._handles.popitem(last=False)
+            oldest.close()
+        return handle
+
+    def append(self, key: str, agent_name: str, entry: dict) -> None:
+        """追加一条条目到缓冲区，达到阈值时写入文件"""
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            handle = self._get_handle(key, agent_name)
+            if not handle.buffer:
+                handle.first_buffered_at = time.monotonic()
+            handle.add(line, MARKER_TYPES.get(entry.get("type")))
+
+            if (len(handle.buffer) >= self.flush_entries
+                    or handle.buffered_bytes >= self.flush_bytes
+                    or time.monotonic() - handle.first_buffered_at >= self.flush_interval):
+                handle.write_buffer()
+                handle.flush()
+                self._maybe_rotate(key, agent_name, handle)
+
+    def _maybe_rotate(self, key: str, agent_name: str, handle: _TranscriptHandle) -> None:
+        """活动文件超过分段大小时关闭句柄并轮转（下次追加时重新打开）"""
+        if handle.offset < self.segment_max_bytes or handle.buffer:
+            return
+        self._handles.pop((key, agent_name), None)
+        handle.close()
+        rotate(handle.path)
+        offsets_path(handle.path).unlink(missing_ok=True)
+
+    def end_turn(self, key: str, agent_name: str) -> None:
+        """轮次边界：按 durability 级别写入缓冲区"""
+        if self.durability == "none":
+            return
+        with self._lock:
+            handle = self._handles.get((key, agent_name))
+            if handle is None:
+                return
+            handle.write_buffer()
+            handle.flush()
+            if self.durability == "fsync":
+                handle.fsync()
+            self._maybe_rotate(key, agent_name, handle)
+
+    def flush(self, key: Optional[str] = None, agent_name: Optional[str] = None) -> None:
+        """
+        写入缓冲区并 flush 到操作系统（读取 transcript 前调用）
+
+        Args:
+            key: 只 flush 指定会话（None 表示全部）
+            agent_name: 只 flush 指定 agent（None 表示该会话全部）
+        """
+        with self._lock:
+            for (k, a), handle in self._handles.items():
+                if key is not None and k != key:
+                    continue
+                if agent_name is not None and a != agent_name:
+                    continue
+                handle.write_buffer()
+                handle.flush()
+
+    def close_handle(self, key: str, agent_name: str) -> None:
+        """关闭单个句柄（覆盖写入文件前调用）"""
+        with self._lock:
+            handle = self._handles.pop((key, agent_name), None)
+            if handle is not None:
+                handle.close()
+
+    def close_session(self, key: str) -> None:
+        """关闭某个会话的所有句柄（切换会话时调用）"""
+        with self._lock:
+            for hkey in [h for h in self._handles if h[0] == key]:
+                self._handles.pop(hkey).close()
+
+    def close(self) -> None:
+        """关闭所有句柄（退出时调用）"""
+        with self._lock:
+            while self._handles:
+                _, handle = self._handles.popitem(last=False)
+                try:
+                    handle.close()
+                except Exception:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        """获取写入器状态（打开句柄数、缓冲条目数）"""
+        with self._lock:
+            return {
+                "open_handles": len(self._handles),
+                "buffered_entries": sum(len(h.buffer) for h in self._handles.values()),
+            }
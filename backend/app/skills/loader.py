@@ -1,5 +1,8 @@
 import re
 from pathlib import Path
+from typing import List
+
+from backend.app.analysis import rank_documents
 
 # Skills 目录路径（项目根目录下的 .skills/）
 SKILLS_DIR = Path(__file__).parent.parent.parent.parent / ".skills"
@@ -42,6 +45,15 @@ class SkillLoader:
             for name, skill in self.skills.items()
         )
 
+    def search(self, query: str, top_k: int = 5) -> List[str]:
+        """按名称和描述搜索技能，返回按相关性排序的技能名"""
+        ranked = rank_documents(
+            query,
+            ((name, f"{name} {skill['meta'].get('description', '')}") for name, skill in self.skills.items()),
+            top_k=top_k,
+        )
+        return [name for name, _ in ranked]
+
     def get_content(self, name: str) -> str:
         skill = self.skills.get(name)
         if not skill:
@@ -5,8 +5,12 @@ Task 模块导出
 - models: 数据模型（Pydantic）
 - exceptions: 自定义异常
 - repository: 数据访问层
+- cached_repository: 带内存索引的数据访问层（默认）
+- sqlite_repository: SQLite 数据访问层（TASK_BACKEND=sqlite）
+- events: 任务事件流（TaskService.events）
 - service: 业务逻辑层
 - converter: 数据转换层
+- config: 任务包配置（环境变量）
 """
 
 from backend.app.task.models import Task, TaskStatus, TaskPriority
@@ -17,6 +21,10 @@ from backend.app.task.exceptions import (
     TaskValidationError
 )
 from backend.app.task.repository import TaskRepository
+from backend.app.task.cached_repository import CachedTaskRepository
+from backend.app.task.sqlite_repository import SQLiteTaskRepository
+from backend.app.task.backends import create_repository
+from backend.app.task.events import TaskEvent, TaskEventStream, Subscription
 from backend.app.task.service import TaskService
 from backend.app.task.converter import TaskConverter
 
@@ -32,6 +40,12 @@ __all__ = [
     "TaskValidationError",
     # Layers
     "TaskRepository",
+    "CachedTaskRepository",
+    "SQLiteTaskRepository",
+    "create_repository",
+    "TaskEvent",
+    "TaskEventStream",
+    "Subscription",
     "TaskService",
     "TaskConverter",
 ]
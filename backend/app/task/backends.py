@@ -0,0 +1,36 @@
+"""
+任务仓储后端
+
+通过环境变量 TASK_BACKEND 选择：
+- file:   每个任务一个 JSON 文件，带内存索引（默认）
+- sqlite: {tasks_dir}/tasks.db（WAL），首次使用时一次性导入已有的 JSON 任务
+"""
+from pathlib import Path
+from typing import Optional
+
+from backend.app.task.cached_repository import CachedTaskRepository
+from backend.app.task.config import TASK_BACKEND
+from backend.app.task.repository import TaskRepository
+from backend.app.task.sqlite_repository import SQLiteTaskRepository
+
+BACKENDS = ("file", "sqlite")
+
+
+def create_repository(tasks_dir: Optional[Path] = None, kind: str = TASK_BACKEND) -> TaskRepository:
+    """
+    创建任务仓储
+
+    Args:
+        tasks_dir: 任务目录，默认使用当前会话的 tasks 目录
+        kind: 后端类型（file / sqlite）
+
+    Returns:
+        TaskRepository 实例
+    """
+    if kind == "file":
+        return CachedTaskRepository(tasks_dir)
+    if kind == "sqlite":
+        repository = SQLiteTaskRepository(tasks_dir)
+        repository.import_json()
+        return repository
+    raise ValueError(f"Unknown task backend: {kind} (expected one of {BACKENDS})")
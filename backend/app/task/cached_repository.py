@@ -0,0 +1,270 @@
+"""
+Cached Task Repository - 带二级索引的内存任务缓存
+
+任务文件只在第一次查询时全部解析一次，之后常驻内存并维护二级索引：
+
+    tasks:       id -> Task
+    by_status:   TaskStatus   -> {id, ...}
+    by_owner:    owner        -> {id, ...}
+    by_priority: TaskPriority -> {id, ...}
+    by_tag:      tag          -> {id, ...}
+    blocked:     {blocked_by 非空的 id}
+
+一致性：
+- 本仓储的 save / delete 直接写穿到缓存和索引
+- 每次查询先 stat 任务目录；目录 mtime 变化（其他进程新建、删除或替换了任务文件）时
+  重新扫描目录，只重新解析签名变化的文件
+- 文件签名为 (mtime, size, inode)：任务文件都经 rename 原子替换，每次写入都会换 inode
+- 目录 mtime 距今不足 RACY_NS 时不记录（时间戳精度有限，同一时刻的后续写入可能不改变 mtime），
+  下一次查询仍会扫描；原地改写已有文件而不经过 rename 的外部修改需要调用 invalidate()
+
+查询结果是缓存中的对象，调用方应视为只读；需要修改时用 get_by_id 取得副本，修改后 save。
+写入路径（原子写入、事务、预写日志）与 TaskRepository 相同，这里只在写入文件后更新缓存；
+事务中的查询叠加本事务暂存的修改，此时按条件过滤而不走索引。
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from pathlib import Path
+
+from backend.app.task.config import TASK_FSYNC
+from backend.app.task.exceptions import TaskNotFoundError
+from backend.app.task.models import Task, TaskPriority, TaskStatus
+from backend.app.task.repository import TaskRepository
+
+logger = logging.getLogger(__name__)
+
+FileSig = Tuple[int, int, int]  # (mtime_ns, size, inode)
+
+RACY_NS = 2_000_000_000
+
+
+class CachedTaskRepository(TaskRepository):
+    """带内存缓存和二级索引的任务仓储（文件格式与 TaskRepository 相同）"""
+
+    def __init__(self, tasks_dir: Optional[Path] = None, durable: bool = TASK_FSYNC):
+        self._lock = threading.RLock()
+        self._dir_mtime: Optional[int] = None
+        self._tasks: Dict[int, Task] = {}
+        self._file_of: Dict[int, str] = {}
+        self._files: Dict[str, Tuple[int, FileSig]] = {}  # 文件名 -> (任务ID, 签名)
+        self._keys: Dict[int, tuple] = {}  # 建索引时的取值，删除索引项时使用（对象可能已被修改）
+        self._by_status: Dict[TaskStatus, Set[int]] = {}
+        self._by_owner: Dict[str, Set[int]] = {}
+        self._by_priority: Dict[TaskPriority, Set[int]] = {}
+        self._by_tag: Dict[str, Set[int]] = {}
+        self._blocked: Set[int] = set()
+        self.loads = 0  # 解析的文件数
+        self.scans = 0  # 目录扫描次数
+        super().__init__(tasks_dir, durable)  # 可能重放预写日志，缓存字段需要先就绪
+
+    # ========== 索引维护 ==========
+
+    def _index(self, task: Task) -> None:
+        key = (task.status, task.owner, task.priority, tuple(task.tags), bool(task.blocked_by))
+        self._keys[task.id] = key
+        self._by_status.setdefault(key[0], set()).add(task.id)
+        self._by_owner.setdefault(key[1], set()).add(task.id)
+        self._by_priority.setdefault(key[2], set()).add(task.id)
+        for tag in key[3]:
+            self._by_tag.setdefault(tag, set()).add(task.id)
+        if key[4]:
+            self._blocked.add(task.id)
+
+    def _unindex(self, task_id: int) -> None:
+        key = self._keys.pop(task_id, None)
+        if key is None:
+            return
+        for index, value in ((self._by_status, key[0]), (self._by_owner, key[1]), (self._by_priority, key[2]),
+                             *((self._by_tag, tag) for tag in key[3])):
+            ids = index.get(value)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del index[value]
+        self._blocked.discard(task_id)
+
+    def _put(self, task: Task, name: str, sig: FileSig) -> None:
+        old_name = self._file_of.get(task.id)
+        if old_name is not None and old_name != name:
+            self._files.pop(old_name, None)
+        self._unindex(task.id)
+        self._tasks[task.id] = task
+        self._file_of[task.id] = name
+        self._files[name] = (task.id, sig)
+        self._index(task)
+
+    def _remove(self, task_id: int) -> None:
+        self._unindex(task_id)
+        self._tasks.pop(task_id, None)
+        name = self._file_of.pop(task_id, None)
+        if name is not None:
+            self._files.pop(name, None)
+
+    # ========== 一致性 ==========
+
+    def _refresh(self) -> None:
+        """目录 mtime 变化时重新扫描，只解析变化的文件"""
+        try:
+            mtime = os.stat(self.tasks_dir).st_mtime_ns
+        except OSError:
+            self.invalidate()
+            return
+        if mtime == self._dir_mtime:
+            return
+
+        self.scans += 1
+        now = time.time_ns()
+        seen = set()
+        with os.scandir(self.tasks_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not (name.startswith("task_") and name.endswith(".json")):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                seen.add(name)
+                sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+                cached = self._files.get(name)
+                if cached is not None and cached[1] == sig:
+                    continue
+                try:
+                    task = self._load_from_file(Path(entry.path))
+                except Exception as e:
+                    logger.warning(f"Failed to load task from {entry.path}: {e}")
+                    continue
+                self.loads += 1
+                self._put(task, name, sig)
+
+        for name in [n for n in self._files if n not in seen]:
+            task_id = self._files.pop(name)[0]
+            if self._file_of.get(task_id) == name:
+                self._remove(task_id)
+        # 使用扫描前的 mtime：扫描期间目录再次变化时，下一次查询会再扫描
+        self._dir_mtime = mtime if now - mtime > RACY_NS else None
+
+    def invalidate(self) -> None:
+        """清空缓存，下一次查询重新加载全部任务"""
+        with self._lock:
+            self._dir_mtime = None
+            self._tasks.clear()
+            self._file_of.clear()
+            self._files.clear()
+            self._keys.clear()
+            for index in (self._by_status, self._by_owner, self._by_priority, self._by_tag):
+                index.clear()
+            self._blocked.clear()
+
+    def _select(self, ids) -> List[Task]:
+        return [self._tasks[i] for i in sorted(ids)]
+
+    # ========== 读写 ==========
+
+    def _task_files(self, task_id: int) -> List[Path]:
+        """任务文件（用缓存中的文件名代替 glob）"""
+        with self._lock:
+            self._refresh()
+            name = self._file_of.get(task_id)
+            return [self.tasks_dir / name] if name is not None else []
+
+    def _write_task(self, task: Task) -> None:
+        """写入任务文件并写穿到缓存"""
+        with self._lock:
+            super()._write_task(task)
+            path = self._file_path(task)
+            st = path.stat()
+            self._put(task.model_copy(deep=True), path.name, (st.st_mtime_ns, st.st_size, st.st_ino))
+
+    def _remove_task(self, task_id: int) -> None:
+        with self._lock:
+            super()._remove_task(task_id)
+            self._remove(task_id)
+
+    def exists(self, task_id: int) -> bool:
+        """检查任务是否存在"""
+        staged = self._staged()
+        if staged is not None and task_id in staged:
+            return staged[task_id] is not None
+        with self._lock:
+            self._refresh()
+            return task_id in self._tasks
+
+    def get_by_id(self, task_id: int) -> Task:
+        """
+        根据ID获取任务（返回副本，修改后需要 save）
+
+        Raises:
+            TaskNotFoundError: 任务不存在
+        """
+        staged = self._staged()
+        if staged is not None and task_id in staged:
+            return self._staged_copy(staged, task_id)
+        with self._lock:
+            self._refresh()
+            task = self._tasks.get(task_id)
+            if task is None:
+                raise TaskNotFoundError(task_id)
+            return task.model_copy(deep=True)
+
+    # ========== 查询（索引） ==========
+
+    def find_all(self) -> List[Task]:
+        with self._lock:
+            self._refresh()
+            tasks = self._select(self._tasks)
+        return sorted(self._overlay(tasks), key=lambda t: t.id) if self._staged() else tasks
+
+    def find_by_status(self, status: TaskStatus) -> List[Task]:
+        if self._staged():
+            return super().find_by_status(status)
+        with self._lock:
+            self._refresh()
+            return self._select(self._by_status.get(status, ()))
+
+    def find_by_owner(self, owner: str) -> List[Task]:
+        if self._staged():
+            return super().find_by_owner(owner)
+        with self._lock:
+            self._refresh()
+            return self._select(self._by_owner.get(owner, ()))
+
+    def find_by_priority(self, priority: TaskPriority) -> List[Task]:
+        if self._staged():
+            return super().find_by_priority(priority)
+        with self._lock:
+            self._refresh()
+            return self._select(self._by_priority.get(priority, ()))
+
+    def find_by_tags(self, tags: List[str]) -> List[Task]:
+        if self._staged():
+            return super().find_by_tags(tags)
+        with self._lock:
+            self._refresh()
+            ids: Set[int] = set()
+            for tag in tags:
+                ids |= self._by_tag.get(tag.lower(), set())
+            return self._select(ids)
+
+    def find_blocked_tasks(self) -> List[Task]:
+        if self._staged():
+            return super().find_blocked_tasks()
+        with self._lock:
+            self._refresh()
+            return self._select(self._blocked)
+
+    def find_available_tasks(self) -> List[Task]:
+        if self._staged():
+            return super().find_available_tasks()
+        with self._lock:
+            self._refresh()
+            return self._select(self._by_status.get(TaskStatus.PENDING, set()) - self._blocked)
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        with self._lock:
+            return {"tasks": len(self._tasks), "loads": self.loads, "scans": self.scans}
@@ -0,0 +1,14 @@
+"""
+Task 包配置
+"""
+import os
+
+# 任务存储后端：file（每个任务一个 JSON 文件，带内存索引）/ sqlite（会话 tasks 目录下的 WAL 数据库）
+TASK_BACKEND = os.getenv("TASK_BACKEND", "file")
+# SQLite 数据库文件名（位于 tasks 目录下）和锁等待超时（秒，默认与会话存储相同）
+TASK_DB_NAME = os.getenv("TASK_DB_NAME", "tasks.db")
+TASK_SQLITE_BUSY_TIMEOUT = float(os.getenv("TASK_SQLITE_BUSY_TIMEOUT", os.getenv("SESSION_SQLITE_BUSY_TIMEOUT", "30")))
+# 任务文件写入后是否 fsync（文件和目录）；0 时仍然原子替换，只是不保证掉电后持久
+TASK_FSYNC = os.getenv("TASK_FSYNC", "1") != "0"
+# 任务事件日志文件名（位于会话 tasks 目录下，可按偏移量续读）；为空时事件只在进程内分发
+TASK_EVENT_LOG = os.getenv("TASK_EVENT_LOG", "")
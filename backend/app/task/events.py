@@ -0,0 +1,333 @@
+"""
+Task Events - 任务事件流
+
+TaskService 在每次写入提交后发布事件，消费者订阅后立即收到，不必轮询任务文件：
+
+    created          新任务               {subject, priority, owner}
+    status_changed   状态变化             {old, new, owner}
+    unblocked        最后一个阻塞任务结束  {by}
+    claimed          任务被认领（有负责人地开始）{owner}
+    bound_worktree   绑定工作树           {worktree, owner}
+
+- 进程内发布 / 订阅：回调在发布线程中同步执行；Subscription 在线程中 wait()，在事件循环中 await wait_async()，
+  事件到达时立即唤醒
+- 事务中发布的事件先暂存，最外层 batch() 成功退出后才分发，回滚时丢弃
+- 可选持久化：事件追加到 JSONL 日志（O_APPEND，多进程可以共用一个日志），偏移量就是该行结束处的字节位置，
+  消费者保存偏移量（save_cursor），之后从该位置 read() 继续；不持久化时偏移量为进程内的序号
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set
+
+from backend.app.task.journal import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+EVENT_KINDS = ("created", "status_changed", "unblocked", "claimed", "bound_worktree")
+
+
+@dataclass
+class TaskEvent:
+    """任务事件"""
+    kind: str
+    task_id: int
+    data: Dict[str, Any] = field(default_factory=dict)
+    ts: float = field(default_factory=time.time)
+    offset: int = 0  # 发布后赋值，单调递增
+
+
+class Subscription:
+    """
+    事件订阅（同一订阅可以挂在多个事件流上，见 TaskEventStream.subscribe 的 into 参数）
+
+    Usage:
+        sub = stream.subscribe({"unblocked", "claimed"})
+        events = sub.wait(timeout=5)          # 线程中阻塞等待
+        events = await sub.wait_async(5)      # 事件循环中等待
+        sub.close()
+    """
+
+    def __init__(self, kinds: Optional[Iterable[str]] = None,
+                 callback: Optional[Callable[[TaskEvent], None]] = None):
+        self.kinds: Optional[Set[str]] = set(kinds) if kinds is not None else None
+        self.callback = callback
+        self._streams: List["TaskEventStream"] = []
+        self._pending: Deque[TaskEvent] = deque()
+        self._cond = threading.Condition()
+        self._waiters: Set[tuple] = set()  # (事件循环, asyncio.Event)
+
+    def wants(self, event: TaskEvent) -> bool:
+        return self.kinds is None or event.kind in self.kinds
+
+    def deliver(self, event: TaskEvent) -> None:
+        """发布线程调用：执行回调，或放入队列并唤醒等待者"""
+        if self.callback is not None:
+            try:
+                self.callback(event)
+            except Exception as e:
+                logger.warning(f"Task event callback failed for {event.kind} #{event.task_id}: {e}")
+            return
+        with self._cond:
+            self._pending.append(event)
+            self._cond.notify_all()
+            waiters = list(self._waiters)
+        for loop, ready in waiters:
+            loop.call_soon_threadsafe(ready.set)
+
+    def poll(self) -> List[TaskEvent]:
+        """取出已到达的事件（不等待）"""
+        with self._cond:
+            events = list(self._pending)
+            self._pending.clear()
+        return events
+
+    def wait(self, timeout: Optional[float] = None) -> List[TaskEvent]:
+        """
+        等待事件到达
+
+        Args:
+            timeout: 超时（秒），None 表示一直等待
+
+        Returns:
+            已到达的事件；超时返回空列表
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending, timeout)
+        return self.poll()
+
+    async def wait_async(self, timeout: Optional[float] = None) -> List[TaskEvent]:
+        """wait 的异步版本：事件到达时立即唤醒，不阻塞事件循环"""
+        ready = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), ready)
+        with self._cond:
+            if self._pending:
+                return self.poll()
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                self._waiters.discard(waiter)
+        return self.poll()
+
+    def close(self) -> None:
+        """从所有事件流上取消订阅"""
+        for stream in list(self._streams):
+            stream.unsubscribe(self)
+
+
+class TaskEventStream:
+    """
+    任务事件流
+
+    Usage:
+        stream = TaskEventStream(log_path=tasks_dir / "events.jsonl")
+        with stream.batch():
+            stream.publish("created", 1, subject="...")
+        events = stream.read(after=cursor)
+    """
+
+    def __init__(self, log_path: Optional[Path] = None, buffer: int = 1000):
+        """
+        Args:
+            log_path: 事件日志（JSONL）；None 表示只在进程内分发
+            buffer: 不持久化时内存中保留的最近事件数
+        """
+        self.log_path = log_path
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._recent: Deque[TaskEvent] = deque(maxlen=buffer)
+        self._seq = 0
+        self._local = threading.local()
+        if log_path is not None:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # ========== 订阅 ==========
+
+    def subscribe(
+        self,
+        kinds: Optional[Iterable[str]] = None,
+        callback: Optional[Callable[[TaskEvent], None]] = None,
+        into: Optional[Subscription] = None
+    ) -> Subscription:
+        """
+        订阅事件
+
+        Args:
+            kinds: 关心的事件类型，None 表示全部
+            callback: 回调（在发布线程中同步执行，不能阻塞）；不提供时用 Subscription.wait 取事件
+            into: 已有的订阅（让一个订阅同时接收多个事件流），此时忽略 kinds 和 callback
+
+        Returns:
+            订阅对象
+        """
+        subscription = into or Subscription(kinds, callback)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        subscription._streams.append(self)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+        if self in subscription._streams:
+            subscription._streams.remove(self)
+
+    # ========== 发布 ==========
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """暂存其中发布的事件，最外层成功退出时分发，抛出异常时丢弃（可嵌套）"""
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            self._local.pending = []
+        self._local.depth = depth + 1
+        try:
+            yield
+        except BaseException:
+            if depth == 0:
+                self._local.pending = []
+            raise
+        finally:
+            self._local.depth = depth
+        if depth == 0:
+            pending, self._local.pending = self._local.pending, []
+            for event in pending:
+                self._dispatch(event)
+
+    def publish(self, kind: str, task_id: int, **data: Any) -> TaskEvent:
+        """
+        发布事件（在 batch 中时延迟到 batch 结束）
+
+        Args:
+            kind: 事件类型（见 EVENT_KINDS）
+            task_id: 任务ID
+            **data: 事件数据
+
+        Returns:
+            事件对象（立即分发时已带偏移量）
+        """
+        event = TaskEvent(kind, task_id, data)
+        if getattr(self._local, "depth", 0):
+            self._local.pending.append(event)
+        else:
+            self._dispatch(event)
+        return event
+
+    def _dispatch(self, event: TaskEvent) -> None:
+        with self._lock:
+            if self.log_path is not None:
+                event.offset = self._append(event)
+            else:
+                self._seq += 1
+                event.offset = self._seq
+                self._recent.append(event)
+            subscriptions = [s for s in self._subscriptions if s.wants(event)]
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+    def _append(self, event: TaskEvent) -> int:
+        """追加一行到日志，返回该行结束处的字节偏移（O_APPEND 保证多进程追加不交错）"""
+        record = asdict(event)
+        del record["offset"]
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            return os.lseek(fd, 0, os.SEEK_CUR)
+        finally:
+            os.close(fd)
+
+    # ========== 读取 ==========
+
+    def read(self, after: int = 0, limit: Optional[int] = None,
+             kinds: Optional[Iterable[str]] = None) -> List[TaskEvent]:
+        """
+        读取偏移量 after 之后的事件（消费者从上次保存的偏移量继续）
+
+        Args:
+            after: 已处理的最后一个事件的偏移量，0 表示从头开始
+            limit: 最多返回的事件数
+            kinds: 事件类型过滤
+
+        Returns:
+            按偏移量递增排列的事件
+        """
+        wanted = set(kinds) if kinds is not None else None
+        events: List[TaskEvent] = []
+        if self.log_path is None:
+            with self._lock:
+                candidates = [e for e in self._recent if e.offset > after]
+        else:
+            candidates = self._read_log(after)
+        for event in candidates:
+            if wanted is None or event.kind in wanted:
+                events.append(event)
+                if limit is not None and len(events) >= limit:
+                    break
+        return events
+
+    def _read_log(self, after: int) -> Iterator[TaskEvent]:
+        try:
+            f = open(self.log_path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(after)
+            offset = after
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 其他进程正在追加的行
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                yield TaskEvent(offset=offset, **record)
+
+    def last_offset(self) -> int:
+        """当前最新事件的偏移量（新消费者从这里开始即只接收之后的事件）"""
+        if self.log_path is not None:
+            try:
+                return self.log_path.stat().st_size
+            except FileNotFoundError:
+                return 0
+        with self._lock:
+            return self._seq
+
+    # ========== 消费者游标 ==========
+
+    def _cursor_path(self) -> Path:
+        return self.log_path.with_name(f"{self.log_path.stem}.cursors.json")
+
+    def load_cursor(self, consumer: str) -> int:
+        """读取消费者保存的偏移量（未保存过或不持久化时为 0）"""
+        if self.log_path is None:
+            return 0
+        try:
+            return json.loads(self._cursor_path().read_text()).get(consumer, 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def save_cursor(self, consumer: str, offset: int) -> None:
+        """保存消费者已处理到的偏移量（不持久化时忽略）"""
+        if self.log_path is None:
+            return
+        with self._lock:
+            try:
+                cursors = json.loads(self._cursor_path().read_text())
+            except (FileNotFoundError, ValueError):
+                cursors = {}
+            cursors[consumer] = offset
+            atomic_write_text(self._cursor_path(), json.dumps(cursors, indent=2), durable=False)
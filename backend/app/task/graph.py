@@ -0,0 +1,165 @@
+"""
+Task Graph - 任务依赖图
+
+依赖关系本身随任务持久化（Task.blocked_by / Task.blocks），图只是内存中的邻接索引：
+
+    blockers:   id -> {阻塞它的任务}      正向边（来自 blocked_by）
+    dependents: id -> {被它阻塞的任务}    反向边
+    status:     id -> TaskStatus
+
+- 首次使用时由 find_all() 构建一次，之后 TaskService 每次保存 / 删除任务时增量更新
+- add_dependency 的环检测只从新边的终点沿正向边搜索，不读取任何任务文件
+- 任务完成时只需要处理 dependents[id]，不再扫描全部任务
+"""
+import heapq
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from backend.app.task.exceptions import TaskValidationError
+from backend.app.task.models import Task, TaskStatus
+
+# 已结束的任务不再阻塞其他任务
+DONE = (TaskStatus.COMPLETED, TaskStatus.CANCELLED)
+
+
+class TaskGraph:
+    """
+    任务依赖图（正向 + 反向邻接表）
+
+    Usage:
+        graph = TaskGraph.from_tasks(repository.find_all())
+        graph.would_cycle(task_id, depends_on)
+        graph.ready_tasks()
+        graph.topological_order()
+        graph.critical_path()
+    """
+
+    def __init__(self):
+        self.blockers: Dict[int, Set[int]] = {}
+        self.dependents: Dict[int, Set[int]] = {}
+        self.status: Dict[int, TaskStatus] = {}
+
+    @classmethod
+    def from_tasks(cls, tasks: Iterable[Task]) -> "TaskGraph":
+        graph = cls()
+        for task in tasks:
+            graph.update(task)
+        return graph
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self.status
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    # ========== 增量维护 ==========
+
+    def update(self, task: Task) -> None:
+        """用任务的最新状态替换节点（正向边以 blocked_by 为准）"""
+        self.status[task.id] = task.status
+        new = set(task.blocked_by)
+        old = self.blockers.get(task.id, set())
+        for blocker in old - new:
+            self._discard(self.dependents, blocker, task.id)
+        for blocker in new - old:
+            self.dependents.setdefault(blocker, set()).add(task.id)
+        self.blockers[task.id] = new
+
+    def remove(self, task_id: int) -> None:
+        """删除节点及其正向边（被它阻塞的任务的边由调用方更新）"""
+        self.status.pop(task_id, None)
+        for blocker in self.blockers.pop(task_id, set()):
+            self._discard(self.dependents, blocker, task_id)
+
+    @staticmethod
+    def _discard(index: Dict[int, Set[int]], key: int, value: int) -> None:
+        values = index.get(key)
+        if values is not None:
+            values.discard(value)
+            if not values:
+                del index[key]
+
+    # ========== 查询 ==========
+
+    def would_cycle(self, task_id: int, depends_on: int) -> bool:
+        """
+        添加边 task_id -> depends_on（task_id 被 depends_on 阻塞）后是否成环
+
+        只搜索 depends_on 的上游（它直接或间接依赖的任务）。
+        """
+        if task_id == depends_on:
+            return True
+        stack, seen = [depends_on], {depends_on}
+        while stack:
+            for blocker in self.blockers.get(stack.pop(), ()):
+                if blocker == task_id:
+                    return True
+                if blocker not in seen:
+                    seen.add(blocker)
+                    stack.append(blocker)
+        return False
+
+    def open_blockers(self, task_id: int) -> Set[int]:
+        """尚未结束的阻塞任务（不在图中的任务视为已删除）"""
+        return {b for b in self.blockers.get(task_id, ()) if b in self.status and self.status[b] not in DONE}
+
+    def ready_tasks(self) -> List[int]:
+        """可以开始的任务：PENDING 且所有阻塞任务都已结束，按 ID 排序"""
+        return sorted(
+            task_id for task_id, status in self.status.items()
+            if status == TaskStatus.PENDING and not self.open_blockers(task_id)
+        )
+
+    def topological_order(self, include_done: bool = True) -> List[int]:
+        """
+        拓扑顺序（阻塞任务在前；同一层按 ID 排序）
+
+        Args:
+            include_done: 是否包含已结束的任务
+
+        Raises:
+            TaskValidationError: 存在循环依赖
+        """
+        nodes = {t for t, s in self.status.items() if include_done or s not in DONE}
+        indegree = {t: sum(1 for b in self.blockers.get(t, ()) if b in nodes) for t in nodes}
+        heap = [t for t, d in indegree.items() if d == 0]
+        heapq.heapify(heap)
+        order = []
+        while heap:
+            task_id = heapq.heappop(heap)
+            order.append(task_id)
+            for dependent in self.dependents.get(task_id, ()):
+                if dependent in indegree:
+                    indegree[dependent] -= 1
+                    if indegree[dependent] == 0:
+                        heapq.heappush(heap, dependent)
+        if len(order) != len(nodes):
+            cycle = sorted(t for t, d in indegree.items() if d > 0)
+            raise TaskValidationError(f"Circular dependency among tasks: {cycle}")
+        return order
+
+    def critical_path(self, weight: Optional[Callable[[int], float]] = None) -> List[int]:
+        """
+        未结束任务中最长的依赖链（决定全部完成所需的最短时间）
+
+        Args:
+            weight: 任务耗时，默认每个任务为 1
+
+        Returns:
+            从最上游到最下游的任务ID列表
+        """
+        weight = weight or (lambda _: 1)
+        best: Dict[int, float] = {}
+        prev: Dict[int, Optional[int]] = {}
+        for task_id in self.topological_order(include_done=False):
+            upstream = [b for b in self.blockers.get(task_id, ()) if b in best]
+            before = max(upstream, key=lambda b: (best[b], -b), default=None)
+            best[task_id] = (best[before] if before is not None else 0) + weight(task_id)
+            prev[task_id] = before
+        if not best:
+            return []
+        node: Optional[int] = max(best, key=lambda t: (best[t], -t))
+        path = []
+        while node is not None:
+            path.append(node)
+            node = prev[node]
+        return path[::-1]
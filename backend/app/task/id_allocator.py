@@ -0,0 +1,124 @@
+"""
+Task ID Allocator - 任务ID分配器
+
+计数器文件保存下一个可用ID，分配时在锁内读取、加上数量、写临时文件并 fsync 后原子替换：
+
+    tasks/
+    ├── .next_id          # 下一个可用ID（文本）
+    └── .next_id.lock     # fcntl 文件锁（跨进程）；进程内再加一把线程锁
+
+每次分配只读写一个很小的文件，与已有任务数量无关；批量创建时一次取走一段连续ID。
+计数器文件不存在或损坏时，扫描一次已有的 task_*.json 作为起点。
+"""
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from backend.app.task.journal import atomic_write_text
+
+try:
+    import fcntl
+except ImportError:  # Windows：只有进程内的线程锁
+    fcntl = None
+
+
+class TaskIdAllocator:
+    """
+    基于计数器文件的任务ID分配器
+
+    Usage:
+        allocator = TaskIdAllocator(tasks_dir)
+        task_id = allocator.allocate()
+        ids = allocator.allocate_range(10)   # range(n, n + 10)
+    """
+
+    COUNTER_FILE = ".next_id"
+
+    # 同一目录的分配器共用一把线程锁，进程内的线程不必在文件锁上排队
+    _thread_locks: dict = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, tasks_dir: Path):
+        """
+        Args:
+            tasks_dir: 任务存储目录
+        """
+        self.tasks_dir = tasks_dir
+        self.counter_path = tasks_dir / self.COUNTER_FILE
+        self.lock_path = tasks_dir / f"{self.COUNTER_FILE}.lock"
+        with self._registry_lock:
+            key = str(tasks_dir.resolve())
+            self._lock = self._thread_locks.setdefault(key, threading.Lock())
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """线程锁 + 文件锁"""
+        with self._lock:
+            self.tasks_dir.mkdir(parents=True, exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _scan(self) -> int:
+        """扫描已有任务文件得到下一个ID（仅在计数器缺失时使用）"""
+        ids = [
+            int(f.stem.split("_")[1])
+            for f in self.tasks_dir.glob("task_*.json")
+            if f.stem.split("_")[1].isdigit()
+        ]
+        return max(ids) + 1 if ids else 1
+
+    def _read(self) -> int:
+        try:
+            value = int(self.counter_path.read_text(encoding="utf-8").strip())
+            if value >= 1:
+                return value
+        except (OSError, ValueError):
+            pass
+        return self._scan()
+
+    def _write(self, value: int) -> None:
+        # 必须先于任务文件落盘：掉电后计数器回退会把已用过的ID再分配一次，覆盖已有任务
+        atomic_write_text(self.counter_path, str(value), durable=True)
+
+    def allocate_range(self, count: int) -> range:
+        """
+        分配一段连续ID
+
+        Args:
+            count: 数量
+
+        Returns:
+            range(first, first + count)
+
+        Raises:
+            ValueError: count 小于 1
+        """
+        if count < 1:
+            raise ValueError(f"count must be positive, got {count}")
+        with self._locked():
+            first = self._read()
+            self._write(first + count)
+        return range(first, first + count)
+
+    def allocate(self) -> int:
+        """分配一个ID"""
+        return self.allocate_range(1).start
+
+    def peek(self) -> int:
+        """下一个将要分配的ID（不占用）"""
+        with self._locked():
+            return self._read()
+
+    def reserve_above(self, task_id: int) -> None:
+        """确保之后分配的ID都大于 task_id（导入或外部写入了指定ID的任务时调用）"""
+        with self._locked():
+            if self._read() <= task_id:
+                self._write(task_id + 1)
@@ -0,0 +1,167 @@
+"""
+Task Journal - 任务文件的原子写入和预写日志
+
+原子写入：临时文件 → fsync → os.replace → fsync 目录，崩溃后文件要么是旧内容，要么是新内容。
+
+事务（TaskRepository.transaction）中的修改先暂存在内存，提交时：
+
+    1. 把全部修改（任务的完整内容 / 删除）写入 .journal.tmp 并 fsync
+    2. rename 为 .journal                      ← 提交点
+    3. 逐个应用到任务文件（每个文件原子写入）
+    4. 删除 .journal
+
+打开仓储或进入事务时如果发现 .journal，说明上一次提交在第 3 步中断，重放即可（写入完整内容，可重复执行）；
+只有 .journal.tmp 说明提交点之前就中断了，直接丢弃。
+
+同一目录的写入由 DirLock 串行化：进程内可重入的线程锁 + 跨进程的 fcntl 文件锁。
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows：只有进程内的线程锁
+    fcntl = None
+
+JOURNAL_FILE = ".journal"
+LOCK_FILE = ".tasks.lock"
+
+# 日志记录：(任务ID, 序列化后的任务；None 表示删除)
+JournalOp = Tuple[int, Optional[Dict[str, Any]]]
+
+
+def fsync_dir(directory: Path) -> None:
+    """fsync 目录，使 rename / unlink 持久化（不支持时忽略）"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_text(path: Path, text: str, durable: bool = True) -> None:
+    """
+    原子写入文本文件（临时文件 + fsync + rename）
+
+    Args:
+        path: 目标文件
+        text: 内容
+        durable: 是否 fsync 文件和目录
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    if durable:
+        fsync_dir(path.parent)
+
+
+class DirLock:
+    """
+    目录级写锁（进程内可重入，跨进程互斥）
+
+    同一目录的所有仓储实例共用一个 DirLock（见 for_dir）。
+    """
+
+    _locks: Dict[str, "DirLock"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, directory: Path):
+        self.path = directory / LOCK_FILE
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    @classmethod
+    def for_dir(cls, directory: Path) -> "DirLock":
+        with cls._registry_lock:
+            key = str(directory.resolve())
+            lock = cls._locks.get(key)
+            if lock is None:
+                lock = cls._locks[key] = cls(directory)
+            return lock
+
+    @property
+    def outermost(self) -> bool:
+        """当前线程是否刚刚在最外层拿到锁"""
+        return self._depth == 1
+
+    def __enter__(self) -> "DirLock":
+        self._rlock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._file = open(self.path, "a")
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._rlock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._rlock.release()
+
+
+class TaskJournal:
+    """任务目录的预写日志"""
+
+    def __init__(self, tasks_dir: Path):
+        self.path = tasks_dir / JOURNAL_FILE
+        self.tmp_path = tasks_dir / f"{JOURNAL_FILE}.tmp"
+
+    def write(self, ops: List[JournalOp]) -> None:
+        """写入并提交日志（rename 为 .journal 即提交）"""
+        lines = [json.dumps({"id": task_id, "task": data}, ensure_ascii=False) for task_id, data in ops]
+        with open(self.tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.tmp_path, self.path)
+        fsync_dir(self.path.parent)
+
+    def pending(self) -> Optional[List[JournalOp]]:
+        """
+        读取已提交但未完成应用的日志（丢弃未提交的 .journal.tmp）
+
+        Returns:
+            日志记录；没有待重放的日志时返回 None
+        """
+        self.tmp_path.unlink(missing_ok=True)
+        try:
+            text = self.path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        ops = []
+        for line in text.splitlines():
+            if line.strip():
+                record = json.loads(line)
+                ops.append((record["id"], record["task"]))
+        return ops
+
+    def clear(self) -> None:
+        """全部修改已应用，删除日志"""
+        self.path.unlink(missing_ok=True)
+        fsync_dir(self.path.parent)
@@ -1,18 +1,27 @@
 """
 Task Repository - 数据访问层
 负责任务的持久化操作
+
+每个任务文件都原子写入（临时文件 + fsync + rename），slug 变化时先把旧文件 rename 为新文件名，
+任何时刻每个任务都只有一个文件。transaction() 中的修改暂存在内存，提交时经预写日志一起应用，
+见 journal.py。
 """
 import json
+import os
 import re
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from contextlib import contextmanager
 import logging
 
 from backend.app.task.models import Task, TaskStatus, TaskPriority
 from backend.app.task.exceptions import TaskNotFoundError, TaskValidationError
-from backend.app.session import get_tasks_dir, get_task_file_path
+from backend.app.task.id_allocator import TaskIdAllocator
+from backend.app.task.journal import DirLock, TaskJournal, atomic_write_text, fsync_dir
+from backend.app.session import get_tasks_dir
+from backend.app.task.config import TASK_FSYNC
 
 logger = logging.getLogger(__name__)
 
@@ -25,15 +34,23 @@ def _slug(text: str) -> str:
 class TaskRepository:
     """任务数据访问层 - 使用文件系统存储"""
 
-    def __init__(self, tasks_dir: Optional[Path] = None):
+    def __init__(self, tasks_dir: Optional[Path] = None, durable: bool = TASK_FSYNC):
         """
         初始化Repository
 
         Args:
             tasks_dir: 任务存储目录，默认使用session配置
+            durable: 任务文件写入后是否 fsync（文件和目录），默认按 TASK_FSYNC
         """
         self._tasks_dir = tasks_dir or get_tasks_dir()
+        self._durable = durable
         self._ensure_directory()
+        self._ids = TaskIdAllocator(self._tasks_dir)
+        self._write_lock = DirLock.for_dir(self._tasks_dir)
+        self._journal = TaskJournal(self._tasks_dir)
+        self._tx = threading.local()  # 当前线程的事务暂存区
+        with self._locked():
+            pass  # 重放上一次中断的提交
 
     @property
     def tasks_dir(self) -> Path:
@@ -45,13 +62,30 @@ class TaskRepository:
         self.tasks_dir.mkdir(parents=True, exist_ok=True)
 
     def get_next_id(self) -> int:
-        """获取下一个可用的任务ID"""
-        ids = [
-            int(f.stem.split("_")[1])
-            for f in self.tasks_dir.glob("task_*.json")
-            if f.stem.split("_")[1].isdigit()
-        ]
-        return max(ids) + 1 if ids else 1
+        """分配下一个任务ID（已占用，不会再分配给其他调用者）"""
+        return self._ids.allocate()
+
+    def allocate_ids(self, count: int) -> range:
+        """
+        批量分配连续的任务ID
+
+        Args:
+            count: 数量
+
+        Returns:
+            range(first, first + count)
+        """
+        return self._ids.allocate_range(count)
+
+    def _file_path(self, task: Task) -> Path:
+        """任务文件路径：tasks/task_{id}_{slug}.json"""
+        return self.tasks_dir / f"task_{task.id}_{_slug(task.subject)}.json"
+
+    def _task_files(self, task_id: int) -> List[Path]:
+        """任务的所有文件（包括 slug 为空时旧代码写入的 task_{id}.json）"""
+        files = list(self.tasks_dir.glob(f"task_{task_id}_*.json"))
+        legacy = self.tasks_dir / f"task_{task_id}.json"
+        return files + [legacy] if legacy.is_file() else files
 
     def _find_file(self, task_id: int) -> Path:
         """
@@ -66,18 +100,21 @@ class TaskRepository:
         Raises:
             TaskNotFoundError: 任务不存在
         """
-        matches = list(self.tasks_dir.glob(f"task_{task_id}_*.json"))
+        matches = self._task_files(task_id)
         if not matches:
             raise TaskNotFoundError(task_id)
         return matches[0]
 
     def exists(self, task_id: int) -> bool:
         """检查任务是否存在"""
-        return bool(list(self.tasks_dir.glob(f"task_{task_id}_*.json")))
+        staged = self._staged()
+        if staged is not None and task_id in staged:
+            return staged[task_id] is not None
+        return bool(self._task_files(task_id))
 
     def get_by_id(self, task_id: int) -> Task:
         """
-        根据ID获取任务
+        根据ID获取任务（事务中会看到本事务暂存的修改）
 
         Args:
             task_id: 任务ID
@@ -88,12 +125,15 @@ class TaskRepository:
         Raises:
             TaskNotFoundError: 任务不存在
         """
+        staged = self._staged()
+        if staged is not None and task_id in staged:
+            return self._staged_copy(staged, task_id)
         file_path = self._find_file(task_id)
         return self._load_from_file(file_path)
 
     def save(self, task: Task) -> None:
         """
-        保存任务
+        保存任务（事务中只暂存，提交时写入）
 
         Args:
             task: 任务对象
@@ -101,20 +141,36 @@ class TaskRepository:
         Raises:
             TaskValidationError: 任务数据验证失败
         """
+        staged = self._staged()
+        if staged is not None:
+            staged[task.id] = task.model_copy(deep=True)
+            return
         try:
-            # 删除旧文件
-            for old_file in self.tasks_dir.glob(f"task_{task.id}_*.json"):
-                old_file.unlink()
-
-            # 保存新文件
-            slug = _slug(task.subject)
-            file_path = get_task_file_path(task.id, slug)
-            self._save_to_file(task, file_path)
-
+            with self._locked():
+                self._write_task(task)
             logger.info(f"Task {task.id} saved successfully")
         except Exception as e:
             logger.error(f"Failed to save task {task.id}: {e}")
-            raise TaskValidationError(f"Failed to save task: {e}")
+            raise TaskValidationError(f"Failed to save task: {e}") from e
+
+    def insert_many(self, tasks: List[Task]) -> None:
+        """
+        批量写入新任务（一个事务：要么全部写入，要么都不写入）
+
+        Args:
+            tasks: 任务列表（ID 由 allocate_ids 分配）
+
+        Raises:
+            TaskValidationError: 写入失败
+        """
+        try:
+            with self.transaction():
+                for task in tasks:
+                    self.save(task)
+        except Exception as e:
+            logger.error(f"Failed to insert tasks: {e}")
+            raise TaskValidationError(f"Failed to insert tasks: {e}") from e
+        logger.info(f"{len(tasks)} tasks inserted")
 
     def delete(self, task_id: int) -> None:
         """
@@ -126,8 +182,16 @@ class TaskRepository:
         Raises:
             TaskNotFoundError: 任务不存在
         """
-        file_path = self._find_file(task_id)
-        file_path.unlink()
+        staged = self._staged()
+        if staged is not None:
+            if not self.exists(task_id):
+                raise TaskNotFoundError(task_id)
+            staged[task_id] = None
+            return
+        with self._locked():
+            if not self._task_files(task_id):
+                raise TaskNotFoundError(task_id)
+            self._remove_task(task_id)
         logger.info(f"Task {task_id} deleted")
 
     def find_all(self) -> List[Task]:
@@ -144,7 +208,7 @@ class TaskRepository:
                 tasks.append(task)
             except Exception as e:
                 logger.warning(f"Failed to load task from {file_path}: {e}")
-        return tasks
+        return self._overlay(tasks)
 
     def find_by_status(self, status: TaskStatus) -> List[Task]:
         """
@@ -224,10 +288,7 @@ class TaskRepository:
     def _save_to_file(self, task: Task, file_path: Path) -> None:
         """保存任务到文件"""
         data = self._serialize(task)
-        file_path.write_text(
-            json.dumps(data, indent=2, ensure_ascii=False),
-            encoding='utf-8'
-        )
+        atomic_write_text(file_path, json.dumps(data, indent=2, ensure_ascii=False), durable=self._durable)
 
     def _serialize(self, task: Task) -> Dict[str, Any]:
         """序列化任务对象"""
@@ -242,6 +303,7 @@ class TaskRepository:
             "owner": task.owner,
             "worktree": task.worktree,
             "tags": task.tags,
+            "plan": task.plan,
             "created_at": task.created_at.isoformat(),
             "updated_at": task.updated_at.isoformat(),
             "completed_at": task.completed_at.isoformat() if task.completed_at else None
@@ -260,20 +322,108 @@ class TaskRepository:
             owner=data.get("owner", ""),
             worktree=data.get("worktree", ""),
             tags=data.get("tags", []),
+            plan=data.get("plan", ""),
             created_at=datetime.fromisoformat(data["created_at"]),
             updated_at=datetime.fromisoformat(data["updated_at"]),
             completed_at=datetime.fromisoformat(data["completed_at"]) if data.get("completed_at") else None
         )
 
+    # ========== 写入与事务 ==========
+
     @contextmanager
-    def transaction(self):
-        """
-        事务上下文管理器（简单实现）
+    def _locked(self) -> Iterator[None]:
+        """目录写锁；最外层加锁时先重放未完成的提交"""
+        with self._write_lock as lock:
+            if lock.outermost:
+                self._recover()
+            yield
+
+    def _recover(self) -> None:
+        records = self._journal.pending()
+        if records is None:
+            return
+        logger.warning(f"Replaying task journal in {self.tasks_dir} ({len(records)} changes)")
+        self._apply(records)
+        self._journal.clear()
+
+    def _staged(self) -> Optional[Dict[int, Optional[Task]]]:
+        """当前线程事务中暂存的修改（任务ID -> 任务；None 表示删除），不在事务中时返回 None"""
+        return getattr(self._tx, "ops", None)
+
+    @staticmethod
+    def _staged_copy(staged: Dict[int, Optional[Task]], task_id: int) -> Task:
+        task = staged[task_id]
+        if task is None:
+            raise TaskNotFoundError(task_id)
+        return task.model_copy(deep=True)
+
+    def _overlay(self, tasks: List[Task]) -> List[Task]:
+        """把事务中暂存的修改叠加到查询结果上"""
+        staged = self._staged()
+        if not staged:
+            return tasks
+        merged = {task.id: task for task in tasks}
+        for task_id, task in staged.items():
+            if task is None:
+                merged.pop(task_id, None)
+            else:
+                merged[task_id] = task.model_copy(deep=True)
+        return list(merged.values())
+
+    def _write_task(self, task: Task) -> None:
+        """写入任务文件（调用方持有写锁）；slug 变化时先把旧文件 rename 为新文件名"""
+        target = self._file_path(task)
+        olds = [f for f in self._task_files(task.id) if f != target]
+        if olds:
+            os.replace(olds[0], target)
+            for extra in olds[1:]:
+                extra.unlink(missing_ok=True)
+        self._save_to_file(task, target)
+
+    def _remove_task(self, task_id: int) -> None:
+        """删除任务文件（调用方持有写锁）"""
+        for f in self._task_files(task_id):
+            f.unlink(missing_ok=True)
+        if self._durable:
+            fsync_dir(self.tasks_dir)
+
+    def _apply(self, records: List[tuple]) -> None:
+        for task_id, data in records:
+            if data is None:
+                self._remove_task(task_id)
+            else:
+                self._write_task(self._deserialize(data))
+
+    def _commit(self, staged: Dict[int, Optional[Task]]) -> None:
+        """提交暂存的修改：多于一个任务时先写预写日志"""
+        records = [
+            (task_id, None if task is None else self._serialize(task))
+            for task_id, task in sorted(staged.items())
+        ]
+        if len(records) > 1:
+            self._journal.write(records)
+        self._apply(records)
+        if len(records) > 1:
+            self._journal.clear()
 
-        在实际数据库实现中，这里会处理真正的事务
+    @contextmanager
+    def transaction(self) -> Iterator["TaskRepository"]:
         """
-        try:
+        事务：持有目录写锁，期间的 save / delete 暂存在内存（本线程的读取能看到），
+        正常退出时经预写日志一起写入，抛出异常时全部丢弃。可以嵌套，只有最外层提交。
+        """
+        if self._staged() is not None:
             yield self
-        except Exception as e:
-            logger.error(f"Transaction failed: {e}")
-            raise
+            return
+
+        with self._locked():
+            self._tx.ops = {}
+            try:
+                yield self
+            except BaseException as e:
+                self._tx.ops = None
+                logger.error(f"Transaction failed: {e}")
+                raise
+            staged, self._tx.ops = self._tx.ops, None
+            if staged:
+                self._commit(staged)
@@ -2,28 +2,79 @@
 Task Service - 业务逻辑层
 负责任务的业务操作和编排
 """
+import functools
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import logging
 
+from backend.app.analysis import rank_documents
+from backend.app.task.config import TASK_EVENT_LOG
 from backend.app.task.models import Task, TaskStatus, TaskPriority
 from backend.app.task.repository import TaskRepository
+from backend.app.task.backends import create_repository
+from backend.app.task.events import TaskEventStream
+from backend.app.task.graph import TaskGraph
 from backend.app.task.exceptions import InvalidTaskStatusError, TaskNotFoundError, TaskValidationError
 
 logger = logging.getLogger(__name__)
 
 
+def _atomic(method):
+    """
+    在仓储事务中执行（读-改-写不会被并发修改覆盖）；事务提交后才发布其中产生的事件。
+    失败时依赖图可能已包含回滚掉的修改，丢弃后下次访问时从仓储重建。
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            with self.events.batch(), self.repository.transaction():
+                return method(self, *args, **kwargs)
+        except BaseException:
+            self._graph = None
+            raise
+    return wrapper
+
+
 class TaskService:
     """任务业务服务"""
 
-    def __init__(self, repository: Optional[TaskRepository] = None):
+    def __init__(self, repository: Optional[TaskRepository] = None,
+                 events: Optional[TaskEventStream] = None):
         """
         初始化Service
 
         Args:
-            repository: 任务仓储，默认创建新实例
-        """
-        self.repository = repository or TaskRepository()
+            repository: 任务仓储，默认按 TASK_BACKEND 创建（见 backends.py）
+            events: 任务事件流，默认按 TASK_EVENT_LOG 决定是否写入 tasks 目录下的日志
+        """
+        self.repository = repository or create_repository()
+        self._graph: Optional[TaskGraph] = None
+        if events is None:
+            log_path = self.repository.tasks_dir / TASK_EVENT_LOG if TASK_EVENT_LOG else None
+            events = TaskEventStream(log_path)
+        self.events = events
+
+    @property
+    def graph(self) -> TaskGraph:
+        """任务依赖图（首次访问时从仓储构建，之后随本服务的写入增量更新）"""
+        if self._graph is None:
+            self._graph = TaskGraph.from_tasks(self.repository.find_all())
+        return self._graph
+
+    def rebuild_graph(self) -> TaskGraph:
+        """丢弃依赖图，从仓储重新构建（其他进程修改了依赖关系时调用）"""
+        self._graph = None
+        return self.graph
+
+    def _save(self, task: Task) -> None:
+        self.repository.save(task)
+        if self._graph is not None:
+            self._graph.update(task)
+
+    def _delete(self, task_id: int) -> None:
+        self.repository.delete(task_id)
+        if self._graph is not None:
+            self._graph.remove(task_id)
 
     def create_task(
         self,
@@ -70,11 +121,113 @@ class TaskService:
             updated_at=now
         )
 
-        self.repository.save(task)
+        self._save(task)
+        self.events.publish("created", task_id, subject=subject, priority=priority.value, owner=owner)
         logger.info(f"Task created: {task_id} - {subject}")
 
         return task
 
+    def create_tasks_bulk(self, specs: List[Dict[str, Any]]) -> List[Task]:
+        """
+        批量创建任务：先整体验证，再一次分配一段ID，最后一次写入全部任务和依赖
+
+        Args:
+            specs: 任务定义列表，每项支持 create_task 的参数
+                   （subject / description / plan / priority / owner / tags），
+                   以及 depends_on: 本批次中被依赖任务的下标列表
+
+        Returns:
+            创建的任务列表（与 specs 顺序一致）
+
+        Raises:
+            TaskValidationError: 字段无效、依赖下标越界或存在循环依赖（此时不分配ID、不写入）
+        """
+        if not specs:
+            return []
+
+        # 1. 用临时ID（下标 + 1）构建并验证全部任务
+        now = datetime.now()
+        drafts = []
+        for index, spec in enumerate(specs):
+            depends_on = list(spec.get("depends_on", []))
+            for dep in depends_on:
+                if not isinstance(dep, int) or not 0 <= dep < len(specs):
+                    raise TaskValidationError(f"Task #{index}: invalid depends_on index {dep!r}")
+            try:
+                drafts.append(Task(
+                    id=index + 1,
+                    subject=spec["subject"],
+                    description=spec.get("description", ""),
+                    plan=spec.get("plan", ""),
+                    priority=TaskPriority(spec.get("priority", TaskPriority.MEDIUM)),
+                    owner=spec.get("owner", ""),
+                    tags=spec.get("tags") or [],
+                    blocked_by=[dep + 1 for dep in depends_on],
+                    created_at=now,
+                    updated_at=now,
+                ))
+            except (KeyError, ValueError) as e:
+                raise TaskValidationError(f"Task #{index}: {e}") from e
+        for draft in drafts:
+            for dep in draft.blocked_by:
+                drafts[dep - 1].blocks.append(draft.id)
+        TaskGraph.from_tasks(drafts).topological_order()  # 有环时抛出 TaskValidationError
+
+        # 2. 分配连续ID并重写依赖边
+        ids = self.repository.allocate_ids(len(drafts))
+        remap = {draft.id: task_id for draft, task_id in zip(drafts, ids)}
+        tasks = [
+            draft.model_copy(update={
+                "id": remap[draft.id],
+                "blocked_by": sorted(remap[i] for i in draft.blocked_by),
+                "blocks": sorted(remap[i] for i in draft.blocks),
+            })
+            for draft in drafts
+        ]
+
+        # 3. 一次写入
+        self.repository.insert_many(tasks)
+        if self._graph is not None:
+            for task in tasks:
+                self._graph.update(task)
+        for task in tasks:
+            self.events.publish("created", task.id, subject=task.subject, priority=task.priority.value, owner=task.owner)
+        logger.info(f"Tasks created in bulk: {ids.start}-{ids.stop - 1}")
+        return tasks
+
+    def create_task_tree(
+        self,
+        subject: str,
+        steps: List[Dict[str, Any]],
+        plan: str = "",
+        sequential: bool = True
+    ) -> Tuple[Task, List[Task]]:
+        """
+        创建任务树：父任务 + 步骤子任务，父任务被所有子任务阻塞
+
+        Args:
+            subject: 父任务主题
+            steps: 子任务定义（同 create_tasks_bulk，depends_on 为 steps 中的下标）
+            plan: 父任务的执行计划
+            sequential: 是否让每个步骤依赖前一个步骤
+
+        Returns:
+            (父任务, 子任务列表)
+
+        Raises:
+            TaskValidationError: 任务定义无效
+        """
+        specs = []
+        for index, step in enumerate(steps):
+            depends_on = [dep + 1 if isinstance(dep, int) and dep >= 0 else dep for dep in step.get("depends_on", [])]
+            if sequential and index > 0:
+                depends_on.append(index)
+            specs.append({**step, "depends_on": depends_on})
+        specs.insert(0, {"subject": subject, "plan": plan, "depends_on": list(range(1, len(steps) + 1))})
+
+        tasks = self.create_tasks_bulk(specs)
+        return tasks[0], tasks[1:]
+
     def get_task(self, task_id: int) -> Task:
         """
         获取任务
@@ -90,6 +243,7 @@ class TaskService:
         """
         return self.repository.get_by_id(task_id)
 
+    @_atomic
     def update_task(
         self,
         task_id: int,
@@ -126,11 +280,12 @@ class TaskService:
             task.owner = owner
 
         task.updated_at = datetime.now()
-        self.repository.save(task)
+        self._save(task)
 
         logger.info(f"Task updated: {task_id}")
         return task
 
+    @_atomic
     def change_status(
         self,
         task_id: int,
@@ -162,13 +317,15 @@ class TaskService:
         # 如果任务完成，记录完成时间并解除阻塞
         if status == TaskStatus.COMPLETED:
             task.completed_at = datetime.now()
-            self._unblock_dependent_tasks(task_id)
+            self._unblock_dependent_tasks(task_id, task.blocks)
 
-        self.repository.save(task)
+        self._save(task)
+        self.events.publish("status_changed", task_id, old=old_status.value, new=status.value, owner=task.owner)
 
         logger.info(f"Task {task_id} status changed: {old_status.value} -> {status.value}")
         return task
 
+    @_atomic
     def start_task(self, task_id: int, owner: str = "") -> Task:
         """
         开始任务
@@ -194,9 +351,14 @@ class TaskService:
         if owner:
             task.owner = owner
 
+        old_status = task.status
         task.status = TaskStatus.IN_PROGRESS
         task.updated_at = datetime.now()
-        self.repository.save(task)
+        self._save(task)
+        if old_status != TaskStatus.IN_PROGRESS:
+            self.events.publish("status_changed", task_id, old=old_status.value, new=task.status.value, owner=task.owner)
+        if owner:
+            self.events.publish("claimed", task_id, owner=owner)
 
         logger.info(f"Task {task_id} started by {task.owner}")
 
@@ -217,6 +379,7 @@ class TaskService:
         """
         return self.change_status(task_id, TaskStatus.COMPLETED)
 
+    @_atomic
     def cancel_task(self, task_id: int) -> Task:
         """
         取消任务
@@ -232,9 +395,10 @@ class TaskService:
         """
         task = self.change_status(task_id, TaskStatus.CANCELLED)
         # 取消任务时也解除对其他任务的阻塞
-        self._unblock_dependent_tasks(task_id)
+        self._unblock_dependent_tasks(task_id, task.blocks)
         return task
 
+    @_atomic
     def add_dependency(
         self,
         task_id: int,
@@ -256,6 +420,9 @@ class TaskService:
         """
         task = self.repository.get_by_id(task_id)
         blocking_task = self.repository.get_by_id(depends_on)
+        # 两端用刚读到的最新数据同步到依赖图
+        self.graph.update(task)
+        self.graph.update(blocking_task)
 
         # 检查循环依赖
         if self._has_circular_dependency(task_id, depends_on):
@@ -265,17 +432,18 @@ class TaskService:
 
         # 添加依赖关系
         task.add_blocker(depends_on)
-        self.repository.save(task)
+        self._save(task)
 
         # 更新阻塞任务的blocks列表
         if task_id not in blocking_task.blocks:
             blocking_task.blocks.append(task_id)
             blocking_task.updated_at = datetime.now()
-            self.repository.save(blocking_task)
+            self._save(blocking_task)
 
         logger.info(f"Task {task_id} now depends on task {depends_on}")
         return task
 
+    @_atomic
     def remove_dependency(
         self,
         task_id: int,
@@ -295,8 +463,11 @@ class TaskService:
             TaskNotFoundError: 任务不存在
         """
         task = self.repository.get_by_id(task_id)
+        was_blocked = task.is_blocked()
         task.remove_blocker(depends_on)
-        self.repository.save(task)
+        self._save(task)
+        if was_blocked and not task.is_blocked():
+            self.events.publish("unblocked", task_id, by=depends_on)
 
         # 更新阻塞任务的blocks列表
         try:
@@ -304,13 +475,14 @@ class TaskService:
             if task_id in blocking_task.blocks:
                 blocking_task.blocks.remove(task_id)
                 blocking_task.updated_at = datetime.now()
-                self.repository.save(blocking_task)
+                self._save(blocking_task)
         except TaskNotFoundError:
             pass
 
         logger.info(f"Removed dependency: task {task_id} no longer depends on {depends_on}")
         return task
 
+    @_atomic
     def bind_worktree(
         self,
         task_id: int,
@@ -338,15 +510,23 @@ class TaskService:
             task.owner = owner
 
         # 如果任务是待开始状态，自动转为进行中
-        if task.status == TaskStatus.PENDING:
+        started = task.status == TaskStatus.PENDING
+        if started:
             task.status = TaskStatus.IN_PROGRESS
 
         task.updated_at = datetime.now()
-        self.repository.save(task)
+        self._save(task)
+        if started:
+            self.events.publish("status_changed", task_id, old=TaskStatus.PENDING.value,
+                                new=task.status.value, owner=task.owner)
+        if owner:
+            self.events.publish("claimed", task_id, owner=owner)
+        self.events.publish("bound_worktree", task_id, worktree=worktree, owner=task.owner)
 
         logger.info(f"Task {task_id} bound to worktree: {worktree}")
         return task
 
+    @_atomic
     def unbind_worktree(self, task_id: int) -> Task:
         """
         解绑工作树
@@ -363,11 +543,12 @@ class TaskService:
         task = self.repository.get_by_id(task_id)
         task.worktree = ""
         task.updated_at = datetime.now()
-        self.repository.save(task)
+        self._save(task)
 
         logger.info(f"Task {task_id} worktree unbound")
         return task
 
+    @_atomic
     def add_tag(self, task_id: int, tag: str) -> Task:
         """
         添加标签
@@ -384,11 +565,12 @@ class TaskService:
         """
         task = self.repository.get_by_id(task_id)
         task.add_tag(tag)
-        self.repository.save(task)
+        self._save(task)
 
         logger.info(f"Tag '{tag}' added to task {task_id}")
         return task
 
+    @_atomic
     def remove_tag(self, task_id: int, tag: str) -> Task:
         """
         移除标签
@@ -405,11 +587,12 @@ class TaskService:
         """
         task = self.repository.get_by_id(task_id)
         task.remove_tag(tag)
-        self.repository.save(task)
+        self._save(task)
 
         logger.info(f"Tag '{tag}' removed from task {task_id}")
         return task
 
+    @_atomic
     def delete_task(self, task_id: int) -> None:
         """
         删除任务
@@ -424,7 +607,7 @@ class TaskService:
         task = self.repository.get_by_id(task_id)
 
         # 解除对其他任务的阻塞
-        for blocked_task_id in task.blocks:
+        for blocked_task_id in sorted(set(task.blocks) | self.graph.dependents.get(task_id, set())):
             try:
                 self.remove_dependency(blocked_task_id, task_id)
             except TaskNotFoundError:
@@ -437,12 +620,12 @@ class TaskService:
                 if task_id in blocking_task.blocks:
                     blocking_task.blocks.remove(task_id)
                     blocking_task.updated_at = datetime.now()
-                    self.repository.save(blocking_task)
+                    self._save(blocking_task)
             except TaskNotFoundError:
                 pass
 
         # 删除任务
-        self.repository.delete(task_id)
+        self._delete(task_id)
         logger.info(f"Task {task_id} deleted")
 
     def list_all_tasks(self) -> List[Task]:
@@ -520,6 +703,25 @@ class TaskService:
         """
         return self.repository.find_available_tasks()
 
+    def search_tasks(self, query: str, top_k: Optional[int] = None) -> List[Task]:
+        """
+        按主题、描述和标签搜索任务（中文按字符二元组匹配）
+
+        Args:
+            query: 查询文本
+            top_k: 最多返回的任务数
+
+        Returns:
+            按相关性降序排列的任务列表
+        """
+        tasks = {task.id: task for task in self.repository.find_all()}
+        ranked = rank_documents(
+            query,
+            ((task.id, " ".join([task.subject, task.description, *task.tags])) for task in tasks.values()),
+            top_k=top_k,
+        )
+        return [tasks[task_id] for task_id, _ in ranked]
+
     def _validate_status_transition(
         self,
         from_status: TaskStatus,
@@ -549,54 +751,63 @@ class TaskService:
                 f"Invalid status transition: {from_status.value} -> {to_status.value}"
             )
 
-    def _unblock_dependent_tasks(self, completed_task_id: int) -> None:
+    def _unblock_dependent_tasks(self, completed_task_id: int, blocks: Optional[List[int]] = None) -> None:
         """
-        解除依赖任务的阻塞状态
+        解除依赖任务的阻塞状态（只读取被它阻塞的任务）
 
         Args:
             completed_task_id: 已完成的任务ID
+            blocks: 任务记录的 blocks 列表（与依赖图的反向边合并，防止图中缺少其他进程添加的边）
         """
-        all_tasks = self.repository.find_all()
-        for task in all_tasks:
+        dependents = set(self.graph.dependents.get(completed_task_id, ())) | set(blocks or ())
+        for dependent_id in sorted(dependents):
+            try:
+                task = self.repository.get_by_id(dependent_id)
+            except TaskNotFoundError:
+                continue
             if completed_task_id in task.blocked_by:
                 task.remove_blocker(completed_task_id)
-                self.repository.save(task)
+                self._save(task)
+                if not task.is_blocked():
+                    self.events.publish("unblocked", task.id, by=completed_task_id)
                 logger.info(f"Task {task.id} unblocked by completion of task {completed_task_id}")
 
-    def _has_circular_dependency(
-        self,
-        task_id: int,
-        depends_on: int,
-        visited: Optional[set] = None
-    ) -> bool:
+    def _has_circular_dependency(self, task_id: int, depends_on: int) -> bool:
         """
-        检查是否存在循环依赖
+        检查添加依赖后是否存在循环依赖（在内存依赖图上搜索 depends_on 的上游）
 
         Args:
             task_id: 任务ID
             depends_on: 依赖的任务ID
-            visited: 已访问的任务集合
 
         Returns:
             是否存在循环依赖
         """
-        if visited is None:
-            visited = set()
+        return self.graph.would_cycle(task_id, depends_on)
 
-        if depends_on == task_id:
-            return True
+    def ready_tasks(self) -> List[Task]:
+        """
+        可以开始的任务（PENDING 且阻塞任务都已结束）
 
-        if depends_on in visited:
-            return False
+        Returns:
+            任务列表（按ID排序）
+        """
+        return [self.repository.get_by_id(task_id) for task_id in self.graph.ready_tasks()]
 
-        visited.add(depends_on)
+    def topological_order(self) -> List[int]:
+        """
+        任务ID的拓扑顺序（阻塞任务在前）
 
-        try:
-            blocking_task = self.repository.get_by_id(depends_on)
-            for blocker_id in blocking_task.blocked_by:
-                if self._has_circular_dependency(task_id, blocker_id, visited):
-                    return True
-        except TaskNotFoundError:
-            pass
+        Raises:
+            TaskValidationError: 存在循环依赖
+        """
+        return self.graph.topological_order()
 
-        return False
+    def critical_path(self) -> List[int]:
+        """
+        未结束任务中最长的依赖链
+
+        Returns:
+            从最上游到最下游的任务ID列表
+        """
+        return self.graph.critical_path()
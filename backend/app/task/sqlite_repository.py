@@ -0,0 +1,411 @@
+"""
+SQLite Task Repository - SQLite 任务仓储（WAL 模式）
+
+每个会话的任务存放在 {tasks_dir}/tasks.db：
+
+    tasks       (id PK, subject, description, plan, status, priority, owner, worktree,
+                 created_at, updated_at, completed_at)
+    task_edges  (task_id, kind, other_id)   kind = blocked_by / blocks，每个任务各自拥有自己的边
+    task_tags   (task_id, tag)
+    task_meta   (key PK, value)             next_id 计数器、JSON 导入标记
+
+- find_by_status / owner / priority 走 tasks 上的索引；find_by_tags 走 task_tags(tag)；
+  被阻塞 / 可开始的任务走 task_edges(kind, task_id)，"谁被 X 阻塞" 走 task_edges(other_id, kind)
+- transaction() 是真正的事务（BEGIN IMMEDIATE）：TaskService 的读-改-写都放在事务中，
+  多个 teammate（线程或进程）同时修改同一任务时依次执行，不会互相覆盖
+- import_json() 把已有的 tasks/task_*.json 一次性导入数据库
+"""
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from backend.app.task.config import TASK_DB_NAME, TASK_SQLITE_BUSY_TIMEOUT
+from backend.app.task.exceptions import TaskNotFoundError, TaskValidationError
+from backend.app.task.models import Task, TaskPriority, TaskStatus
+from backend.app.task.repository import TaskRepository
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    subject TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    plan TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    owner TEXT NOT NULL DEFAULT '',
+    worktree TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    completed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_owner ON tasks(owner, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority, id);
+
+CREATE TABLE IF NOT EXISTS task_edges (
+    task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL CHECK (kind IN ('blocked_by', 'blocks')),
+    other_id INTEGER NOT NULL,
+    PRIMARY KEY (task_id, kind, other_id)
+);
+CREATE INDEX IF NOT EXISTS idx_edges_kind ON task_edges(kind, task_id);
+CREATE INDEX IF NOT EXISTS idx_edges_other ON task_edges(other_id, kind);
+
+CREATE TABLE IF NOT EXISTS task_tags (
+    task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (task_id, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON task_tags(tag, task_id);
+
+CREATE TABLE IF NOT EXISTS task_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+COLUMNS = ("id", "subject", "description", "plan", "status", "priority", "owner", "worktree",
+           "created_at", "updated_at", "completed_at")
+
+
+class SQLiteTaskRepository(TaskRepository):
+    """
+    基于 SQLite 的任务仓储
+
+    同一进程内共用一个连接（由可重入锁串行化，事务期间其他线程等待），
+    进程之间由 SQLite 的 WAL 锁协调。
+    """
+
+    def __init__(self, tasks_dir: Optional[Path] = None, db_path: Optional[Path] = None,
+                 busy_timeout: float = TASK_SQLITE_BUSY_TIMEOUT):
+        """
+        Args:
+            tasks_dir: 任务目录，默认使用当前会话的 tasks 目录
+            db_path: 数据库路径，默认 {tasks_dir}/tasks.db
+            busy_timeout: 等待其他进程写锁的超时（秒）
+        """
+        super().__init__(tasks_dir)
+        self.db_path = db_path or self.tasks_dir / TASK_DB_NAME
+        self._lock = threading.RLock()
+        self._depth = 0  # 事务嵌套深度（只在持有 _lock 时读写）
+
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._lock:
+            # executescript 自带提交；IF NOT EXISTS 保证多进程并发初始化安全
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    # ========== 事务 ==========
+
+    @contextmanager
+    def transaction(self) -> Iterator["SQLiteTaskRepository"]:
+        """
+        写事务（BEGIN IMMEDIATE 先拿到写锁，避免读锁升级时的死锁）
+
+        可以嵌套，只有最外层提交或回滚；事务内的读取看到的是加锁后的最新数据。
+        """
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self
+                finally:
+                    self._depth -= 1
+                return
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            try:
+                yield self
+            except BaseException as e:
+                self._conn.execute("ROLLBACK")
+                logger.error(f"Transaction failed: {e}")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ========== ID 分配 ==========
+
+    def _next_id(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT value FROM task_meta WHERE key = 'next_id'").fetchone()
+        if row is not None:
+            return int(row["value"])
+        top = conn.execute("SELECT MAX(id) FROM tasks").fetchone()[0]
+        return (top or 0) + 1
+
+    def _set_next_id(self, conn: sqlite3.Connection, value: int) -> None:
+        conn.execute(
+            "INSERT INTO task_meta (key, value) VALUES ('next_id', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (str(value),),
+        )
+
+    def get_next_id(self) -> int:
+        """分配下一个任务ID（已占用，不会再分配给其他调用者）"""
+        return self.allocate_ids(1).start
+
+    def allocate_ids(self, count: int) -> range:
+        """
+        批量分配连续的任务ID
+
+        Args:
+            count: 数量
+
+        Returns:
+            range(first, first + count)
+
+        Raises:
+            ValueError: count 小于 1
+        """
+        if count < 1:
+            raise ValueError(f"count must be positive, got {count}")
+        with self.transaction():
+            first = self._next_id(self._conn)
+            self._set_next_id(self._conn, first + count)
+        return range(first, first + count)
+
+    # ========== 读写 ==========
+
+    def _load(self, where: str = "1", params: tuple = ()) -> List[Task]:
+        """按条件加载任务（连同依赖边和标签），按 ID 排序；三次查询在同一个读事务中"""
+        with self._lock:
+            if self._depth:
+                return self._load_rows(where, params)
+            self._conn.execute("BEGIN")
+            try:
+                return self._load_rows(where, params)
+            finally:
+                self._conn.execute("COMMIT")
+
+    def _load_rows(self, where: str, params: tuple) -> List[Task]:
+        rows = self._conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE {where} ORDER BY id", params
+        ).fetchall()
+        if not rows:
+            return []
+        subquery = f"SELECT id FROM tasks WHERE {where}"
+        edges = self._conn.execute(
+            f"SELECT task_id, kind, other_id FROM task_edges WHERE task_id IN ({subquery}) "
+            "ORDER BY task_id, other_id", params
+        ).fetchall()
+        tags = self._conn.execute(
+            f"SELECT task_id, tag FROM task_tags WHERE task_id IN ({subquery}) "
+            "ORDER BY task_id, rowid", params
+        ).fetchall()
+
+        lists: Dict[int, Dict[str, list]] = {row["id"]: {"blocked_by": [], "blocks": [], "tags": []} for row in rows}
+        for edge in edges:
+            lists[edge["task_id"]][edge["kind"]].append(edge["other_id"])
+        for tag in tags:
+            lists[tag["task_id"]]["tags"].append(tag["tag"])
+        return [self._row_to_task(row, lists[row["id"]]) for row in rows]
+
+    @staticmethod
+    def _row_to_task(row: sqlite3.Row, lists: Dict[str, list]) -> Task:
+        return Task(
+            id=row["id"],
+            subject=row["subject"],
+            description=row["description"],
+            plan=row["plan"],
+            status=TaskStatus(row["status"]),
+            priority=TaskPriority(row["priority"]),
+            blocked_by=lists["blocked_by"],
+            blocks=lists["blocks"],
+            owner=row["owner"],
+            worktree=row["worktree"],
+            tags=lists["tags"],
+            created_at=datetime.fromisoformat(row["created_at"]),
+            updated_at=datetime.fromisoformat(row["updated_at"]),
+            completed_at=datetime.fromisoformat(row["completed_at"]) if row["completed_at"] else None,
+        )
+
+    def _write(self, conn: sqlite3.Connection, task: Task) -> None:
+        """写入任务行并替换它拥有的依赖边和标签（调用方负责事务）"""
+        values = (
+            task.id, task.subject, task.description, task.plan, task.status.value, task.priority.value,
+            task.owner, task.worktree, task.created_at.isoformat(), task.updated_at.isoformat(),
+            task.completed_at.isoformat() if task.completed_at else None,
+        )
+        updates = ", ".join(f"{col} = excluded.{col}" for col in COLUMNS[1:])
+        conn.execute(
+            f"INSERT INTO tasks ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}",
+            values,
+        )
+        conn.execute("DELETE FROM task_edges WHERE task_id = ?", (task.id,))
+        conn.executemany(
+            "INSERT INTO task_edges (task_id, kind, other_id) VALUES (?, ?, ?)",
+            [(task.id, "blocked_by", i) for i in task.blocked_by] + [(task.id, "blocks", i) for i in task.blocks],
+        )
+        conn.execute("DELETE FROM task_tags WHERE task_id = ?", (task.id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO task_tags (task_id, tag) VALUES (?, ?)",
+            [(task.id, tag) for tag in task.tags],
+        )
+
+    def exists(self, task_id: int) -> bool:
+        """检查任务是否存在"""
+        return bool(self._query("SELECT 1 FROM tasks WHERE id = ?", (task_id,)))
+
+    def get_by_id(self, task_id: int) -> Task:
+        """
+        根据ID获取任务
+
+        Raises:
+            TaskNotFoundError: 任务不存在
+        """
+        tasks = self._load("id = ?", (task_id,))
+        if not tasks:
+            raise TaskNotFoundError(task_id)
+        return tasks[0]
+
+    def save(self, task: Task) -> None:
+        """
+        保存任务
+
+        Raises:
+            TaskValidationError: 任务数据验证失败
+        """
+        try:
+            with self.transaction():
+                self._write(self._conn, task)
+                # 保存了指定ID的任务（例如导入）时，计数器跳过该ID
+                if self._next_id(self._conn) <= task.id:
+                    self._set_next_id(self._conn, task.id + 1)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save task {task.id}: {e}")
+            raise TaskValidationError(f"Failed to save task: {e}") from e
+        logger.info(f"Task {task.id} saved successfully")
+
+    def insert_many(self, tasks: List[Task]) -> None:
+        """
+        在一个事务中批量写入新任务
+
+        Raises:
+            TaskValidationError: 写入失败（全部回滚）
+        """
+        try:
+            with self.transaction():
+                for task in tasks:
+                    self._write(self._conn, task)
+                top = max((task.id for task in tasks), default=0)
+                if self._next_id(self._conn) <= top:
+                    self._set_next_id(self._conn, top + 1)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to insert tasks: {e}")
+            raise TaskValidationError(f"Failed to insert tasks: {e}") from e
+        logger.info(f"{len(tasks)} tasks inserted")
+
+    def delete(self, task_id: int) -> None:
+        """
+        删除任务（依赖边和标签级联删除）
+
+        Raises:
+            TaskNotFoundError: 任务不存在
+        """
+        with self.transaction():
+            if self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,)).rowcount == 0:
+                raise TaskNotFoundError(task_id)
+        logger.info(f"Task {task_id} deleted")
+
+    # ========== 查询（索引） ==========
+
+    def find_all(self) -> List[Task]:
+        return self._load()
+
+    def find_by_status(self, status: TaskStatus) -> List[Task]:
+        return self._load("status = ?", (status.value,))
+
+    def find_by_owner(self, owner: str) -> List[Task]:
+        return self._load("owner = ?", (owner,))
+
+    def find_by_priority(self, priority: TaskPriority) -> List[Task]:
+        return self._load("priority = ?", (priority.value,))
+
+    def find_by_tags(self, tags: List[str]) -> List[Task]:
+        tags_lower = [tag.lower() for tag in tags]
+        if not tags_lower:
+            return []
+        marks = ", ".join("?" * len(tags_lower))
+        return self._load(f"id IN (SELECT task_id FROM task_tags WHERE tag IN ({marks}))", tuple(tags_lower))
+
+    def find_blocked_tasks(self) -> List[Task]:
+        return self._load("id IN (SELECT task_id FROM task_edges WHERE kind = 'blocked_by')")
+
+    def find_available_tasks(self) -> List[Task]:
+        return self._load(
+            "status = ? AND id NOT IN (SELECT task_id FROM task_edges WHERE kind = 'blocked_by')",
+            (TaskStatus.PENDING.value,),
+        )
+
+    def find_blocked_by(self, task_id: int) -> List[Task]:
+        """查询被 task_id 阻塞的任务（反向依赖边索引）"""
+        return self._load(
+            "id IN (SELECT task_id FROM task_edges WHERE other_id = ? AND kind = 'blocked_by')", (task_id,)
+        )
+
+    # ========== 导入 ==========
+
+    def import_json(self, source_dir: Optional[Path] = None, force: bool = False) -> int:
+        """
+        一次性导入 JSON 文件仓储中的任务（已存在的ID跳过）
+
+        Args:
+            source_dir: JSON 任务目录，默认与数据库相同的 tasks 目录
+            force: 已导入过时仍然重新导入
+
+        Returns:
+            导入的任务数
+        """
+        source = TaskRepository(source_dir or self.tasks_dir)
+        with self.transaction():
+            if not force and self._conn.execute(
+                "SELECT 1 FROM task_meta WHERE key = 'json_imported'"
+            ).fetchone():
+                return 0
+            imported = 0
+            for task in source.find_all():
+                if self._conn.execute("SELECT 1 FROM tasks WHERE id = ?", (task.id,)).fetchone():
+                    continue
+                self._write(self._conn, task)
+                imported += 1
+            top = self._conn.execute("SELECT MAX(id) FROM tasks").fetchone()[0] or 0
+            self._set_next_id(self._conn, max(self._next_id(self._conn), top + 1, source._ids.peek()))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO task_meta (key, value) VALUES ('json_imported', ?)",
+                (datetime.now().isoformat(),),
+            )
+        if imported:
+            logger.info(f"Imported {imported} tasks from {source.tasks_dir}")
+        return imported
+
+    def close(self) -> None:
+        """把 WAL 合并回主库并关闭连接"""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            finally:
+                self._conn.close()
+                self._conn = None
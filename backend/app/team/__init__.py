@@ -1,6 +1,7 @@
+from backend.app.team.claim_queue import ClaimQueue
 from backend.app.team.message_bus import MessageBus, VALID_MSG_TYPES
 from backend.app.team.teammate_manager import TeammateManager
-from backend.app.team.state import get_bus, get_team, shutdown_requests, plan_requests, tracker_lock
+from backend.app.team.state import get_bus, get_team, get_claim_queue, shutdown_requests, plan_requests, tracker_lock
 
-__all__ = ["MessageBus", "VALID_MSG_TYPES", "TeammateManager", "get_bus", "get_team",
+__all__ = ["ClaimQueue", "MessageBus", "VALID_MSG_TYPES", "TeammateManager", "get_bus", "get_team", "get_claim_queue",
            "shutdown_requests", "plan_requests", "tracker_lock"]
@@ -0,0 +1,387 @@
+"""
+Claim Queue - 团队任务板的优先级认领队列
+
+任务板仍然是一个任务一个 JSON 文件（/tasks 等视图可以直接读取），认领状态另存为租约文件：
+
+    board/
+    ├── task_{id}.json          # 任务；认领后 owner / status / claimed_at 原子更新
+    └── claims/
+        ├── task_{id}.lease     # 租约：O_EXCL 创建，{owner, pid, claimed_at, expires_at}
+        └── .tasks.lock         # 打破、续租、删除租约时持有的目录锁（journal.DirLock）
+
+- 内存中维护按 (优先级, 创建时间, ID) 排序的最小堆；任务板目录 mtime 变化时只重新解析签名变化的文件，
+  认领只需弹出堆顶并创建租约文件，O(log n)
+- 租约文件用 O_EXCL 创建，多个进程同时认领同一任务时只有一个成功
+- teammate 崩溃后租约过期：持有 claims/ 目录锁重新读取、确认仍已过期后删除，任务恢复为未认领并重新入堆；
+  检查和删除之间其他认领者不能打破后重建租约（否则会把新租约删掉，同一任务被认领两次）；
+  长任务可以调用 renew 续租（同样持有目录锁，不会在打破过期租约的过程中被续上）
+- 租约的过期时间缓存在内存中：claims/ 目录 mtime 变化时只重新解析签名变化的租约文件，
+  最早的过期时间到达之前不检查过期
+- 认领、释放和租约过期在 events 上发布 claimed / status_changed 事件，空闲的 teammate 订阅后立即被唤醒
+"""
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.app.task import TaskPriority, TaskStatus
+from backend.app.task.events import TaskEventStream
+from backend.app.task.journal import DirLock, atomic_write_text
+from backend.app.team.config import TEAM_CLAIM_LEASE
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_RANK = {
+    TaskPriority.URGENT.value: 0,
+    TaskPriority.HIGH.value: 1,
+    TaskPriority.MEDIUM.value: 2,
+    TaskPriority.LOW.value: 3,
+}
+
+FileSig = Tuple[int, int, int]  # (mtime_ns, size, inode)
+
+
+def _claimable(task: Dict[str, Any]) -> bool:
+    return task.get("status") == TaskStatus.PENDING and not task.get("owner") and not task.get("blockedBy")
+
+
+class ClaimQueue:
+    """
+    任务板认领队列（同一任务板在进程内共用一个实例，见 team.state.get_claim_queue）
+
+    Usage:
+        queue = ClaimQueue(board_dir)
+        task = queue.claim("alice")              # 优先级最高、最早创建的可认领任务
+        queue.renew(task["id"], "alice")         # 长任务续租
+        queue.release(task["id"], "alice", TaskStatus.COMPLETED)
+    """
+
+    def __init__(self, board_dir: Path, lease_seconds: float = TEAM_CLAIM_LEASE):
+        """
+        Args:
+            board_dir: 任务板目录
+            lease_seconds: 租约有效期（秒）
+        """
+        self.board_dir = board_dir
+        self.claims_dir = board_dir / "claims"
+        self.claims_dir.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._lease_lock = DirLock.for_dir(self.claims_dir)
+        self._dir_mtime: Optional[int] = None
+        self._tasks: Dict[int, Dict[str, Any]] = {}
+        self._sigs: Dict[str, FileSig] = {}
+        self._ages: Dict[int, float] = {}
+        self._heap: List[Tuple[int, float, int, int]] = []  # (优先级, 创建时间, ID, 版本)
+        self._versions: Dict[int, int] = {}
+        self._claims_mtime: Optional[int] = None
+        self._leases: Dict[str, Tuple[FileSig, float]] = {}  # 租约文件名 -> (签名, expires_at)
+        self._next_expiry = float("inf")
+        self.events = TaskEventStream()
+
+    # ========== 路径 ==========
+
+    def _task_path(self, task_id: int) -> Path:
+        return self.board_dir / f"task_{task_id}.json"
+
+    def _lease_path(self, task_id: int) -> Path:
+        return self.claims_dir / f"task_{task_id}.lease"
+
+    # ========== 同步 ==========
+
+    def _push(self, task_id: int) -> None:
+        """任务（重新）入堆；旧的堆项因版本不符在弹出时丢弃"""
+        task = self._tasks[task_id]
+        version = self._versions.get(task_id, 0) + 1
+        self._versions[task_id] = version
+        rank = PRIORITY_RANK.get(task.get("priority", TaskPriority.MEDIUM.value), PRIORITY_RANK["medium"])
+        heapq.heappush(self._heap, (rank, self._ages[task_id], task_id, version))
+
+    def _track(self, task: Dict[str, Any], name: str, sig: FileSig, mtime: float) -> None:
+        task_id = task["id"]
+        self._tasks[task_id] = task
+        self._sigs[name] = sig
+        if task_id not in self._ages:
+            created = task.get("created_at")
+            self._ages[task_id] = created if isinstance(created, (int, float)) else mtime
+        if _claimable(task):
+            self._push(task_id)
+
+    @staticmethod
+    def _settled(mtime_ns: int) -> bool:
+        """目录 mtime 刚变化时不记录：同一时刻的后续写入可能不再改变 mtime"""
+        return time.time_ns() - mtime_ns > 2_000_000_000
+
+    def _sync(self) -> None:
+        """任务板目录变化时增量加载（调用方持有 _lock）"""
+        mtime = os.stat(self.board_dir).st_mtime_ns
+        if mtime != self._dir_mtime:
+            seen = set()
+            with os.scandir(self.board_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if not (name.startswith("task_") and name.endswith(".json")):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    seen.add(name)
+                    sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+                    if self._sigs.get(name) == sig:
+                        continue
+                    try:
+                        task = json.loads(Path(entry.path).read_text())
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"Failed to load board task {entry.path}: {e}")
+                        continue
+                    self._track(task, name, sig, st.st_mtime)
+            for name in [n for n in self._sigs if n not in seen]:
+                del self._sigs[name]
+                task_id = int(name[len("task_"):-len(".json")])
+                self._tasks.pop(task_id, None)
+                self._versions.pop(task_id, None)
+                self._ages.pop(task_id, None)
+            self._dir_mtime = mtime if self._settled(mtime) else None
+        self._expire_leases()
+
+    def _write_task(self, task: Dict[str, Any]) -> None:
+        path = self._task_path(task["id"])
+        atomic_write_text(path, json.dumps(task, indent=2, ensure_ascii=False))
+        st = path.stat()
+        self._track(task, path.name, (st.st_mtime_ns, st.st_size, st.st_ino), st.st_mtime)
+
+    # ========== 租约 ==========
+
+    def _read_lease(self, task_id: int) -> Optional[Dict[str, Any]]:
+        path = self._lease_path(task_id)
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            # 创建者还没写完内容（或在写入前崩溃）：从文件创建时间起算有效期
+            try:
+                created = path.stat().st_mtime
+            except FileNotFoundError:
+                return None
+            return {"owner": "", "expires_at": created + self.lease_seconds}
+
+    def _acquire_lease(self, task_id: int, owner: str) -> bool:
+        """O_EXCL 创建租约文件；已有过期租约时先打破再重试一次"""
+        for _ in range(2):
+            now = time.time()
+            lease = {"task_id": task_id, "owner": owner, "pid": os.getpid(),
+                     "claimed_at": now, "expires_at": now + self.lease_seconds}
+            try:
+                fd = os.open(self._lease_path(task_id), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                if not self._break_expired(task_id):
+                    return False
+                continue
+            with os.fdopen(fd, "w") as f:
+                json.dump(lease, f)
+            return True
+        return False
+
+    def _break_expired(self, task_id: int) -> bool:
+        """
+        打破过期租约：持有目录锁重新读取，仍已过期才删除
+
+        Returns:
+            租约已不存在（可以重新创建）
+        """
+        with self._lease_lock:
+            lease = self._read_lease(task_id)
+            if lease is None:
+                return True
+            if lease.get("expires_at", 0) > time.time():
+                return False
+            self._lease_path(task_id).unlink(missing_ok=True)
+        logger.warning(f"Lease on board task {task_id} held by {lease.get('owner')!r} expired")
+        return True
+
+    def _scan_leases(self) -> None:
+        """claims/ 目录变化时增量更新租约过期时间（调用方持有 _lock）"""
+        mtime = os.stat(self.claims_dir).st_mtime_ns
+        if mtime == self._claims_mtime:
+            return
+        leases: Dict[str, Tuple[FileSig, float]] = {}
+        with os.scandir(self.claims_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.endswith(".lease"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+                known = self._leases.get(name)
+                if known is not None and known[0] == sig:
+                    leases[name] = known
+                    continue
+                lease = self._read_lease(int(name[len("task_"):-len(".lease")]))
+                if lease is not None:
+                    leases[name] = (sig, lease.get("expires_at", 0))
+        self._leases = leases
+        self._next_expiry = min((expires for _, expires in leases.values()), default=float("inf"))
+        self._claims_mtime = mtime if self._settled(mtime) else None
+
+    def _expire_leases(self) -> None:
+        """过期租约对应的任务恢复为未认领并重新入堆（调用方持有 _lock）"""
+        self._scan_leases()
+        now = time.time()
+        if now < self._next_expiry:
+            return
+        for name, (sig, expires_at) in list(self._leases.items()):
+            if expires_at > now:
+                continue
+            task_id = int(name[len("task_"):-len(".lease")])
+            # 缓存可能落后于续租：重新读取后再判断
+            lease = self._read_lease(task_id)
+            if lease is not None and lease.get("expires_at", 0) > now:
+                self._leases[name] = (sig, lease["expires_at"])
+                continue
+            if lease is None or not self._break_expired(task_id):
+                self._leases.pop(name, None)
+                continue
+            self._leases.pop(name, None)
+            task = self._tasks.get(task_id)
+            if task is not None and task.get("owner") == lease.get("owner") \
+                    and task.get("status") == TaskStatus.IN_PROGRESS:
+                task = dict(task, owner="", status=TaskStatus.PENDING.value)
+                task.pop("claimed_at", None)
+                self._write_task(task)
+                self.events.publish("status_changed", task_id, old=TaskStatus.IN_PROGRESS.value,
+                                    new=TaskStatus.PENDING.value, owner="")
+            elif task is not None and _claimable(task):
+                # 认领者在更新任务 JSON 之前崩溃：任务仍可认领，但堆项已在认领失败时弹出
+                self._push(task_id)
+        self._next_expiry = min((expires for _, expires in self._leases.values()), default=float("inf"))
+
+    # ========== 认领 ==========
+
+    def _take(self, task_id: int, owner: str) -> Optional[Dict[str, Any]]:
+        """创建租约并更新任务 JSON（调用方持有 _lock）"""
+        if not self._acquire_lease(task_id, owner):
+            return None
+        # 拿到租约后重新读取，防止其他进程已经修改了任务
+        try:
+            task = json.loads(self._task_path(task_id).read_text())
+        except (OSError, ValueError):
+            self._lease_path(task_id).unlink(missing_ok=True)
+            return None
+        if not _claimable(task):
+            self._lease_path(task_id).unlink(missing_ok=True)
+            return None
+        task.update(owner=owner, status=TaskStatus.IN_PROGRESS.value, claimed_at=time.time())
+        self._write_task(task)
+        self.events.publish("claimed", task_id, owner=owner)
+        return task
+
+    def claim(self, owner: str) -> Optional[Dict[str, Any]]:
+        """
+        认领优先级最高、最早创建的可认领任务
+
+        Args:
+            owner: 认领者
+
+        Returns:
+            认领到的任务；没有可认领的任务时返回 None
+        """
+        with self._lock:
+            self._sync()
+            skipped = []  # 被其他认领者的租约占用的任务，结束后放回堆中
+            try:
+                while self._heap:
+                    entry = heapq.heappop(self._heap)
+                    _, _, task_id, version = entry
+                    task = self._tasks.get(task_id)
+                    if task is None or self._versions.get(task_id) != version or not _claimable(task):
+                        continue
+                    claimed = self._take(task_id, owner)
+                    if claimed is not None:
+                        logger.info(f"Board task {task_id} claimed by {owner}")
+                        return claimed
+                    skipped.append(entry)
+                return None
+            finally:
+                for entry in skipped:
+                    heapq.heappush(self._heap, entry)
+
+    def claim_task(self, task_id: int, owner: str) -> str:
+        """
+        认领指定任务
+
+        Returns:
+            结果描述（"Error: ..." 表示失败）
+        """
+        with self._lock:
+            self._sync()
+            if not self._task_path(task_id).exists():
+                return f"Error: Task {task_id} not found"
+            task = self._tasks.get(task_id, {})
+            if task.get("owner"):
+                return f"Error: Task {task_id} already claimed by {task['owner']}"
+            if self._take(task_id, owner) is None:
+                lease = self._read_lease(task_id) or {}
+                holder = lease.get("owner") or self._tasks.get(task_id, {}).get("owner") or "another teammate"
+                return f"Error: Task {task_id} already claimed by {holder}"
+        return f"Claimed task #{task_id} for {owner}"
+
+    def renew(self, task_id: int, owner: str) -> bool:
+        """
+        续租（长任务执行期间定期调用）
+
+        Returns:
+            是否仍持有租约
+        """
+        with self._lease_lock:
+            lease = self._read_lease(task_id)
+            if lease is None or lease.get("owner") != owner:
+                return False
+            lease["expires_at"] = time.time() + self.lease_seconds
+            atomic_write_text(self._lease_path(task_id), json.dumps(lease), durable=False)
+        return True
+
+    def release(self, task_id: int, owner: str, status: TaskStatus = TaskStatus.COMPLETED) -> None:
+        """
+        结束认领：更新任务状态并删除租约
+
+        Args:
+            task_id: 任务ID
+            owner: 认领者
+            status: 任务的新状态（PENDING 表示放弃，任务重新入堆）
+        """
+        with self._lock:
+            self._sync()
+            try:
+                task = json.loads(self._task_path(task_id).read_text())
+            except (OSError, ValueError):
+                task = None
+            if task is not None and task.get("owner") == owner:
+                old_status = task.get("status")
+                task["status"] = status.value
+                if status == TaskStatus.PENDING:
+                    task["owner"] = ""
+                    task.pop("claimed_at", None)
+                self._write_task(task)
+                self.events.publish("status_changed", task_id, old=old_status, new=status.value, owner=task["owner"])
+            with self._lease_lock:
+                lease = self._read_lease(task_id)
+                if lease is not None and lease.get("owner") == owner:
+                    self._lease_path(task_id).unlink(missing_ok=True)
+
+    def unclaimed(self) -> List[Dict[str, Any]]:
+        """可认领的任务，按认领顺序排列"""
+        with self._lock:
+            self._sync()
+            ready = [t for t in self._tasks.values() if _claimable(t)]
+            return sorted(ready, key=lambda t: (
+                PRIORITY_RANK.get(t.get("priority", "medium"), PRIORITY_RANK["medium"]), self._ages[t["id"]], t["id"]
+            ))
@@ -0,0 +1,7 @@
+"""
+Team 包配置
+"""
+import os
+
+# 团队任务板认领租约有效期（秒）：teammate 崩溃后超过该时间未续租，任务重新变为可认领
+TEAM_CLAIM_LEASE = float(os.getenv("TEAM_CLAIM_LEASE", "1800"))
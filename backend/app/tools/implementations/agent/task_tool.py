@@ -35,34 +35,17 @@ def task_create_from_plan(subject: str, plan: str) -> str:
     try:
         service = get_task_service()
 
-        # 1. 创建父任务
-        parent_task = service.create_task(subject, plan=plan)
-
-        # 2. 解析Plan中的步骤
-        steps = _parse_plan_steps(plan)
-
-        # 3. 为每个步骤创建子任务
-        subtask_ids = []
-        prev_task_id = None
-
-        for i, step in enumerate(steps, 1):
-            step_subject = f"Step {i}: {step['name']}"
-            step_desc = f"What: {step.get('what', '')}\nWhy: {step.get('why', '')}"
-
-            subtask = service.create_task(
-                subject=step_subject,
-                description=step_desc
-            )
-
-            # 建立依赖：当前步骤依赖前一个步骤
-            if prev_task_id:
-                service.add_dependency(subtask.id, prev_task_id)
-
-            # 父任务阻塞所有子任务
-            service.add_dependency(parent_task.id, subtask.id)
-
-            subtask_ids.append(subtask.id)
-            prev_task_id = subtask.id
+        # 解析Plan中的步骤，整棵树一次验证、一次分配ID、一次写入：
+        # 当前步骤依赖前一个步骤，父任务被所有子任务阻塞
+        steps = [
+            {
+                "subject": f"Step {i}: {step['name']}",
+                "description": f"What: {step.get('what', '')}\nWhy: {step.get('why', '')}",
+            }
+            for i, step in enumerate(_parse_plan_steps(plan), 1)
+        ]
+        parent_task, subtasks = service.create_task_tree(subject, steps, plan=plan)
+        subtask_ids = [task.id for task in subtasks]
 
         logger.info(f"Created task tree: parent={parent_task.id}, subtasks={subtask_ids}")
 
@@ -15,6 +15,9 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 from collections import defaultdict, Counter
 
+from backend.app.core.guards.tracer import flush_traces
+from backend.app.session.segments import iter_lines, stream_exists
+
 
 class ExperienceLearner:
     """经验学习器基类 - 强化学习式的工具使用优化"""
@@ -32,17 +35,17 @@ class ExperienceLearner:
 
     def analyze_session(self) -> Dict[str, Any]:
         """分析整个 session 的执行轨迹"""
-        if not self.trace_file.exists():
+        flush_traces()  # 写入后台队列中尚未落盘的事件
+        if not stream_exists(self.trace_file):
             return {"error": "trace.jsonl not found"}
 
-        # 读取所有事件
+        # 读取所有事件（包括已轮转的压缩分段）
         events = []
-        with open(self.trace_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    events.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
+        for line in iter_lines(self.trace_file):
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
 
         # 提取关键信息
         task_prompt = self._extract_task_prompt(events)
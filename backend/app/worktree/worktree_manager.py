@@ -4,9 +4,9 @@ import subprocess
 import time
 from pathlib import Path
 
-from backend.app.worktree.event_bus import EventBus
-from backend.app.task import TaskStatus, TaskConverter
+from backend.app.task import TaskStatus
 from backend.app.task.exceptions import TaskNotFoundError
+from backend.app.worktree.event_bus import EventBus
 
 
 class WorktreeManager:
@@ -20,6 +20,21 @@ class WorktreeManager:
         if not self.index_path.exists():
             self.index_path.write_text(json.dumps({"worktrees": []}, indent=2))
         self.git_available = self._is_git_repo()
+        # 任务被认领 / 解除阻塞时立即记入事件日志，worktree_events 不必等任务文件被重新读取
+        events_stream = getattr(tasks, "events", None)
+        self._task_events = events_stream.subscribe(
+            {"claimed", "unblocked"}, callback=self._on_task_event
+        ) if events_stream is not None else None
+
+    def _on_task_event(self, event):
+        task = {"id": event.task_id, **event.data}
+        self.events.emit(f"task.{event.kind}", task=task)
+
+    def close(self):
+        """取消任务事件订阅（丢弃管理器前调用，否则任务服务会一直持有它的回调）"""
+        if self._task_events is not None:
+            self._task_events.close()
+            self._task_events = None
 
     def _is_git_repo(self) -> bool:
         try:
@@ -0,0 +1,9 @@
+"""
+性能基准测试
+
+每个子包对应一个子系统，基准脚本可以直接运行：
+
+    python -m backend.benchmarks.memory.bench_ranking
+    python -m backend.benchmarks.memory.bench_store --output bench.json   # JSON，可与基线对比
+    python -m backend.benchmarks.task.bench_concurrency                  # 任务存储并发吞吐 / 丢失更新
+"""
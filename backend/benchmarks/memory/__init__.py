@@ -0,0 +1 @@
+"""记忆检索基准测试"""
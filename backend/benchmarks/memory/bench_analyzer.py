@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+记忆检索分析器基准：legacy（整句一个词）vs cjk（字符二元组）
+
+用法:
+    python -m backend.benchmarks.memory.bench_analyzer
+    python -m backend.benchmarks.memory.bench_analyzer --sizes 10000 50000 --queries 200
+
+语料见 corpus.py（中文为主的随机双字词句子，夹杂少量英文词），
+查询取目标句中连续的两个词（即句子的一个片段）。统计：
+- terms:   词典大小
+- index:   postings.json + chunks.jsonl 的字节数
+- build:   全量建立索引的耗时
+- p50/p95: 单次 BM25 查询延迟（毫秒）
+- recall:  目标块出现在 top-k 中的比例
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(project_root))
+
+from backend.app.analysis import get_analyzer
+from backend.app.session.memory import MemoryStore
+from backend.benchmarks.memory import corpus
+
+ANALYZERS = ("legacy", "cjk")
+
+
+def run(analyzer_name: str, size: int, queries: int, top_k: int, vocab: int, seed: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp)
+        docs = corpus.generate(size, vocab=vocab, seed=seed)
+        corpus.write_daily(workspace, docs, seed=seed)
+        qs = corpus.make_queries(docs, queries, seed)
+
+        store = MemoryStore(workspace, analyzer=get_analyzer(analyzer_name))
+        started = time.perf_counter()
+        store.index.ensure_fresh()
+        build = time.perf_counter() - started
+        index_bytes = store.index.postings_path.stat().st_size + store.index.chunks_path.stat().st_size
+
+        latencies, hits = [], 0
+        for target, query in qs:
+            tokens = store._tokenize(query)
+            started = time.perf_counter()
+            ranked = store.index.search_bm25(tokens, top_k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += target in [cid for cid, _ in ranked]
+
+        latencies.sort()
+        return {
+            "terms": store.index.stats()["terms"],
+            "index_mb": round(index_bytes / 1e6, 2),
+            "build_s": round(build, 2),
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+            "recall": round(hits / len(qs), 3),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory analyzer benchmark (legacy vs CJK bigrams)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--vocab", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'chunks':>8} {'analyzer':>8} {'terms':>8} {'index':>8} {'build':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'recall':>7}")
+    for size in args.sizes:
+        for name in ANALYZERS:
+            r = run(name, size, args.queries, args.top_k, args.vocab, args.seed)
+            print(f"{size:>8} {name:>8} {r['terms']:>8} {r['index_mb']:>6}MB {r['build_s']:>6}s "
+                  f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['recall']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+记忆检索排序基准：TF-IDF 余弦 vs BM25
+
+用法:
+    python -m backend.benchmarks.memory.bench_ranking
+    python -m backend.benchmarks.memory.bench_ranking --sizes 10000 100000 --queries 200
+
+语料见 corpus.py（zipf=True：词频服从 Zipf 分布），为每个查询预先选定一个目标块，
+取其中连续的两个词作为查询。统计：
+- build:   全量建立倒排索引的耗时
+- p50/p95: 单次查询延迟（毫秒，索引已加载）
+- recall:  目标块出现在 top-k 中的比例
+- overlap: 两种排序 top-k 结果的重合度
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(project_root))
+
+from backend.app.session.memory import MemoryStore
+from backend.benchmarks.memory import corpus
+
+RANKERS = ("tfidf", "bm25")
+
+
+def run(size: int, queries: int, top_k: int, vocab: int, seed: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp)
+        docs = corpus.generate(size, vocab=vocab, seed=seed, zipf=True)
+        corpus.write_daily(workspace, docs, seed=seed)
+        qs = corpus.make_queries(docs, queries, seed)
+
+        store = MemoryStore(workspace)
+        started = time.perf_counter()
+        store.index.ensure_fresh()
+        build = time.perf_counter() - started
+
+        result = {"size": size, "build_s": round(build, 2)}
+        top_sets = {}
+        for ranker in RANKERS:
+            search = store.index.search_bm25 if ranker == "bm25" else store.index.search_tfidf
+            search(store._tokenize(qs[0][1]), top_k)  # 预热（TF-IDF 模长缓存）
+
+            latencies, hits, tops = [], 0, []
+            for target, query in qs:
+                tokens = store._tokenize(query)
+                started = time.perf_counter()
+                ranked = search(tokens, top_k)
+                latencies.append((time.perf_counter() - started) * 1000)
+                ids = [cid for cid, _ in ranked]
+                hits += target in ids
+                tops.append(set(ids))
+
+            latencies.sort()
+            result[ranker] = {
+                "p50_ms": round(statistics.median(latencies), 3),
+                "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+                "recall": round(hits / len(qs), 3),
+            }
+            top_sets[ranker] = tops
+
+        overlap = [len(a & b) / top_k for a, b in zip(top_sets["tfidf"], top_sets["bm25"])]
+        result["overlap"] = round(statistics.mean(overlap), 3)
+        return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory ranking benchmark (TF-IDF vs BM25)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--vocab", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'chunks':>8} {'build':>7} {'ranker':>6} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7} {'overlap':>8}")
+    for size in args.sizes:
+        r = run(size, args.queries, args.top_k, args.vocab, args.seed)
+        for ranker in RANKERS:
+            m = r[ranker]
+            print(f"{size:>8} {r['build_s']:>6}s {ranker:>6} {m['p50_ms']:>8} {m['p95_ms']:>8} "
+                  f"{m['recall']:>7} {r['overlap']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+MemoryStore 基准套件：写入、建索引、检索和统计，结果输出为 JSON
+
+用法:
+    python -m backend.benchmarks.memory.bench_store
+    python -m backend.benchmarks.memory.bench_store --sizes 10000 100000 --output bench.json
+    python -m backend.benchmarks.memory.bench_store --baseline bench.json   # 与上一次结果对比
+
+每个规模在独立的临时 workspace 中运行，语料见 corpus.py（中英双语，每天 1000 条）：
+- write:  write_memory 的吞吐（每次写入都增量更新索引）
+- build:  全量建立检索索引的耗时
+- first:  新建 MemoryStore 后第一次查询的延迟（包含加载磁盘上的索引）
+- steady: 预热后的查询延迟 p50 / p95 / p99（毫秒），分别统计 search_memory、hybrid_search、get_stats
+- rss_mb: 各阶段结束时的进程常驻内存
+- disk:   daily / segments / index 目录的字节数
+
+--baseline 对比时，延迟或耗时超过基线 (1 + tolerance) 倍的指标记为回归，进程以状态码 1 退出。
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(project_root))
+
+from backend.app.session.memory import MemoryStore
+from backend.benchmarks.memory import corpus
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+OPERATIONS = ("search_memory", "hybrid_search", "get_stats")
+
+
+def rss_mb() -> Optional[float]:
+    """当前进程常驻内存（MB）；无法获取时返回峰值或 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1e6, 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1e6 if sys.platform == "darwin" else 1e3), 1)
+    return None
+
+
+def disk_bytes(workspace: Path) -> Dict[str, int]:
+    """记忆目录各部分的字节数"""
+    result = {}
+    for name in ("daily", "segments", "index"):
+        path = workspace / "memory" / name
+        result[name] = sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) if path.is_dir() else 0
+    return result
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    """p50 / p95 / p99（毫秒）"""
+    ordered = sorted(latencies)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 3)
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+def timed(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def bench_writes(workspace: Path, docs: List[List[str]], count: int) -> Dict[str, Any]:
+    """write_memory 吞吐（写入今天的日志，与语料的历史日志共存）"""
+    store = MemoryStore(workspace)
+    store.index.ensure_fresh()
+    started = time.perf_counter()
+    for seq in docs[:count]:
+        store.write_memory(corpus.join_words(seq))
+    elapsed = time.perf_counter() - started
+    return {"count": count, "total_s": round(elapsed, 3), "per_s": round(count / elapsed, 1) if elapsed else None}
+
+
+def run(size: int, queries: int, writes: int, top_k: int, vocab: int, seed: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp)
+        docs = corpus.generate(size, vocab=vocab, seed=seed)
+        files = corpus.write_daily(workspace, docs, seed=seed)
+        qs = [q for _, q in corpus.make_queries(docs, queries, seed)]
+        result: Dict[str, Any] = {"size": size, "daily_files": files, "rss_mb": {"corpus": rss_mb()}}
+
+        # 1. 全量建索引
+        store = MemoryStore(workspace)
+        started = time.perf_counter()
+        store.index.ensure_fresh()
+        result["build_s"] = round(time.perf_counter() - started, 3)
+        result["rss_mb"]["build"] = rss_mb()
+        del store
+
+        # 2. 冷启动后的第一次查询（索引已在磁盘上）
+        result["first_query_ms"] = {
+            "search_memory": round(timed(lambda: MemoryStore(workspace).search_memory(qs[0], top_k)), 3),
+            "hybrid_search": round(timed(lambda: MemoryStore(workspace).hybrid_search(qs[0], top_k)), 3),
+        }
+
+        # 3. 稳态延迟
+        store = MemoryStore(workspace)
+        operations = {
+            "search_memory": lambda q: store.search_memory(q, top_k),
+            "hybrid_search": lambda q: store.hybrid_search(q, top_k),
+            "get_stats": lambda q: store.get_stats(),
+        }
+        steady = {}
+        for name in OPERATIONS:
+            op = operations[name]
+            op(qs[0])  # 预热
+            runs = qs if name != "get_stats" else qs[:max(1, len(qs) // 10)]
+            steady[name] = percentiles([timed(lambda q=q: op(q)) for q in runs])
+        result["steady"] = steady
+        result["rss_mb"]["search"] = rss_mb()
+
+        # 4. 写入吞吐
+        result["write"] = bench_writes(workspace, corpus.generate(writes, vocab=vocab, seed=seed + 3), writes)
+        result["disk_bytes"] = disk_bytes(workspace)
+        return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    找出相对基线变慢的指标
+
+    Returns:
+        回归描述列表（为空表示没有回归）
+    """
+    regressions = []
+    old_by_size = {r["size"]: r for r in baseline.get("results", [])}
+    for new in current["results"]:
+        old = old_by_size.get(new["size"])
+        if old is None:
+            continue
+        pairs = [("build_s", old.get("build_s"), new["build_s"])]
+        for name in OPERATIONS:
+            for key in ("p50_ms", "p95_ms", "p99_ms"):
+                pairs.append((f"{name}.{key}", old.get("steady", {}).get(name, {}).get(key), new["steady"][name][key]))
+        for metric, before, after in pairs:
+            if before and after > before * (1 + tolerance):
+                regressions.append(f"size={new['size']} {metric}: {before} -> {after} (+{after / before - 1:.0%})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MemoryStore benchmark suite (JSON output)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--vocab", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="写入 JSON 文件（默认输出到 stdout）")
+    parser.add_argument("--baseline", type=Path, help="用于对比的上一次结果")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的变慢比例")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        },
+        "results": [run(size, args.queries, args.writes, args.top_k, args.vocab, args.seed)
+                    for size in args.sizes],
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        regressions = compare(json.loads(args.baseline.read_text(encoding="utf-8")), report, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+合成的中英双语记忆语料
+
+每条记忆由随机双字中文词和英文词拼成（比例由 zh_ratio 控制），中文词直接相连，
+英文词两侧加空格；按每天 per_day 条写入 memory/daily/{date}.jsonl。
+zipf=True 时词频服从 Zipf(1) 分布（词表中越靠前的词越常见），用于比较排序算法对常见词的处理。
+"""
+import itertools
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+# 常用汉字，用于拼出双字词
+CHARS = ("的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过"
+         "子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制"
+         "机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心"
+         "反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展")
+LATIN = ["redis", "python", "cache", "docker", "api", "sql", "git", "linux", "kafka", "deploy",
+         "latency", "schema", "index", "queue", "worker", "token", "prompt", "memory", "agent", "vector"]
+CATEGORIES = ["general", "preference", "project", "decision", "todo"]
+
+
+def join_words(seq: list[str]) -> str:
+    """中文词直接相连，英文词两侧加空格"""
+    return "".join(f" {w} " if w.isascii() else w for w in seq).strip()
+
+
+def make_vocabulary(vocab: int, seed: int) -> tuple[list[str], list[str]]:
+    """返回 (中文双字词, 英文词)"""
+    rng = random.Random(seed)
+    zh = list(dict.fromkeys(rng.choice(CHARS) + rng.choice(CHARS) for _ in range(vocab * 2)))[:vocab]
+    latin = LATIN + [f"{rng.choice(LATIN)}{i}" for i in range(vocab // 10)]
+    return zh, latin
+
+
+def generate(size: int, vocab: int = 5_000, zh_ratio: float = 0.7, seed: int = 7,
+             zipf: bool = False) -> list[list[str]]:
+    """生成 size 条记忆的词序列（4~16 个词）"""
+    rng = random.Random(seed)
+    zh, latin = make_vocabulary(vocab, seed)
+    zh_weights = latin_weights = None
+    if zipf:
+        zh_weights = list(itertools.accumulate(1.0 / (r + 1) for r in range(len(zh))))
+        latin_weights = list(itertools.accumulate(1.0 / (r + 1) for r in range(len(latin))))
+
+    def pick(words: list[str], cum_weights: Optional[list[float]]) -> str:
+        return rng.choices(words, cum_weights=cum_weights)[0] if cum_weights else rng.choice(words)
+
+    docs = []
+    for _ in range(size):
+        docs.append([pick(zh, zh_weights) if rng.random() < zh_ratio else pick(latin, latin_weights)
+                     for _ in range(rng.randint(4, 16))])
+    return docs
+
+
+def write_daily(workspace: Path, docs: list[list[str]], per_day: int = 1000,
+                start: date = date(2024, 1, 1), seed: int = 7) -> int:
+    """
+    把语料写成每日日志
+
+    Returns:
+        写入的日志文件数
+    """
+    rng = random.Random(seed + 2)
+    daily = workspace / "memory" / "daily"
+    daily.mkdir(parents=True, exist_ok=True)
+    files = 0
+    for offset in range(0, len(docs), per_day):
+        day = start + timedelta(days=offset // per_day)
+        lines = [json.dumps({"ts": f"{day.isoformat()}T00:00:00+00:00",
+                             "category": rng.choice(CATEGORIES),
+                             "content": join_words(seq)}, ensure_ascii=False)
+                 for seq in docs[offset:offset + per_day]]
+        with open(daily / f"{day.isoformat()}.jsonl", "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        files += 1
+    return files
+
+
+def make_queries(docs: list[list[str]], count: int, seed: int = 7) -> list[tuple[int, str]]:
+    """为随机选中的目标块取连续两个词作为查询（即句子的一个片段）"""
+    rng = random.Random(seed + 1)
+    queries = []
+    for _ in range(count):
+        target = rng.randrange(len(docs))
+        i = rng.randrange(len(docs[target]) - 1)
+        queries.append((target, join_words(docs[target][i:i + 2])))
+    return queries
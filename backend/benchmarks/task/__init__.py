@@ -0,0 +1 @@
+"""任务存储基准测试"""
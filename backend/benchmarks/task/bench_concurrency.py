@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+任务存储并发基准：多个 teammate 线程同时通过 TaskService 修改任务
+
+用法:
+    python -m backend.benchmarks.task.bench_concurrency
+    python -m backend.benchmarks.task.bench_concurrency --threads 1 4 8 --ops 200 --output bench.json
+
+每个线程使用自己的仓储实例（相当于各自独立的 teammate），对 --tasks 个共享任务随机执行 add_tag
+（读-改-写）。每个后端统计：
+- ops_per_s: 吞吐
+- lost:      丢失的更新数（期望的标签总数 - 实际写入的标签总数）
+- p50 / p95: 单次操作延迟（毫秒）
+
+后端：
+- legacy:        改动前的写入方式（先删除旧文件再写新文件，没有锁，transaction 为空操作）
+- file:          TaskRepository（原子写入 + 目录锁 + 预写日志）
+- file-nofsync:  同上，不 fsync（durable=False，相当于 TASK_FSYNC=0）
+- cached:        CachedTaskRepository（默认后端）
+- sqlite:        SQLiteTaskRepository
+"""
+import argparse
+import functools
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(project_root))
+
+from backend.app.task import CachedTaskRepository, SQLiteTaskRepository, TaskRepository, TaskService
+
+
+class LegacyTaskRepository(TaskRepository):
+    """改动前的写入路径，作为对照"""
+
+    def save(self, task) -> None:
+        for old_file in self.tasks_dir.glob(f"task_{task.id}_*.json"):
+            old_file.unlink(missing_ok=True)
+        self._file_path(task).write_text(
+            json.dumps(self._serialize(task), indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+
+    @contextmanager
+    def transaction(self):
+        yield self
+
+
+BACKENDS: Dict[str, Callable[[Path], TaskRepository]] = {
+    "legacy": LegacyTaskRepository,
+    "file": TaskRepository,
+    "file-nofsync": functools.partial(TaskRepository, durable=False),
+    "cached": CachedTaskRepository,
+    "sqlite": SQLiteTaskRepository,
+}
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 3)
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95)}
+
+
+def run(backend: str, threads: int, ops: int, tasks: int, seed: int) -> Dict[str, Any]:
+    factory = BACKENDS[backend]
+    with tempfile.TemporaryDirectory() as tmp:
+        tasks_dir = Path(tmp)
+        setup = TaskService(repository=factory(tasks_dir))
+        ids = [setup.create_task(f"Shared task {i}").id for i in range(tasks)]
+
+        latencies: List[float] = []
+        errors: List[str] = []
+        lock = threading.Lock()
+
+        def worker(n: int) -> None:
+            service = TaskService(repository=factory(tasks_dir))
+            rng = random.Random(seed + n)
+            local = []
+            for i in range(ops):
+                started = time.perf_counter()
+                try:
+                    service.add_tag(rng.choice(ids), f"w{n}-{i}")
+                except Exception as e:  # legacy 后端在删除和写入之间可能读不到任务
+                    with lock:
+                        errors.append(type(e).__name__)
+                local.append((time.perf_counter() - started) * 1000)
+            with lock:
+                latencies.extend(local)
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        check = factory(tasks_dir)
+        written = sum(len(check.get_by_id(task_id).tags) for task_id in ids if check.exists(task_id))
+        expected = threads * ops - len(errors)
+        return {
+            "backend": backend,
+            "threads": threads,
+            "ops": threads * ops,
+            "ops_per_s": round(threads * ops / elapsed, 1),
+            "lost": expected - written,
+            "errors": len(errors),
+            **percentiles(latencies),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Task storage concurrency benchmark (JSON output)")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--ops", type=int, default=100, help="每个线程的操作数")
+    parser.add_argument("--tasks", type=int, default=20, help="共享任务数")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="写入 JSON 文件（默认输出到 stdout）")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "args": {k: v for k, v in vars(args).items() if k != "output"},
+        },
+        "results": [run(backend, threads, args.ops, args.tasks, args.seed)
+                    for backend in args.backends for threads in args.threads],
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ Commands:
   /team        - list all teammates and their status
   /inbox       - read and drain lead's inbox
   /sessions    - list all saved sessions
+  /sessions gc - rotate/compress old transcripts and report bytes reclaimed
+  /memory consolidate - fold old daily memory logs into weekly/monthly segments
   /insight     - analyze session trace (performance, bottlenecks, optimization)
   /insight-llm - analyze LLM call quality (uses LLM)
 """
@@ -21,7 +23,7 @@ import asyncio
 import sys
 
 from backend.app.services.main_agent_service_v2 import MainAgentService
-from backend.app.session import list_sessions, load_session, new_session_key
+from backend.app.session import get_store, list_sessions, new_session_key, resume_session
 from backend.app.cli.repl import run_repl
 
 
@@ -35,13 +37,13 @@ if __name__ == "__main__":
     resume_key = None
 
     if args and args[0] == "--resume":
-        keys = list_sessions()
-        if not keys:
+        latest = list_sessions(limit=1)
+        if not latest:
             print("No saved sessions found.")
             sys.exit(1)
-        resume_key = args[1] if len(args) > 1 else keys[0]
-        if resume_key not in keys:
-            print(f"Session '{resume_key}' not found. Available:\n" + "\n".join(keys))
+        resume_key = args[1] if len(args) > 1 else latest[0]
+        if get_store().get_session(resume_key) is None:
+            print(f"Session '{resume_key}' not found. Available:\n" + "\n".join(list_sessions()))
             sys.exit(1)
         args = args[2:] if len(args) > 1 else []
 
@@ -63,7 +65,7 @@ if __name__ == "__main__":
     history = []
 
     if resume_key:
-        history = load_session("main", resume_key)
+        history = resume_session("main", resume_key)
         print(f"Resumed session '{resume_key}' ({len(history)} messages)\n")
     else:
         print("Ready (session will be created on first query)\n")
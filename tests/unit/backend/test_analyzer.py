@@ -0,0 +1,77 @@
+"""
+检索分析器测试
+"""
+
+import pytest
+
+from backend.app.analysis import get_analyzer, rank_documents
+from backend.app.session.memory import MemoryStore
+from backend.app.skills.loader import SkillLoader
+from backend.app.task.repository import TaskRepository
+from backend.app.task.service import TaskService
+
+
+class TestAnalyzer:
+    """测试分析流水线"""
+
+    def test_cjk_bigrams_and_latin_words(self):
+        """测试中文切成二元组、拉丁文字按词切分并归一化"""
+        tokens = get_analyzer("cjk")("用户喜欢 Python３，Ａsync x")
+        assert tokens == ["用户", "户喜", "喜欢", "python3", "async"]
+
+    def test_single_cjk_character_kept(self):
+        """测试单个中文字符保留为一元"""
+        assert get_analyzer("cjk")("猫 a") == ["猫"]
+
+    def test_stopwords(self):
+        """测试停用词过滤"""
+        assert get_analyzer("cjk_stop")("the cache 的 缓存") == ["cache", "缓存"]
+
+    def test_unknown_analyzer(self):
+        """测试无效的分析器名称"""
+        with pytest.raises(ValueError):
+            get_analyzer("whitespace")
+
+    def test_rank_documents(self):
+        """测试小集合排序：命中查询词越多越靠前，零分不返回"""
+        docs = [(1, "部署脚本"), (2, "数据库迁移与部署"), (3, "无关内容")]
+        assert [k for k, _ in rank_documents("数据库部署", docs)] == [2, 1]
+
+
+class TestAnalyzerIntegration:
+    """测试记忆、任务和技能搜索共用分析器"""
+
+    def test_memory_partial_chinese_query(self, tmp_path):
+        """测试中文记忆可以用句子中的部分词检索"""
+        store = MemoryStore(tmp_path)
+        store.write_memory("用户喜欢使用异步编程处理网络请求")
+        store.write_memory("项目使用 PostgreSQL 数据库")
+
+        results = store.keyword_search("异步编程")
+        assert [r["snippet"] for r in results] == ["用户喜欢使用异步编程处理网络请求"]
+
+    def test_analyzer_change_rebuilds_index(self, tmp_path):
+        """测试切换分析器后索引按新分词重建"""
+        legacy = MemoryStore(tmp_path, analyzer=get_analyzer("legacy"))
+        legacy.write_memory("用户喜欢使用异步编程")
+        assert legacy.keyword_search("异步编程") == []
+
+        assert len(MemoryStore(tmp_path).keyword_search("异步编程")) == 1
+
+    def test_task_search(self, tmp_path):
+        """测试任务按主题、描述和标签搜索"""
+        service = TaskService(TaskRepository(tmp_path))
+        service.create_task("修复登录页面", description="验证码无法刷新")
+        target = service.create_task("优化数据库查询", tags=["性能"])
+        service.create_task("编写文档")
+
+        assert [t.id for t in service.search_tasks("数据库性能")] == [target.id]
+
+    def test_skill_search(self, tmp_path):
+        """测试技能按名称和描述搜索"""
+        for name, desc in (("pdf", "处理 PDF 文件"), ("web-scraper", "抓取网页内容")):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "SKILL.md").write_text(
+                f"---\nname: {name}\ndescription: {desc}\n---\nbody", encoding="utf-8"
+            )
+        assert SkillLoader(tmp_path).search("网页抓取") == ["web-scraper"]
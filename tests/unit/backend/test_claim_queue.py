@@ -0,0 +1,157 @@
+"""
+团队任务板认领队列测试
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+from backend.app.task import TaskStatus
+from backend.app.team.claim_queue import ClaimQueue
+
+
+def write_board_task(board, task_id, priority="medium", created_at=None, **fields):
+    task = {"id": task_id, "subject": f"Task {task_id}", "status": "pending", "owner": "",
+            "priority": priority, "created_at": created_at if created_at is not None else task_id}
+    task.update(fields)
+    (board / f"task_{task_id}.json").write_text(json.dumps(task))
+
+
+def read_board_task(board, task_id):
+    return json.loads((board / f"task_{task_id}.json").read_text())
+
+
+class TestClaimQueue:
+    """测试认领顺序、跨实例互斥和租约过期"""
+
+    def test_priority_then_age_order(self, tmp_path):
+        """测试按优先级、再按创建时间认领，跳过已认领和被阻塞的任务"""
+        write_board_task(tmp_path, 1, "low")
+        write_board_task(tmp_path, 2, "high", created_at=20)
+        write_board_task(tmp_path, 3, "high", created_at=10)
+        write_board_task(tmp_path, 4, "urgent", blockedBy=[1])
+        write_board_task(tmp_path, 5, "urgent", owner="bob", status="in_progress")
+        queue = ClaimQueue(tmp_path)
+
+        assert [t["id"] for t in queue.unclaimed()] == [3, 2, 1]
+        claimed = [queue.claim("alice")["id"] for _ in range(3)]
+        assert claimed == [3, 2, 1]
+        assert queue.claim("alice") is None
+
+        task = read_board_task(tmp_path, 3)
+        assert task["owner"] == "alice"
+        assert task["status"] == TaskStatus.IN_PROGRESS
+        assert (tmp_path / "claims" / "task_3.lease").exists()
+
+        queue.release(3, "alice", TaskStatus.COMPLETED)
+        assert read_board_task(tmp_path, 3)["status"] == TaskStatus.COMPLETED
+        assert not (tmp_path / "claims" / "task_3.lease").exists()
+
+    def test_concurrent_claims_are_unique(self, tmp_path):
+        """测试多个实例（模拟多个进程）并发认领时每个任务只被认领一次"""
+        for task_id in range(1, 31):
+            write_board_task(tmp_path, task_id)
+        queues = [ClaimQueue(tmp_path) for _ in range(4)]
+        results = {}
+
+        def worker(index):
+            mine = []
+            while True:
+                task = queues[index].claim(f"worker-{index}")
+                if task is None:
+                    break
+                mine.append(task["id"])
+            results[index] = mine
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        claimed = [task_id for mine in results.values() for task_id in mine]
+        assert sorted(claimed) == list(range(1, 31))
+        for index, mine in results.items():
+            for task_id in mine:
+                assert read_board_task(tmp_path, task_id)["owner"] == f"worker-{index}"
+        assert "already claimed" in queues[0].claim_task(1, "lead")
+
+    def test_expired_lease_is_reclaimed(self, tmp_path):
+        """测试认领者崩溃后租约过期，任务被其他 teammate 重新认领"""
+        write_board_task(tmp_path, 1)
+        crashed = ClaimQueue(tmp_path, lease_seconds=0.05)
+        assert crashed.claim("alice")["id"] == 1
+
+        other = ClaimQueue(tmp_path, lease_seconds=60)
+        assert other.claim("bob") is None
+        time.sleep(0.1)
+        assert other.claim("bob")["id"] == 1
+        assert read_board_task(tmp_path, 1)["owner"] == "bob"
+        lease = json.loads((tmp_path / "claims" / "task_1.lease").read_text())
+        assert lease["owner"] == "bob"
+        assert not crashed.renew(1, "alice")
+        assert other.renew(1, "bob")
+
+    def test_claimer_crashed_before_updating_task(self, tmp_path):
+        """测试其他进程创建租约后、更新任务 JSON 前崩溃：租约过期后任务仍能被认领"""
+        write_board_task(tmp_path, 1)
+        write_board_task(tmp_path, 2)
+        claims = tmp_path / "claims"
+        claims.mkdir()
+        (claims / "task_1.lease").write_text(json.dumps({"owner": "ghost", "expires_at": time.time() + 0.1}))
+        (claims / "task_2.lease").write_text("")  # 在写入租约内容之前崩溃
+        queue = ClaimQueue(tmp_path, lease_seconds=0.1)
+
+        assert queue.claim("bob") is None
+        assert [t["id"] for t in queue.unclaimed()] == [1, 2]
+        time.sleep(0.2)
+        assert queue.claim("bob")["id"] == 1
+        assert queue.claim("bob")["id"] == 2
+
+    def test_unchanged_leases_are_not_reread(self, tmp_path, monkeypatch):
+        """测试 claims/ 目录没有变化、也没有租约到期时不再读取租约文件"""
+        for task_id in range(1, 11):
+            write_board_task(tmp_path, task_id)
+        queue = ClaimQueue(tmp_path)
+        for _ in range(5):
+            queue.claim("alice")
+        old = time.time() - 10
+        os.utime(tmp_path / "claims", (old, old))
+
+        reads = []
+        original = queue._read_lease
+        monkeypatch.setattr(queue, "_read_lease", lambda task_id: reads.append(task_id) or original(task_id))
+        assert len(queue.unclaimed()) == 5
+        assert reads == [5]  # 只解析上次扫描之后新建的租约，其余沿用缓存的过期时间
+        assert len(queue.unclaimed()) == 5
+        assert reads == [5]
+
+    def test_racing_breakers_claim_once(self, tmp_path, monkeypatch):
+        """测试两个实例同时打破同一过期租约：后到者不会删掉先到者新建的租约"""
+        write_board_task(tmp_path, 1)
+        claims = tmp_path / "claims"
+        claims.mkdir()
+        (claims / "task_1.lease").write_text(json.dumps({"owner": "ghost", "expires_at": time.time() - 1}))
+        first, second = ClaimQueue(tmp_path), ClaimQueue(tmp_path)
+        results = {}
+        racer = threading.Thread(target=lambda: results.update(bob=second.claim("bob")))
+
+        original = first._read_lease
+
+        def read_then_yield(task_id):
+            lease = original(task_id)
+            if sys._getframe(1).f_code.co_name == "_break_expired" and racer.ident is None:
+                racer.start()  # 第一个实例已读到过期租约、尚未删除时，第二个实例开始认领
+                time.sleep(0.2)
+            return lease
+
+        monkeypatch.setattr(first, "_read_lease", read_then_yield)
+        results["alice"] = first.claim("alice")
+        racer.join()
+
+        winners = [name for name, task in results.items() if task is not None]
+        assert len(winners) == 1
+        assert read_board_task(tmp_path, 1)["owner"] == winners[0]
+        assert json.loads((claims / "task_1.lease").read_text())["owner"] == winners[0]
@@ -0,0 +1,92 @@
+"""
+上下文组装（前缀缓存）测试
+"""
+
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from backend.app.core.context.assembler import ContextAssembler
+from backend.app.core.execution.langchain_callback import ObservabilityCallback
+from backend.app.session.memory import GlobalMemoryLoader
+from backend.app.session.session import SessionStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """临时 SessionStore，全局记忆目录指向 tmp_path/global"""
+    store = SessionStore(tmp_path / "sessions")
+    store.set_current_key("k1")
+    store._bootstrap_loader = GlobalMemoryLoader(tmp_path / "global")
+    store._bootstrap_loader.update_file("MEMORY.md", "user likes rust")
+    monkeypatch.setattr("backend.app.session.get_store", lambda: store)
+    monkeypatch.setattr(store, "set_current_key", lambda key: None)
+    yield store
+    store.close()
+
+
+class TestContextAssembler:
+    """测试静态前缀和易变尾部的组装"""
+
+    def test_static_prompt_is_frozen_and_memoised(self, store):
+        """测试静态前缀不含当前时间、按哈希缓存，全局记忆变化在重新冻结后才生效"""
+        assembler = ContextAssembler()
+        first = assembler.system_prompt("k1")
+        assert "user likes rust" in first and "Current time" not in first
+
+        store._bootstrap_loader.update_file("MEMORY.md", "user likes go")
+        assert assembler.system_prompt("k1") == first
+        assert assembler.stats() == {"snapshots": 1, "prompts": 1, "renders": 1, "hits": 1}
+
+        assembler.refreeze("k1")
+        assert "user likes go" in assembler.system_prompt("k1")
+
+    def test_teammate_prompt_is_static(self, store, monkeypatch):
+        """测试 Teammate 系统提示词不含当前时间、重复构建时不变，运行时上下文单独返回"""
+        from backend.app.core.context.team_context import TeamContext
+        from backend.app.prompts import get_teammate_system_prompt
+
+        assembler = ContextAssembler()
+        monkeypatch.setattr("backend.app.core.context.assembler.get_assembler", lambda: assembler)
+        first = get_teammate_system_prompt("alice", "coder", "k1")
+        assert "Current time" not in first and "You are 'alice'" in first
+        assert get_teammate_system_prompt("alice", "coder", "k1") == first
+        assert assembler.stats()["renders"] == 1
+
+        context = TeamContext.__new__(TeamContext)
+        context.session_key = "k1"
+        assert "Current time" in context.get_runtime_context()
+
+    def test_volatile_parts_go_last(self):
+        """测试召回记忆和运行时上下文追加在历史之后、用户输入之前"""
+        history = [HumanMessage(content="hi"), AIMessage(content="hello")]
+        messages = ContextAssembler.assemble(history, "next", recalled="- fact", runtime="## Runtime")
+
+        assert messages[:2] == history and len(history) == 2
+        assert messages[2].content == "## Runtime\n\n<recalled-memory>\n- fact\n</recalled-memory>"
+        assert messages[3].content == "next"
+
+
+class TestCacheHitTokens:
+    """测试从 token_usage 中提取前缀缓存命中数"""
+
+    @pytest.mark.parametrize("usage", [
+        {"prompt_tokens": 1000, "completion_tokens": 10, "prompt_cache_hit_tokens": 800},
+        {"prompt_tokens": 1000, "completion_tokens": 10, "prompt_tokens_details": {"cached_tokens": 800}},
+    ])
+    def test_token_usage(self, usage):
+        """测试 DeepSeek 和 OpenAI 两种字段都能识别，成本按命中价格计算"""
+        callback = ObservabilityCallback(enable_console=False, enable_tracer=False)
+        result = LLMResult(generations=[[ChatGeneration(message=AIMessage(content="ok"))]],
+                           llm_output={"token_usage": usage})
+        callback.on_llm_end(result, run_id=uuid4())
+
+        metrics = callback.get_metrics()
+        assert metrics["total_cache_hit_tokens"] == 800
+        assert metrics["cache_hit_rate"] == 0.8
+        assert callback.total_cost == pytest.approx((200 * 0.27 + 800 * 0.07 + 10 * 1.10) / 1_000_000)
@@ -0,0 +1,380 @@
+"""
+会话记忆检索测试
+"""
+
+import json
+
+import pytest
+
+from backend.app.session.memory import MemoryStore
+
+
+def _write_daily(store, name, contents):
+    with open(store.memory_dir / name, "a", encoding="utf-8") as f:
+        for text in contents:
+            f.write(json.dumps({"category": "general", "content": text}, ensure_ascii=False) + "\n")
+
+
+class TestMemoryIndex:
+    """测试记忆倒排索引"""
+
+    def test_write_memory_updates_index_incrementally(self, tmp_path):
+        """测试 write_memory 增量更新索引而不是重建"""
+        store = MemoryStore(tmp_path)
+        store.write_memory("python asyncio event loop")
+        store.search_memory("python")
+        store.write_memory("rust ownership borrow checker")
+
+        assert store.index.stats()["chunks"] == 2
+        assert (tmp_path / "memory" / "index" / "chunks.jsonl").exists()
+        results = store.search_memory("borrow checker")
+        assert results[0]["snippet"] == "rust ownership borrow checker"
+
+    def test_index_survives_restart(self, tmp_path):
+        """测试重新打开时从磁盘加载索引"""
+        store = MemoryStore(tmp_path)
+        for text in ("alpha beta", "beta gamma", "gamma delta"):
+            store.write_memory(text)
+        expected = store.search_memory("gamma")
+
+        reopened = MemoryStore(tmp_path)
+        reopened.index.rebuild = None  # 加载路径不应触发重建
+        assert reopened.search_memory("gamma") == expected
+
+    def test_out_of_band_changes(self, tmp_path):
+        """测试索引之外的追加和改写都能被发现"""
+        store = MemoryStore(tmp_path)
+        store.write_memory("first note about sqlite")
+        assert len(store.search_memory("sqlite")) == 1
+
+        # 其他进程追加：只索引尾部
+        daily = next(store.memory_dir.glob("*.jsonl"))
+        _write_daily(store, daily.name, ["second note about sqlite"])
+        assert len(store.search_memory("sqlite")) == 2
+
+        # 改写文件：整体重建
+        daily.write_text(json.dumps({"content": "postgres only"}) + "\n", encoding="utf-8")
+        assert store.search_memory("sqlite") == []
+        assert store.search_memory("postgres")[0]["snippet"] == "postgres only"
+
+        # MEMORY.md 变化
+        (tmp_path / "MEMORY.md").write_text("sqlite is the default backend", encoding="utf-8")
+        assert store.search_memory("sqlite")[0]["path"] == "MEMORY.md"
+
+    def test_partial_line_is_deferred(self, tmp_path):
+        """测试正在写入的半行不会被索引，写完后再索引"""
+        store = MemoryStore(tmp_path)
+        daily = store.memory_dir / "2024-01-01.jsonl"
+        line = json.dumps({"content": "streaming write"})
+        daily.write_text(line[:10], encoding="utf-8")
+        assert store.search_memory("streaming") == []
+
+        daily.write_text(line + "\n", encoding="utf-8")
+        assert store.search_memory("streaming")[0]["snippet"] == "streaming write"
+
+
+class TestRankers:
+    """测试检索排序算法"""
+
+    def test_bm25_ranking(self, tmp_path):
+        """测试 BM25 偏向词频高、长度短的块，并只返回 top_k 个结果"""
+        store = MemoryStore(tmp_path)
+        store.write_memory("cache cache invalidation")
+        store.write_memory("cache " + " ".join(f"filler{i}" for i in range(30)))
+        store.write_memory("unrelated note")
+        for i in range(5):
+            store.write_memory(f"cache entry {i}")
+
+        results = store.keyword_search("cache", top_k=3, ranker="bm25")
+        assert len(results) == 3
+        assert results[0]["snippet"] == "cache cache invalidation"
+        assert all("unrelated" not in r["snippet"] for r in results)
+
+    def test_unknown_ranker(self, tmp_path):
+        """测试无效的排序算法"""
+        with pytest.raises(ValueError):
+            MemoryStore(tmp_path).hybrid_search("x", ranker="pagerank")
+
+
+class TestHybridSearch:
+    """测试混合检索（哈希向量 + 时间衰减 + MMR）"""
+
+    def test_recent_memory_ranks_first(self, tmp_path):
+        """测试相同内容时较新的每日日志排在前面"""
+        store = MemoryStore(tmp_path)
+        _write_daily(store, "2020-01-01.jsonl", ["deploy checklist for staging"])
+        store.write_memory("deploy checklist for staging")
+
+        results = store.hybrid_search("deploy checklist", top_k=2)
+        assert len(results) == 2
+        assert not results[0]["path"].startswith("2020-01-01")
+        assert results[0]["score"] > results[1]["score"]
+
+    def test_mmr_demotes_near_duplicates(self, tmp_path):
+        """测试 MMR 让不同的相关块排在重复块之前"""
+        store = MemoryStore(tmp_path)
+        for _ in range(3):
+            store.write_memory("redis cache eviction policy lru")
+        store.write_memory("redis cache eviction with ttl expiry")
+
+        assert store.keyword_search("redis cache eviction", top_k=4)[-1]["snippet"].endswith("ttl expiry")
+        results = store.hybrid_search("redis cache eviction", top_k=2)
+        assert results[0]["snippet"] == "redis cache eviction policy lru"
+        assert results[1]["snippet"] == "redis cache eviction with ttl expiry"
+
+    def test_vectors_persist_across_restart(self, tmp_path):
+        """测试向量文件随块表追加，重启后复用，缺失的行按块表补齐"""
+        store = MemoryStore(tmp_path)
+        for text in ("python asyncio event loop", "rust ownership", "python typing protocols"):
+            store.write_memory(text)
+        expected = store.hybrid_search("python asyncio")
+
+        vectors = tmp_path / "memory" / "index" / "vectors.f32"
+        row = store.index.vectors.dim * 4
+        assert vectors.stat().st_size == 3 * row
+        assert MemoryStore(tmp_path).hybrid_search("python asyncio") == expected
+
+        vectors.write_bytes(vectors.read_bytes()[:row + 5])  # 模拟追加向量时崩溃
+        restarted = MemoryStore(tmp_path)
+        assert restarted.hybrid_search("python asyncio") == expected
+        assert vectors.stat().st_size == 3 * row
+
+
+class TestRecallService:
+    """测试记忆召回服务（常驻 MemoryStore + 结果缓存）"""
+
+    def test_repeated_query_hits_cache(self, tmp_path):
+        """测试规范化后相同的查询命中缓存，写入记忆后失效"""
+        from backend.app.session.recall import RecallService
+
+        recall = RecallService(lambda key: tmp_path / key)
+        recall.store_for("s1").write_memory("python asyncio event loop")
+
+        first = recall.recall("s1", "Python  asyncio")
+        assert recall.recall("s1", "python asyncio") == first
+        assert recall.stats()["hits"] == 1
+
+        recall.store_for("s1").write_memory("python asyncio task groups")
+        assert len(recall.recall("s1", "python asyncio")) == 2
+        assert recall.stats()["misses"] == 2
+
+    def test_external_append_invalidates(self, tmp_path):
+        """测试其他进程追加的日志让缓存失效"""
+        from backend.app.session.recall import RecallService
+
+        recall = RecallService(lambda key: tmp_path / key)
+        store = recall.store_for("s1")
+        store.write_memory("redis cache eviction")
+        assert len(recall.recall("s1", "redis")) == 1
+
+        _write_daily(store, "2024-01-01.jsonl", ["redis cluster failover"])
+        assert len(recall.recall("s1", "redis")) == 2
+
+    def test_session_store_recall_keeps_current_key(self, tmp_path):
+        """测试 recall_memory 不切换当前会话，并与 set_current_key 共用 MemoryStore"""
+        from backend.app.session.session import SessionStore
+
+        store = SessionStore(tmp_path)
+        store.set_current_key("a")
+        store.write_memory("rust ownership", category="general")
+        store.set_current_key("b")
+
+        assert store.recall_memory("a", "ownership")[0]["snippet"] == "rust ownership"
+        assert store.get_current_key() == "b"
+        store.set_current_key("a")
+        assert store.get_memory_store() is store.recall.store_for("a")
+
+        loader = store._bootstrap_loader
+        store.get_memory_store().load_evergreen()
+        store.set_current_key("a")  # 会话未变：不重建加载器、不清除缓存
+        assert store._bootstrap_loader is loader
+        assert store.get_memory_store()._evergreen_cache is not None
+        store.close()
+
+
+class TestMemoryDedup:
+    """测试记忆写入的近似重复检测"""
+
+    def test_session_memory_rejects_near_duplicate(self, tmp_path):
+        """测试会话记忆拒绝近似重复并统计节省量，不同的事实正常写入"""
+        from backend.app.session.session import SessionStore
+
+        store = SessionStore(tmp_path)
+        store.set_current_key("k1")
+        store.write_memory("Project uses FastAPI and LangChain for the backend")
+        result = store.write_memory("The project uses FastAPI and LangChain for its backend")
+        assert result.startswith("✓ Skipped near-duplicate")
+        store.write_memory("Project uses PostgreSQL with pgvector")
+
+        assert store.get_memory_store().index.stats()["chunks"] == 2
+        stats = store.get_dedup_stats()
+        assert stats["rejected"] == 1
+        assert stats["bytes_saved"] == len("The project uses FastAPI and LangChain for its backend")
+        store.close()
+
+    def test_dedup_survives_restart(self, tmp_path):
+        """测试签名由持久化的向量重建，重启后仍能识别重复"""
+        from backend.app.session.memory import MemoryStore
+
+        MemoryStore(tmp_path).write_memory("用户喜欢使用 Python 编写异步服务，偏好 asyncio")
+        dup = MemoryStore(tmp_path).find_duplicate("用户喜欢使用 python 编写异步服务, 偏好 asyncio。")
+        assert dup is not None and dup["text"].startswith("用户喜欢")
+        assert MemoryStore(tmp_path).find_duplicate("redis cluster failover sentinel") is None
+
+    def test_global_file_rejects_duplicate(self, tmp_path):
+        """测试全局记忆文件（USER.md）拒绝重复条目"""
+        from backend.app.session.memory import GlobalMemoryLoader
+        from backend.app.session.session import SessionStore
+
+        store = SessionStore(tmp_path / "sessions")
+        store.set_current_key("k1")
+        store._bootstrap_loader = GlobalMemoryLoader(tmp_path / "global")
+
+        assert store.write_memory("User prefers concise code", category="preference").startswith("✓ Saved")
+        assert "Skipped" in store.write_memory("user prefers concise code.", category="preference")
+        assert (tmp_path / "global" / "USER.md").read_text().count("concise") == 1
+        store.close()
+
+    def test_corrections_are_not_duplicates(self, tmp_path):
+        """测试只差数字或顺序的更正不会被当作重复（会话记忆和全局记忆文件）"""
+        from backend.app.session.memory import GlobalMemoryLoader
+        from backend.app.session.session import SessionStore
+
+        store = SessionStore(tmp_path / "sessions")
+        store.set_current_key("k1")
+        store._bootstrap_loader = GlobalMemoryLoader(tmp_path / "global")
+
+        for first, second in [("deploy server is 10.0.0.1", "deploy server is 10.0.0.2"),
+                              ("用户的生日是3月5日", "用户的生日是5月3日")]:
+            assert "Skipped" not in store.write_memory(first)
+            assert "Skipped" not in store.write_memory(second)
+            assert "Skipped" not in store.write_memory(second, category="preference")
+        assert "Skipped" in store.write_memory("Deploy server is 10.0.0.2.")
+        assert store.get_memory_store().index.stats()["chunks"] == 4
+        assert (tmp_path / "global" / "USER.md").read_text().count("10.0.0.2") == 1
+        store.close()
+
+    def test_near_exact_confirmation(self):
+        """测试原文确认：数字序列或词序不同的文本即使签名相近也不算重复"""
+        from backend.app.session.dedup import TextDedupIndex, is_near_exact
+
+        assert is_near_exact("User prefers concise code", "user prefers concise code.")
+        assert not is_near_exact("deploy server is 10.0.0.1", "deploy server is 10.0.0.2")
+        assert not is_near_exact("生日是3月5日", "生日是5月3日")
+        assert not is_near_exact("Alice reports to Bob", "Bob reports to Alice")
+
+        index = TextDedupIndex()
+        index.reset(["deploy server is 10.0.0.1", "Alice reports to Bob"])
+        assert index.nearest("deploy server is 10.0.0.2", max_distance=64) is None
+        assert index.nearest("Bob reports to Alice", max_distance=64) is None
+        assert index.nearest("Deploy server is 10.0.0.1!", max_distance=6)[1] == 0
+
+
+class TestMemoryConsolidation:
+    """测试旧记忆日志合并为周段 / 月段"""
+
+    def test_old_logs_fold_into_segments(self, tmp_path):
+        """测试超过热期的日志按周合并、更旧的按月合并，检索结果仍按天标注"""
+        from datetime import date
+
+        from backend.app.session.memory_consolidate import consolidate
+
+        store = MemoryStore(tmp_path)
+        _write_daily(store, "2024-01-02.jsonl", ["redis cluster failover"])
+        _write_daily(store, "2024-01-03.jsonl", ["postgres vacuum tuning"])
+        _write_daily(store, "2024-03-01.jsonl", ["redis sentinel quorum"])
+        _write_daily(store, "2024-03-11.jsonl", ["redis hot key"])
+
+        report = consolidate(tmp_path, store.analyzer, store.index.tokenizer_version,
+                             hot_days=7, monthly_days=60, today=date(2024, 3, 12))
+        segments = tmp_path / "memory" / "segments"
+        assert report["daily_files"] == 3 and report["entries"] == 3
+        assert sorted(p.name for p in segments.glob("*.jsonl")) == ["2024-01.jsonl", "2024-W09.jsonl"]
+        assert [p.name for p in store.memory_dir.glob("*.jsonl")] == ["2024-03-11.jsonl"]
+
+        entry = json.loads((segments / "2024-W09.jsonl").read_text(encoding="utf-8"))
+        assert entry["day"] == "2024-03-01" and entry["tf"]["redis"] == 1
+
+        results = MemoryStore(tmp_path).keyword_search("redis", top_k=5)
+        assert sorted(r["path"].split("[")[0] for r in results) == [
+            "2024-01-02.jsonl", "2024-03-01.jsonl", "2024-03-11.jsonl"]
+
+    def test_deprecated_entries_dropped(self, tmp_path):
+        """测试废弃条目及其标记在合并时丢弃，重复执行结果不变"""
+        store = MemoryStore(tmp_path)
+        _write_daily(store, "2020-01-01.jsonl", ["Use MySQL for storage", "Deploy with docker compose"])
+        _write_daily(store, "2020-01-05.jsonl", ["[DEPRECATED] Use MySQL for storage\nReason: migrated"])
+
+        report = store.consolidate()
+        assert report["dropped"] == 2 and report["entries"] == 1
+        assert store.keyword_search("mysql") == []
+        assert len(store.keyword_search("docker")) == 1
+        assert store.get_stats()["segment_entries"] == 1
+
+        assert store.consolidate()["segments_written"] == 0
+
+    def test_correction_survives_deprecation(self, tmp_path):
+        """测试只丢弃与废弃内容完全相同的条目，只改了数字的更正保留下来"""
+        store = MemoryStore(tmp_path)
+        _write_daily(store, "2020-01-01.jsonl", ["deploy server is 10.0.0.1", "deploy server is 10.0.0.2",
+                                                  "deploy server is 10.0.0.1 (staging)"])
+        _write_daily(store, "2020-01-05.jsonl", ["[DEPRECATED] Deploy server is 10.0.0.1.\nReason: moved"])
+
+        report = store.consolidate()
+        assert report["dropped"] == 2 and report["entries"] == 2
+        segment = tmp_path / "memory" / "segments" / "2020-01.jsonl"
+        contents = sorted(json.loads(line)["content"] for line in segment.read_text(encoding="utf-8").splitlines())
+        assert contents == ["deploy server is 10.0.0.1 (staging)", "deploy server is 10.0.0.2"]
+
+    def test_session_store_consolidates_all_sessions(self, tmp_path):
+        """测试 SessionStore 合并所有会话并汇总报告"""
+        from backend.app.session.session import SessionStore
+
+        store = SessionStore(tmp_path)
+        for key in ("a", "b"):
+            store.set_current_key(key)
+            _write_daily(store.get_memory_store(), "2020-02-01.jsonl", [f"note for {key}"])
+
+        report = store.consolidate_memory()
+        assert report["sessions"] == 2 and report["daily_files"] == 2
+        assert store.recall_memory("a", "note")[0]["path"].startswith("2020-02-01")
+        store.close()
+
+
+class TestGlobalMemoryCache:
+    """测试全局记忆文件的进程内缓存（mtime/size 校验）"""
+
+    def test_external_write_visible_to_all_loaders(self, tmp_path):
+        """测试一个加载器写入后，其他加载器下一次读取即看到新内容"""
+        import os
+
+        from backend.app.session.memory import GlobalMemoryLoader
+
+        reader, writer = GlobalMemoryLoader(tmp_path), GlobalMemoryLoader(tmp_path)
+        writer.update_file("SOUL.md", "calm")
+        assert reader.load_soul() == "calm"
+        before = GlobalMemoryLoader.cache_stats()["hits"]
+        assert reader.load_soul() == "calm"
+        assert GlobalMemoryLoader.cache_stats()["hits"] == before + 1
+
+        path = tmp_path / "SOUL.md"
+        path.write_text("cheerful", encoding="utf-8")  # 模拟其他进程直接改写
+        os.utime(path, ns=(1, 1))
+        assert reader.load_soul() == "cheerful"
+
+        path.unlink()
+        assert reader.load_soul() == ""
+
+    def test_content_hash(self, tmp_path):
+        """测试内容哈希随相关文件变化，与加载模式之外的文件无关"""
+        from backend.app.session.memory import GlobalMemoryLoader
+
+        loader = GlobalMemoryLoader(tmp_path)
+        loader.update_file("TOOLS.md", "use rg")
+        full, minimal = loader.content_hash("full"), loader.content_hash("minimal")
+        assert full != minimal and loader.content_hash("full") == full
+
+        loader.update_file("SOUL.md", "calm")
+        assert loader.content_hash("full") != full
+        assert loader.content_hash("minimal") == minimal
+        assert GlobalMemoryLoader(tmp_path).content_hash("full") == loader.content_hash("full")
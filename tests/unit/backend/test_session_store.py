@@ -0,0 +1,401 @@
+"""
+SessionStore 存储层测试
+"""
+
+import json
+
+import pytest
+
+from backend.app.session.index_journal import SessionIndexJournal
+from backend.app.session.session import SessionStore
+from backend.app.session.transcript import TranscriptWriter
+
+
+def _read_entries(path):
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+class TestTranscriptWriter:
+    """测试缓冲式 transcript 写入器"""
+
+    def test_buffers_until_turn_end(self, tmp_path):
+        """测试条目在轮次边界前只停留在缓冲区"""
+        writer = TranscriptWriter(tmp_path, durability="flush", flush_entries=100, flush_interval=60)
+        path = writer.path_for("s1", "main")
+
+        writer.append("s1", "main", {"type": "user", "content": "hi"})
+        writer.append("s1", "main", {"type": "assistant", "content": "hello"})
+        assert path.read_text() == ""
+        assert writer.stats() == {"open_handles": 1, "buffered_entries": 2}
+
+        writer.end_turn("s1", "main")
+        assert [e["type"] for e in _read_entries(path)] == ["user", "assistant"]
+        writer.close()
+
+    def test_size_threshold_flushes(self, tmp_path):
+        """测试达到条目数阈值时自动写入"""
+        writer = TranscriptWriter(tmp_path, flush_entries=3, flush_interval=60)
+        for i in range(3):
+            writer.append("s1", "main", {"i": i})
+        assert len(_read_entries(writer.path_for("s1", "main"))) == 3
+        writer.close()
+
+    def test_durability_none_defers_until_close(self, tmp_path):
+        """测试 none 模式在轮次边界不写入"""
+        writer = TranscriptWriter(tmp_path, durability="none", flush_entries=100, flush_interval=60)
+        writer.append("s1", "main", {"i": 1})
+        writer.end_turn("s1", "main")
+        assert writer.path_for("s1", "main").read_text() == ""
+
+        writer.close()
+        assert _read_entries(writer.path_for("s1", "main")) == [{"i": 1}]
+
+    def test_invalid_durability(self, tmp_path):
+        """测试无效的持久化级别"""
+        with pytest.raises(ValueError):
+            TranscriptWriter(tmp_path, durability="sometimes")
+
+    def test_handle_limit(self, tmp_path):
+        """测试句柄数量上限（关闭最久未使用的句柄并写入其缓冲）"""
+        writer = TranscriptWriter(tmp_path, max_open_handles=2, flush_entries=100, flush_interval=60)
+        for agent in ("a", "b", "c"):
+            writer.append("s1", agent, {"agent": agent})
+        assert writer.stats()["open_handles"] == 2
+        assert _read_entries(writer.path_for("s1", "a")) == [{"agent": "a"}]
+        writer.close()
+
+
+class TestSessionIndexJournal:
+    """测试会话索引日志"""
+
+    def test_replay_without_snapshot(self, tmp_path):
+        """测试未写快照时通过重放日志恢复索引"""
+        journal = SessionIndexJournal(tmp_path, checkpoint_every=100)
+        journal.load()
+        journal.put("k1", {"session_key": "k1", "message_count": 0})
+        journal.update("k1", message_count=2)
+        journal.put("k2", {"session_key": "k2", "message_count": 0})
+        journal.delete("k2")
+        assert not (tmp_path / "sessions.json").exists()
+
+        index = SessionIndexJournal(tmp_path).load()
+        assert index == {"k1": {"session_key": "k1", "message_count": 2}}
+
+    def test_checkpoint_truncates_journal(self, tmp_path):
+        """测试达到阈值后写快照并清空日志"""
+        journal = SessionIndexJournal(tmp_path, checkpoint_every=3)
+        journal.load()
+        journal.put("k1", {"message_count": 0})
+        journal.update("k1", message_count=1)
+        journal.update("k1", message_count=2)
+
+        assert json.loads((tmp_path / "sessions.json").read_text()) == {"k1": {"message_count": 2}}
+        assert (tmp_path / "sessions.journal.jsonl").read_text() == ""
+
+    def test_replay_is_idempotent(self, tmp_path):
+        """测试快照后残留的日志重放不会重复计数"""
+        (tmp_path / "sessions.json").write_text(json.dumps({"k1": {"message_count": 5}}))
+        (tmp_path / "sessions.journal.jsonl").write_text(
+            json.dumps({"op": "update", "key": "k1", "fields": {"message_count": 5}}) + "\n"
+            + '{"op": "update", "key"'  # 崩溃留下的半行
+        )
+        assert SessionIndexJournal(tmp_path).load() == {"k1": {"message_count": 5}}
+
+    def test_append_after_torn_line(self, tmp_path):
+        """测试崩溃留下半行后，新的记录不会接在半行后面"""
+        (tmp_path / "sessions.journal.jsonl").write_text(
+            json.dumps({"op": "put", "key": "k1", "fields": {"message_count": 1}}) + "\n"
+            + '{"op": "update", "key"'  # 崩溃留下的半行
+        )
+        journal = SessionIndexJournal(tmp_path, checkpoint_every=100)
+        journal.load()
+        journal.put("k2", {"message_count": 0})
+
+        assert SessionIndexJournal(tmp_path).load() == {"k1": {"message_count": 1}, "k2": {"message_count": 0}}
+        assert all(json.loads(line) for line in (tmp_path / "sessions.journal.jsonl").read_text().splitlines())
+
+
+class TestSessionStoreTranscript:
+    """测试 SessionStore 的 transcript 读写"""
+
+    def test_save_turn_and_load_history(self, tmp_path):
+        """测试保存一轮对话后可以加载"""
+        store = SessionStore(tmp_path)
+        key = store.create_session("k1")
+        store.set_current_key(key)
+
+        store.save_turn("main", "question", "answer")
+        store.save_tool_result("main", "bash", "call_1", "output")
+
+        history = store.load_history("main", key)
+        assert [type(m).__name__ for m in history] == ["HumanMessage", "AIMessage", "ToolMessage"]
+        assert store.list_sessions()[0]["message_count"] == 1
+        store.close()
+
+        # 重新打开后元数据仍然存在
+        assert SessionStore(tmp_path).list_sessions()[0]["message_count"] == 1
+
+    def test_switch_session_closes_handles(self, tmp_path):
+        """测试切换会话时关闭旧会话的句柄"""
+        store = SessionStore(tmp_path)
+        store.set_current_key("k1")
+        store.save_tool_result("main", "bash", "call_1", "output")
+
+        store.set_current_key("k2")
+        assert _read_entries(tmp_path / "k1" / "main.jsonl")[-1]["type"] == "tool_result"
+        store.close()
+
+
+class TestTailLoading:
+    """测试基于偏移索引的尾部加载"""
+
+    def _store_with_turns(self, tmp_path, turns):
+        store = SessionStore(tmp_path)
+        store.set_current_key("k1")
+        for i in range(turns):
+            store.save_turn("main", f"q{i}", f"a{i}")
+        return store
+
+    def test_max_turns(self, tmp_path):
+        """测试只加载最后 N 轮"""
+        store = self._store_with_turns(tmp_path, 10)
+        history = store.load_history("main", "k1", max_turns=3)
+        assert [m.content for m in history] == ["q7", "a7", "q8", "a8", "q9", "a9"]
+        store.close()
+
+    def test_since_compaction(self, tmp_path):
+        """测试从最近一次压缩事件开始加载"""
+        store = self._store_with_turns(tmp_path, 3)
+        store.save_compaction("main", "manual", 6, 2)
+        store.save_turn("main", "after", "compaction")
+        history = store.load_history("main", "k1", since_compaction=True)
+        assert [m.content for m in history] == ["after", "compaction"]
+        store.close()
+
+    def test_rebuilds_missing_index(self, tmp_path):
+        """测试旧会话缺少偏移索引时自动重建"""
+        store = self._store_with_turns(tmp_path, 5)
+        store.close()
+        offsets = tmp_path / "k1" / "main.offsets.jsonl"
+        offsets.unlink()
+
+        store = SessionStore(tmp_path)
+        history = store.load_history("main", "k1", max_turns=2)
+        assert [m.content for m in history] == ["q3", "a3", "q4", "a4"]
+        assert offsets.exists()
+
+
+class TestSnapshotResume:
+    """测试压缩快照恢复"""
+
+    def test_resume_from_snapshot(self, tmp_path):
+        """测试恢复 = 最新快照 + 快照之后的 transcript 条目"""
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        store = SessionStore(tmp_path)
+        store.set_current_key("k1")
+        for i in range(5):
+            store.save_turn("main", f"q{i}", f"a{i}")
+        store.save_compaction("main", "manual", 10, 2)
+        store.save_snapshot("main", [HumanMessage(content="summary"), AIMessage(content="ok")], 42)
+        store.save_turn("main", "q5", "a5")
+        store.close()
+
+        history = SessionStore(tmp_path).load_resume_history("main", "k1")
+        assert [m.content for m in history] == ["summary", "ok", "q5", "a5"]
+
+    def test_resume_without_snapshot(self, tmp_path):
+        """测试没有快照时退回到尾部加载"""
+        store = SessionStore(tmp_path)
+        store.set_current_key("k1")
+        for i in range(3):
+            store.save_turn("main", f"q{i}", f"a{i}")
+        history = store.load_resume_history("main", "k1", max_turns=1)
+        assert [m.content for m in history] == ["q2", "a2"]
+        store.close()
+
+    def test_keeps_latest_versions(self, tmp_path):
+        """测试只保留最近的快照版本"""
+        from langchain_core.messages import HumanMessage
+        from backend.app.session.snapshot import SnapshotStore
+
+        snapshots = SnapshotStore(tmp_path, keep=2)
+        for i in range(4):
+            snapshots.save("main", [HumanMessage(content=str(i))], token_count=i, transcript_offset=0)
+        assert sorted(p.name for p in (tmp_path / "snapshots" / "main").iterdir()) == ["000003.json", "000004.json"]
+        assert snapshots.load_latest("main")["messages"][0].content == "3"
+
+
+class TestSegments:
+    """测试 transcript 分段轮转与压缩"""
+
+    def _store(self, tmp_path, segment_max_bytes=200):
+        store = SessionStore(tmp_path)
+        store._backend.writer.segment_max_bytes = segment_max_bytes
+        store.set_current_key("k1")
+        return store
+
+    def test_rotation_is_transparent(self, tmp_path):
+        """测试轮转后的压缩分段可以被透明读取"""
+        from backend.app.session.segments import list_segments
+
+        store = self._store(tmp_path)
+        for i in range(20):
+            store.save_turn("main", f"q{i}", f"a{i}")
+
+        path = tmp_path / "k1" / "main.jsonl"
+        assert list_segments(path)
+        assert all(p.suffix in (".gz", ".zst") for p in list_segments(path))
+
+        history = store.load_history("main", "k1")
+        assert [m.content for m in history[::2]] == [f"q{i}" for i in range(20)]
+        tail = store.load_history("main", "k1", max_turns=15)
+        assert [m.content for m in tail[::2]] == [f"q{i}" for i in range(5, 20)]
+        store.close()
+
+    def test_full_history_replaces_segments(self, tmp_path):
+        """测试 save_full_history 覆盖写入后完整读取不再包含已轮转的旧历史"""
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        from backend.app.session.segments import list_segments
+
+        store = self._store(tmp_path)
+        for i in range(20):
+            store.save_turn("main", f"q{i}", f"a{i}")
+        assert list_segments(tmp_path / "k1" / "main.jsonl")
+
+        store.save_full_history("main", [HumanMessage(content="new q"), AIMessage(content="new a")])
+        assert not list_segments(tmp_path / "k1" / "main.jsonl")
+        assert [m.content for m in store.load_history("main", "k1")] == ["new q", "new a"]
+        store.save_turn("main", "q1", "a1")
+        assert [m.content for m in store.load_history("main", "k1")] == ["new q", "new a", "q1", "a1"]
+        store.close()
+
+    def test_snapshot_survives_rotation(self, tmp_path):
+        """测试快照之后发生轮转时仍能恢复"""
+        from langchain_core.messages import HumanMessage
+
+        store = self._store(tmp_path)
+        store.save_turn("main", "q0", "a0")
+        store.save_snapshot("main", [HumanMessage(content="summary")], 10)
+        for i in range(1, 12):
+            store.save_turn("main", f"q{i}", f"a{i}")
+        store.close()
+
+        history = SessionStore(tmp_path).load_resume_history("main", "k1")
+        assert history[0].content == "summary"
+        assert [m.content for m in history[1::2]] == [f"q{i}" for i in range(1, 12)]
+
+    def test_gc_compresses_cold_sessions(self, tmp_path):
+        """测试 gc 压缩冷会话并报告回收的字节数"""
+        store = self._store(tmp_path, segment_max_bytes=1 << 20)
+        for i in range(50):
+            store.save_turn("main", "repeated question " * 5, "repeated answer " * 5)
+        store.set_current_key("k2")
+
+        report = store.gc(cold_days=0)
+        assert report["rotated"] >= 1
+        assert report["reclaimed"] > 0
+        assert not (tmp_path / "k1" / "main.jsonl").exists()
+        assert len(store.load_history("main", "k1")) == 100
+        store.close()
+
+
+class TestSQLiteBackend:
+    """测试 SQLite 存储后端"""
+
+    def test_history_and_resume(self, tmp_path):
+        """测试 SQLite 后端的尾部加载、压缩边界和快照恢复"""
+        from langchain_core.messages import HumanMessage
+
+        store = SessionStore(tmp_path, backend="sqlite")
+        store.set_current_key("k1")
+        for i in range(5):
+            store.save_turn("main", f"q{i}", f"a{i}")
+        store.save_compaction("main", "manual", 10, 2)
+        store.save_snapshot("main", [HumanMessage(content="summary")], 42)
+        store.save_turn("main", "q5", "a5")
+
+        assert [m.content for m in store.load_history("main", "k1", max_turns=2)] == ["q4", "a4", "q5", "a5"]
+        assert [m.content for m in store.load_history("main", "k1", since_compaction=True)] == ["q5", "a5"]
+        store.close()
+
+        store = SessionStore(tmp_path, backend="sqlite")
+        assert [m.content for m in store.load_resume_history("main", "k1")] == ["summary", "q5", "a5"]
+        meta = store.get_session("k1")
+        assert meta["message_count"] == 6 and meta["compaction_count"] == 1
+        store.close()
+
+    def test_paging_and_extra_fields(self, tmp_path):
+        """测试分页列出会话和非独立列字段"""
+        store = SessionStore(tmp_path, backend="sqlite")
+        for i in range(5):
+            store.create_session(f"k{i}")
+            store.set_current_key(f"k{i}")
+            store.save_turn("main", "q", "a")
+        keys = [s["session_key"] for s in store.list_sessions(limit=2, offset=1)]
+        assert keys == ["k3", "k2"]
+
+        store.set_skills_dir("/tmp/skills", key="k2")
+        assert store.list_sessions(limit=1)[0]["session_key"] == "k2"
+        assert str(store.get_skills_dir("k2")) == "/tmp/skills"
+
+        assert store.delete_session("k2")
+        assert store.get_session("k2") is None
+        assert store.load_history("main", "k2") == []
+        store.close()
+
+    def test_concurrent_writers(self, tmp_path):
+        """测试多个连接同时写入同一会话时计数不丢失"""
+        import threading
+
+        SessionStore(tmp_path, backend="sqlite").create_session("shared")
+        stores = [SessionStore(tmp_path, backend="sqlite") for _ in range(4)]
+
+        def worker(store, n):
+            for i in range(25):
+                store.save_turn(f"agent{n}", f"q{i}", f"a{i}", key="shared")
+
+        threads = [threading.Thread(target=worker, args=(s, n)) for n, s in enumerate(stores)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert stores[0].get_session("shared")["message_count"] == 100
+        assert len(stores[0].load_history("agent3", "shared")) == 50
+        for s in stores:
+            s.close()
+
+
+class TestAsyncIO:
+    """测试异步会话 I/O 和 trace 后台写入"""
+
+    def test_async_save_and_load(self, tmp_path):
+        """测试异步接口按提交顺序执行（后提交的读取能看到之前的写入）"""
+        import asyncio
+
+        store = SessionStore(tmp_path)
+        store.set_current_key("k1")
+
+        async def run():
+            await asyncio.gather(*(store.asave_turn("main", f"q{i}", f"a{i}") for i in range(5)))
+            return await store.aload_history("main", "k1", max_turns=2)
+
+        history = asyncio.run(run())
+        assert [m.content for m in history] == ["q3", "a3", "q4", "a4"]
+        store.close()
+
+    def test_trace_write_behind(self, tmp_path):
+        """测试 trace 事件由后台线程写入，flush 后可读"""
+        pytest.importorskip("langchain_openai")  # backend.app.core 包初始化时导入
+        from backend.app.core.guards.tracer import Tracer
+
+        tracer = Tracer(write_behind=True)
+        tracer.set_session_dir_fn(lambda: tmp_path)
+        for i in range(100):
+            tracer.emit("tool.call", i=i)
+        tracer.flush()
+
+        events = _read_entries(tmp_path / "trace.jsonl")
+        assert [e["i"] for e in events] == list(range(100))
@@ -0,0 +1,75 @@
+"""
+任务事件流测试
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.app.task import TaskService, TaskValidationError
+from backend.app.task.cached_repository import CachedTaskRepository
+from backend.app.task.events import TaskEventStream
+
+
+class TestTaskEvents:
+    """测试事件发布、订阅唤醒和基于偏移量的续读"""
+
+    def test_service_publishes_after_commit(self, tmp_path):
+        """测试创建、认领、解除阻塞事件；事务失败时不发布"""
+        service = TaskService(CachedTaskRepository(tmp_path))
+        seen = []
+        service.events.subscribe(callback=lambda e: seen.append((e.kind, e.task_id)))
+
+        first = service.create_task("First")
+        second = service.create_task("Second")
+        service.add_dependency(second.id, first.id)
+        with pytest.raises(TaskValidationError):
+            service.add_dependency(first.id, second.id)
+        service.start_task(first.id, owner="alice")
+        service.complete_task(first.id)
+
+        assert seen == [
+            ("created", first.id), ("created", second.id),
+            ("status_changed", first.id), ("claimed", first.id),
+            ("unblocked", second.id), ("status_changed", first.id),
+        ]
+
+    def test_wait_async_wakes_immediately(self, tmp_path):
+        """测试事件循环中的订阅者在事件发布后立即被唤醒，而不是等到超时"""
+        stream = TaskEventStream()
+        subscription = stream.subscribe({"unblocked"})
+
+        async def consume():
+            threading.Timer(0.05, lambda: stream.publish("unblocked", 7, by=3)).start()
+            start = time.monotonic()
+            events = await subscription.wait_async(timeout=5)
+            return events, time.monotonic() - start
+
+        stream.publish("created", 1)  # 不关心的事件不会唤醒
+        events, elapsed = asyncio.run(consume())
+        assert [(e.kind, e.task_id, e.data) for e in events] == [("unblocked", 7, {"by": 3})]
+        assert elapsed < 1
+        subscription.close()
+        stream.publish("unblocked", 8)
+        assert subscription.poll() == []
+
+    def test_log_resume_from_cursor(self, tmp_path):
+        """测试持久化日志：两个事件流共用日志，消费者从保存的偏移量继续读取"""
+        log = tmp_path / "events.jsonl"
+        writer_a, writer_b = TaskEventStream(log), TaskEventStream(log)
+        writer_a.publish("created", 1)
+        writer_b.publish("claimed", 1, owner="bob")
+
+        reader = TaskEventStream(log)
+        events = reader.read()
+        assert [(e.kind, e.task_id) for e in events] == [("created", 1), ("claimed", 1)]
+        reader.save_cursor("ui", events[-1].offset)
+
+        writer_a.publish("status_changed", 1, old="pending", new="in_progress")
+        resumed = TaskEventStream(log)
+        cursor = resumed.load_cursor("ui")
+        assert [e.kind for e in resumed.read(after=cursor)] == ["status_changed"]
+        assert resumed.read(after=cursor, kinds={"claimed"}) == []
+        assert resumed.last_offset() == log.stat().st_size
@@ -0,0 +1,142 @@
+"""
+任务依赖图测试
+"""
+
+from datetime import datetime
+
+import pytest
+
+from backend.app.task import Task, TaskService, TaskStatus, TaskValidationError
+from backend.app.task.cached_repository import CachedTaskRepository
+from backend.app.task.graph import TaskGraph
+
+
+def make_task(task_id, blocked_by=(), status=TaskStatus.PENDING):
+    now = datetime.now()
+    return Task(id=task_id, subject=f"Task {task_id}", status=status,
+                blocked_by=list(blocked_by), created_at=now, updated_at=now)
+
+
+class TestTaskGraph:
+    """测试依赖图的查询"""
+
+    def test_cycle_detection_and_order(self):
+        """测试环检测、拓扑顺序和就绪任务"""
+        graph = TaskGraph.from_tasks([
+            make_task(1), make_task(2, [1]), make_task(3, [2]), make_task(4, [1]),
+        ])
+        assert graph.would_cycle(1, 3)
+        assert graph.would_cycle(2, 2)
+        assert not graph.would_cycle(4, 3)
+        assert graph.topological_order() == [1, 2, 3, 4]
+        assert graph.ready_tasks() == [1]
+
+        graph.update(make_task(1, status=TaskStatus.COMPLETED))
+        assert graph.ready_tasks() == [2, 4]
+
+        graph.update(make_task(1, [3]))
+        with pytest.raises(TaskValidationError):
+            graph.topological_order()
+
+    def test_critical_path(self):
+        """测试最长依赖链只包含未结束的任务"""
+        graph = TaskGraph.from_tasks([
+            make_task(1, status=TaskStatus.COMPLETED),
+            make_task(2, [1]), make_task(3, [2]), make_task(4, [3]), make_task(5, [2]),
+        ])
+        assert graph.critical_path() == [2, 3, 4]
+        assert graph.critical_path(weight=lambda t: 10 if t == 5 else 1) == [2, 5]
+
+
+class TestServiceGraph:
+    """测试 TaskService 通过依赖图维护依赖关系"""
+
+    def test_completion_reads_only_dependents(self, tmp_path):
+        """测试完成任务时只读取被它阻塞的任务"""
+        repo = CachedTaskRepository(tmp_path)
+        service = TaskService(repository=repo)
+        root = service.create_task("Root")
+        child = service.create_task("Child")
+        for i in range(10):
+            service.create_task(f"Unrelated {i}")
+        service.add_dependency(child.id, root.id)
+        with pytest.raises(TaskValidationError):
+            service.add_dependency(root.id, child.id)
+
+        reads = []
+        original = repo.get_by_id
+        repo.get_by_id = lambda task_id: reads.append(task_id) or original(task_id)
+        service.start_task(root.id)
+        service.complete_task(root.id)
+
+        assert sorted(set(reads)) == [root.id, child.id]
+        assert [t.id for t in service.ready_tasks()][0] == child.id
+        assert service.topological_order()[:2] == [root.id, child.id]
+
+    def test_failed_commit_does_not_leave_phantom_edges(self, tmp_path, monkeypatch):
+        """测试事务提交失败后依赖图不保留未写入的边"""
+        repo = CachedTaskRepository(tmp_path)
+        service = TaskService(repository=repo)
+        first = service.create_task("First")
+        second = service.create_task("Second")
+        assert service.graph.ready_tasks() == [first.id, second.id]
+
+        def fail(staged):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(repo, "_commit", fail)
+        with pytest.raises(OSError):
+            service.add_dependency(second.id, first.id)
+        monkeypatch.undo()
+
+        assert service.get_task(second.id).blocked_by == []
+        assert service.graph.ready_tasks() == [first.id, second.id]
+        service.add_dependency(first.id, second.id)  # 不会被回滚掉的边误判为循环依赖
+
+
+class TestBulkCreation:
+    """测试批量创建任务和任务树"""
+
+    def test_task_tree(self, tmp_path):
+        """测试任务树一次分配连续ID，依赖边与逐个创建时一致"""
+        service = TaskService(repository=CachedTaskRepository(tmp_path))
+        parent, steps = service.create_task_tree(
+            "Ship feature", [{"subject": f"Step {i}"} for i in range(1, 4)], plan="### Step 1: ..."
+        )
+
+        assert [t.id for t in steps] == [parent.id + 1, parent.id + 2, parent.id + 3]
+        assert parent.blocked_by == [t.id for t in steps]
+        assert steps[1].blocked_by == [steps[0].id]
+        assert steps[0].blocks == [parent.id, steps[1].id]
+        assert service.ready_tasks()[0].id == steps[0].id
+        assert service.critical_path() == [steps[0].id, steps[1].id, steps[2].id, parent.id]
+
+        reloaded = TaskService(repository=CachedTaskRepository(tmp_path))
+        assert reloaded.get_task(parent.id).plan == "### Step 1: ..."
+
+    def test_invalid_batch_writes_nothing(self, tmp_path):
+        """测试循环依赖或无效字段时不分配ID、不写入任何文件"""
+        repo = CachedTaskRepository(tmp_path)
+        service = TaskService(repository=repo)
+        with pytest.raises(TaskValidationError):
+            service.create_tasks_bulk([{"subject": "A", "depends_on": [1]}, {"subject": "B", "depends_on": [0]}])
+        with pytest.raises(TaskValidationError):
+            service.create_tasks_bulk([{"subject": "A"}, {"subject": ""}])
+        with pytest.raises(TaskValidationError):
+            service.create_task_tree("Parent", [{"subject": "A", "depends_on": [-1]}])
+
+        assert list(tmp_path.glob("task_*.json")) == []
+        assert repo.get_next_id() == 1
+
+    def test_bulk_sqlite(self, tmp_path):
+        """测试 SQLite 仓储在一个事务中写入整批任务"""
+        from backend.app.task import SQLiteTaskRepository
+
+        service = TaskService(repository=SQLiteTaskRepository(tmp_path))
+        service.create_task("Existing")
+        tasks = service.create_tasks_bulk([{"subject": "A", "tags": ["x"]}, {"subject": "B", "depends_on": [0]}])
+
+        assert [t.id for t in tasks] == [2, 3]
+        assert service.get_task(3).blocked_by == [2]
+        assert [t.id for t in service.list_tasks_by_tags(["x"])] == [2]
+        assert service.create_task("Next").id == 4
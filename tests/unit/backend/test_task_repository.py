@@ -0,0 +1,262 @@
+"""
+任务仓储测试
+"""
+
+import threading
+
+import pytest
+
+from backend.app.task.id_allocator import TaskIdAllocator
+
+
+class TestTaskIdAllocator:
+    """测试基于计数器文件的任务ID分配"""
+
+    def test_seeds_from_existing_files(self, tmp_path):
+        """测试计数器缺失时从已有任务文件开始，之后只读写计数器"""
+        (tmp_path / "task_7_fix-login.json").write_text("{}")
+        allocator = TaskIdAllocator(tmp_path)
+
+        assert allocator.allocate() == 8
+        (tmp_path / "task_8_x.json").write_text("{}")
+        assert allocator.allocate_range(3) == range(9, 12)
+        assert TaskIdAllocator(tmp_path).peek() == 12
+
+    def test_concurrent_allocation_is_unique(self, tmp_path):
+        """测试多个线程、多个分配器实例并发分配时不会重复"""
+        ids = []
+
+        def worker():
+            allocator = TaskIdAllocator(tmp_path)
+            for _ in range(50):
+                ids.append(allocator.allocate())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(ids) == list(range(1, 401))
+
+    def test_reserve_above_and_invalid_count(self, tmp_path):
+        """测试 reserve_above 跳过已占用的ID，非正数数量报错"""
+        allocator = TaskIdAllocator(tmp_path)
+        allocator.reserve_above(41)
+        assert allocator.allocate() == 42
+        with pytest.raises(ValueError):
+            allocator.allocate_range(0)
+
+
+class TestCachedTaskRepository:
+    """测试带内存索引的任务仓储"""
+
+    @staticmethod
+    def _task(task_id, subject, **kwargs):
+        from datetime import datetime
+
+        from backend.app.task import Task
+
+        now = datetime.now()
+        return Task(id=task_id, subject=subject, created_at=now, updated_at=now, **kwargs)
+
+    def test_index_queries_follow_saves(self, tmp_path):
+        """测试 save / delete 后各索引立即更新"""
+        from backend.app.task import CachedTaskRepository, TaskPriority, TaskStatus
+
+        repo = CachedTaskRepository(tmp_path)
+        repo.save(self._task(1, "Fix login", owner="alice", tags=["auth"]))
+        repo.save(self._task(2, "Add cache", priority=TaskPriority.HIGH, blocked_by=[1]))
+
+        assert [t.id for t in repo.find_available_tasks()] == [1]
+        assert [t.id for t in repo.find_blocked_tasks()] == [2]
+        assert [t.id for t in repo.find_by_tags(["AUTH"])] == [1]
+
+        task = repo.get_by_id(1)
+        task.status = TaskStatus.IN_PROGRESS
+        task.subject = "Fix login flow"
+        repo.save(task)
+        assert [t.id for t in repo.find_by_status(TaskStatus.PENDING)] == [2]
+        assert [t.id for t in repo.find_by_owner("alice")] == [1]
+        assert len(list(tmp_path.glob("task_1_*.json"))) == 1
+
+        repo.delete(2)
+        assert repo.find_by_priority(TaskPriority.HIGH) == []
+        assert not repo.exists(2)
+
+    def test_external_writes_become_visible(self, tmp_path):
+        """测试其他仓储实例（其他进程）的写入在下一次查询时可见"""
+        from backend.app.task import CachedTaskRepository, TaskRepository
+
+        cached = CachedTaskRepository(tmp_path)
+        plain = TaskRepository(tmp_path)
+        plain.save(self._task(1, "First"))
+        assert [t.subject for t in cached.find_all()] == ["First"]
+
+        plain.save(self._task(1, "Renamed"))
+        plain.save(self._task(2, "Second"))
+        assert [t.subject for t in cached.find_all()] == ["Renamed", "Second"]
+
+        plain.delete(1)
+        assert [t.id for t in cached.find_all()] == [2]
+
+    def test_repeated_queries_do_not_reparse(self, tmp_path):
+        """测试未变化的文件只解析一次，查询结果与普通仓储一致"""
+        from backend.app.task import CachedTaskRepository, TaskRepository
+
+        plain = TaskRepository(tmp_path)
+        for i in range(1, 21):
+            plain.save(self._task(i, f"Task {i}", tags=["even"] if i % 2 == 0 else []))
+
+        cached = CachedTaskRepository(tmp_path)
+        for _ in range(5):
+            assert [t.id for t in cached.find_by_tags(["even"])] == sorted(t.id for t in plain.find_by_tags(["even"]))
+        assert cached.stats()["loads"] == 20
+
+
+class TestSQLiteTaskRepository:
+    """测试 SQLite 任务仓储"""
+
+    _task = staticmethod(TestCachedTaskRepository._task)
+
+    def test_indexed_queries_and_service(self, tmp_path):
+        """测试索引查询、依赖解除和级联删除"""
+        from backend.app.task import SQLiteTaskRepository, TaskPriority, TaskService, TaskStatus
+
+        service = TaskService(repository=SQLiteTaskRepository(tmp_path))
+        first = service.create_task("Design schema", plan="1. tables", tags=["DB"])
+        second = service.create_task("Write importer", priority=TaskPriority.HIGH)
+        service.add_dependency(second.id, first.id)
+
+        repo = service.repository
+        assert [t.id for t in repo.find_blocked_tasks()] == [second.id]
+        assert [t.id for t in repo.find_blocked_by(first.id)] == [second.id]
+        assert [t.id for t in repo.find_by_tags(["db"])] == [first.id]
+        assert repo.get_by_id(first.id).plan == "1. tables"
+        assert repo.get_by_id(first.id).blocks == [second.id]
+
+        service.start_task(first.id)
+        service.complete_task(first.id)
+        assert [t.id for t in repo.find_available_tasks()] == [second.id]
+        assert [t.id for t in repo.find_by_status(TaskStatus.COMPLETED)] == [first.id]
+
+        service.delete_task(first.id)
+        assert not repo.exists(first.id)
+        assert repo.find_by_tags(["db"]) == []
+
+    def test_transaction_rolls_back(self, tmp_path):
+        """测试事务中抛出异常时所有修改回滚"""
+        from backend.app.task import SQLiteTaskRepository
+
+        repo = SQLiteTaskRepository(tmp_path)
+        repo.save(self._task(1, "Keep"))
+        with pytest.raises(RuntimeError):
+            with repo.transaction():
+                repo.save(self._task(2, "Dropped"))
+                repo.delete(1)
+                raise RuntimeError("boom")
+        assert [t.subject for t in repo.find_all()] == ["Keep"]
+
+    def test_concurrent_updates_are_not_lost(self, tmp_path):
+        """测试多个连接在事务中并发读-改-写同一任务"""
+        from backend.app.task import SQLiteTaskRepository
+
+        SQLiteTaskRepository(tmp_path).save(self._task(1, "Counter", description="0"))
+
+        def worker():
+            repo = SQLiteTaskRepository(tmp_path)
+            for _ in range(25):
+                with repo.transaction():
+                    task = repo.get_by_id(1)
+                    task.description = str(int(task.description) + 1)
+                    repo.save(task)
+            repo.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert SQLiteTaskRepository(tmp_path).get_by_id(1).description == "100"
+
+    def test_import_json_once(self, tmp_path):
+        """测试从 JSON 文件仓储一次性导入，之后的ID接着分配"""
+        from backend.app.task import TaskRepository, create_repository
+
+        plain = TaskRepository(tmp_path)
+        plain.save(self._task(3, "Legacy", tags=["old"], blocked_by=[1]))
+        plain.save(self._task(5, "Another"))
+
+        repo = create_repository(tmp_path, kind="sqlite")
+        assert [t.id for t in repo.find_all()] == [3, 5]
+        assert repo.get_by_id(3).blocked_by == [1]
+        assert repo.import_json() == 0
+        assert repo.get_next_id() == 6
+
+
+class TestCrashSafeWrites:
+    """测试任务文件的原子写入和预写日志"""
+
+    _task = staticmethod(TestCachedTaskRepository._task)
+
+    def test_rename_keeps_single_file(self, tmp_path):
+        """测试改名只留下一个文件，没有残留的临时文件"""
+        from backend.app.task import TaskRepository
+
+        repo = TaskRepository(tmp_path)
+        repo.save(self._task(1, "Old name"))
+        repo.save(self._task(1, "New name"))
+        assert [p.name for p in tmp_path.glob("*task_*")] == ["task_1_new-name.json"]
+
+    def test_transaction_is_all_or_nothing(self, tmp_path):
+        """测试事务内的修改在提交前不可见，异常时全部丢弃"""
+        from backend.app.task import CachedTaskRepository
+
+        repo = CachedTaskRepository(tmp_path)
+        repo.save(self._task(1, "Keep"))
+        with pytest.raises(RuntimeError):
+            with repo.transaction():
+                repo.save(self._task(2, "Dropped"))
+                repo.delete(1)
+                assert [t.id for t in repo.find_all()] == [2]
+                raise RuntimeError("boom")
+        assert [t.subject for t in repo.find_all()] == ["Keep"]
+
+        with repo.transaction():
+            repo.save(self._task(2, "Second", blocked_by=[1]))
+            repo.save(self._task(1, "Keep", blocks=[2]))
+        assert [t.id for t in CachedTaskRepository(tmp_path).find_blocked_tasks()] == [2]
+        assert not (tmp_path / ".journal").exists()
+
+    def test_committed_journal_is_replayed(self, tmp_path):
+        """测试提交点之后崩溃时重放日志，提交点之前崩溃时丢弃"""
+        from backend.app.task import TaskRepository
+        from backend.app.task.journal import TaskJournal
+
+        repo = TaskRepository(tmp_path)
+        repo.save(self._task(1, "Before"))
+        journal = TaskJournal(tmp_path)
+        journal.write([(1, repo._serialize(self._task(1, "After"))), (2, repo._serialize(self._task(2, "New")))])
+        (tmp_path / ".journal.tmp").write_text('{"id": 3, "task": null}\n')
+
+        reopened = TaskRepository(tmp_path)
+        assert [t.subject for t in sorted(reopened.find_all(), key=lambda t: t.id)] == ["After", "New"]
+        assert not (tmp_path / ".journal").exists()
+        assert not (tmp_path / ".journal.tmp").exists()
+
+    def test_concurrent_service_updates(self, tmp_path):
+        """测试多个线程通过 TaskService 并发修改同一任务不会丢失更新"""
+        from backend.app.task import CachedTaskRepository, TaskService
+
+        TaskService(repository=CachedTaskRepository(tmp_path)).create_task("Shared")
+
+        def worker(n):
+            service = TaskService(repository=CachedTaskRepository(tmp_path))
+            for i in range(10):
+                service.add_tag(1, f"t{n}-{i}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(CachedTaskRepository(tmp_path).get_by_id(1).tags) == 40